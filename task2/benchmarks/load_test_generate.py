@@ -1,4 +1,4 @@
-import time, random
+import time, random, sys, math
 from datetime import date, timedelta
 from src.core.storage_repository import storage_repository
 from src.logics.osv_service import OSVCalculator
@@ -6,6 +6,8 @@ from src.models.nomenclature_model import nomenclature_model
 from src.models.unit_model import unit_model
 from src.models.group_model import group_model
 from src.models.warehouse_model import warehouse_model
+from src.models.osv_row_model import osv_row_model
+from src.logics.osv_service import OSVPrototype
 from datetime import date
 from src.settings_manager import settings_manager
 settings_manager._instance = None
@@ -26,7 +28,170 @@ def generate_random_transactions(repo, count=1000, start_date=date(2023,1,1), da
         tr = transaction_model(number=f"TX{i}", nomenclature=item, warehouse=wh, quantity=qty, unit=unit, date_=tdate)
         repo.add_transaction(tr)
 
+def legacy_generate(storage, start_date, end_date, warehouse=None):
+    """
+    Прежний алгоритм OSVPrototype.generate (O(номенклатура x транзакции)),
+    оставлен как эталон для сравнения
+    """
+    result = []
+    for n in storage.nomenclatures:
+        relevant = [t for t in storage.transactions
+                    if t.nomenclature == n and OSVPrototype._warehouse_match(t.warehouse, warehouse)]
+        if not relevant:
+            wh_obj = next((w for w in storage.warehouses if OSVPrototype._warehouse_match(w, warehouse)), None)
+            result.append(osv_row_model(wh_obj, n, n.unit, 0.0, 0.0, 0.0))
+            continue
+        opening = sum(t.unit.to_base(t.quantity) for t in relevant if t.date < start_date)
+        incoming = sum(t.unit.to_base(t.quantity) for t in relevant if start_date <= t.date <= end_date and t.quantity > 0)
+        outgoing = -sum(t.unit.to_base(t.quantity) for t in relevant if start_date <= t.date <= end_date and t.quantity < 0)
+        first_unit = relevant[0].unit
+        base_unit = first_unit.base if first_unit and first_unit.base else first_unit
+        result.append(osv_row_model(relevant[0].warehouse, n, base_unit, opening, incoming, outgoing))
+    return result
+
+
+def build_catalog(repo, items_count, warehouses_count=10):
+    """Заполняет репозиторий номенклатурой и складами для нагрузочного теста"""
+    u = unit_model("шт", 1, None)
+    u.id = 1
+    repo.add_unit(u)
+
+    g = group_model("Продукты")
+    g.id = 1
+    repo.add_group(g)
+
+    for i in range(items_count):
+        n = nomenclature_model(f"Товар {i}", f"Товар {i}", g, u)
+        n.id = i + 1
+        repo.add_nomenclature(n)
+
+    for i in range(warehouses_count):
+        w = warehouse_model(f"Склад №{i + 1}")
+        w.id = i + 1
+        repo.add_warehouse(w)
+
+
+def benchmark_generate(items_count=1_000, tx_count=50_000):
+    """
+    Сравнение однопроходного OSVPrototype.generate с прежним алгоритмом на одних и тех же
+    данных; оба времени измеряются (прежний алгоритм квадратичен - размеры по умолчанию
+    подобраны так, чтобы он завершался за десятки секунд).
+    Суммы складываются в другом порядке (корзины, checkpoint'ы), поэтому строки
+    эквивалентны с точностью до округления, а не побитово: выводится наибольшее расхождение.
+    """
+    repo = storage_repository()
+    build_catalog(repo, items_count)
+    generate_random_transactions(repo, count=tx_count)
+
+    start, end = date(2023, 6, 1), date(2023, 6, 30)
+    proto = OSVPrototype(repo)
+
+    t0 = time.time()
+    rows = proto.generate(start, end)
+    new_t = time.time() - t0
+
+    t0 = time.time()
+    legacy_rows = legacy_generate(repo, start, end)
+    legacy_t = time.time() - t0
+
+    pairs = [(x, y) for a, b in zip(rows, legacy_rows)
+             for x, y in ((a.opening, b.opening), (a.incoming, b.incoming), (a.outgoing, b.outgoing))]
+    equivalent = len(rows) == len(legacy_rows) and \
+        all(a.item.id == b.item.id for a, b in zip(rows, legacy_rows)) and \
+        all(math.isclose(x, y, rel_tol=1e-9, abs_tol=1e-6) for x, y in pairs)
+    max_diff = max((abs(x - y) for x, y in pairs), default=0.0)
+
+    print(f"generate: items={items_count}, tx={tx_count}, single-pass={new_t:.2f}s, "
+          f"legacy={legacy_t:.2f}s, speedup x{legacy_t / max(new_t, 1e-9):.0f}, "
+          f"equivalent_rows={equivalent}, max_abs_diff={max_diff:.3g}")
+
+
+def benchmark_parallel(items_count=10_000, tx_count=1_000_000, max_workers=None):
+    """
+    Масштабирование OSVPrototype.generate по числу процессов (1..max_workers).
+    Параллельный расчёт применяется только к колоночному хранилищу (OSVParallelAggregator.applicable):
+    транзакции переносятся в него, процессы читают строки сами. Период - весь год, чтобы
+    основную часть времени занимало суммирование, а не checkpoint'ы. Ускорение возможно
+    только при os.cpu_count() > 1.
+    """
+    import os, tempfile
+    from src.logics.osv_parallel import shutdown_pools
+
+    max_workers = max_workers or os.cpu_count() or 1
+    repo = storage_repository()
+    build_catalog(repo, items_count)
+    generate_random_transactions(repo, count=tx_count)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo.transaction_store_file = os.path.join(tmp, "transactions.col")
+        repo.save_transactions_columnar()
+        start, end = date(2023, 1, 1), date(2023, 12, 31)
+
+        OSVPrototype(repo).generate(start, end)  # индекс дат и checkpoint'ы строятся один раз
+        t0 = time.time()
+        serial_rows = OSVPrototype(repo).generate(start, end)
+        serial_t = time.time() - t0
+        print(f"parallel: items={items_count}, tx={tx_count}, cpu={os.cpu_count()}, workers=1 (serial) {serial_t:.2f}s")
+
+        for workers in range(2, max_workers + 1):
+            proto = OSVPrototype(repo, workers=workers)
+            proto.generate(start, end)  # прогрев пула
+            t0 = time.time()
+            rows = proto.generate(start, end)
+            t = time.time() - t0
+            same = [(r.item.id, r.opening, r.incoming, r.outgoing) for r in rows] == \
+                   [(r.item.id, r.opening, r.incoming, r.outgoing) for r in serial_rows]
+            print(f"parallel: workers={workers} {t:.2f}s, speedup x{serial_t / max(t, 1e-9):.2f}, identical={same}")
+
+        shutdown_pools()
+        repo.transaction_store.close()
+
+
+def benchmark_serialize(items_count=1_000, tx_count=100_000):
+    """
+    Стоимость конвертации одного объекта: подготовленные по типам поля
+    (convert_factory.convert) против прежнего рефлексивного пути (convert_reflective).
+    """
+    from src.logics.convert_factory import convert_factory
+
+    repo = storage_repository()
+    build_catalog(repo, items_count)
+    generate_random_transactions(repo, count=tx_count)
+    factory = convert_factory()
+    transactions = list(repo.transactions)
+
+    results = {}
+    for name, convert in (("reflective", factory.convert_reflective), ("per-type", factory.convert)):
+        convert(transactions[0])  # компиляция / прогрев
+        t0 = time.time()
+        results[name] = [convert(t) for t in transactions]
+        t = time.time() - t0
+        print(f"serialize: {name}: tx={tx_count}, {t:.2f}s, {t / tx_count * 1e6:.1f} us/object")
+
+    same = results["per-type"] == results["reflective"]
+    print(f"serialize: identical={same}")
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "serialize":
+        items = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+        txs = int(sys.argv[3]) if len(sys.argv) > 3 else 100_000
+        benchmark_serialize(items, txs)
+        sys.exit(0)
+
+    if len(sys.argv) > 1 and sys.argv[1] == "parallel":
+        items = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+        txs = int(sys.argv[3]) if len(sys.argv) > 3 else 1_000_000
+        workers = int(sys.argv[4]) if len(sys.argv) > 4 else None
+        benchmark_parallel(items, txs, workers)
+        sys.exit(0)
+
+    if len(sys.argv) > 1 and sys.argv[1] == "generate":
+        items = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+        txs = int(sys.argv[3]) if len(sys.argv) > 3 else 50_000
+        benchmark_generate(items, txs)
+        sys.exit(0)
+
     repo = storage_repository()
     repo.transactions.clear()
 
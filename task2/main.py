@@ -1,22 +1,151 @@
 import connexion
 from flask import request, Response, jsonify
 from datetime import datetime, date
-import json
 import os
 
-from src.core.storage_repository import storage_repository
-from src.start_service import start_service
+from src.core.repository_provider import repository_provider
 from src.settings_manager import settings_manager
 from src.logics.factory_entities import factory_entities
 from src.logics.convert_factory import convert_factory
+from src.logics.model_serializer import model_serializer
+from src.logics.response_json import response_json
+from src.logics.reference_normalizer import reference_normalizer
 from src.logics.osv_service import OSVCalculator
-from src.core.filter_utils import FilterUtils
 from src.models.filter_dto import FilterDTO
 from src.core.filter_parser import filter_parser
-from src.core.serializer import Serializer
+from src.core.paginator import paginator
+from src.core.json_encoder import json_encoder
+from src.core.response_compressor import response_compressor
+from src.core.validator import argument_exception, operation_exception
 
 
 app = connexion.FlaskApp(__name__)
+# Конвертация строк отчётов (без состояния - один экземпляр на приложение)
+report_converter = convert_factory()
+
+def collection_response(items, status=200, pager=None, next_cursor=None, convert=None, receipts=False):
+    """
+    Коллекция в формате запроса (?format=json|csv|xml или заголовок Accept,
+    по умолчанию JSON; factory_entities.negotiate). Формирователь берётся из кэша
+    factory_entities, ответ потоковый: элементы конвертируются (convert, по умолчанию
+    convert_factory) и пишутся по одному, поэтому память не растёт с размером
+    коллекции, а первые байты уходят сразу.
+    ?stream=0 - ответ одной строкой (например, ради Content-Length).
+    Вывод компактный, ?pretty=1 - с отступами (JSON, XML).
+    ?format=columnar (arrow/npz) - колоночный двоичный файл: колонки берутся из самих
+    элементов (response_columnar.create_columns), без словарей строк.
+    pager - поля элемента (?fields=), next_cursor - курсор следующей страницы (заголовок X-Next-Cursor).
+    ?normalized=1 (JSON) - документ {"rows": [...], "refs": {...}}: склады, номенклатура, единицы
+    и группы один раз в таблицах по id, строки содержат только id (reference_normalizer).
+    Ответ сжимается по Accept-Encoding (encoded_response).
+    receipts - коллекция рецептов: доступен также ?format=md (карточки рецептов),
+    для прочих коллекций ?format=md - ошибка 400, text/markdown в Accept пропускается.
+    """
+    try:
+        fmt = request_format(receipts)
+    except operation_exception as e:
+        return jsonify({"error": str(e)}), 400
+
+    body = collection_body(items, fmt, pager, convert, request_flag("stream", True))
+    response = encoded_response(body, factory_entities.MIME_TYPES[fmt], status, request_encoding())
+    return with_next_cursor(response, next_cursor)
+
+
+def collection_body(items, fmt, pager=None, convert=None, stream=True):
+    """ Тело коллекции в формате fmt (см. collection_response): генератор частей (stream) или строка/байты """
+    formatter = factory_entities.formatter(fmt, request_flag("pretty"))
+    if formatter.columnar:
+        return formatter.create_columns(items, convert, pager.fields if pager is not None else None)
+
+    options = {}
+    if formatter.tabular:
+        items, options["references"] = model_serializer.collection_references(items)
+
+    normalizer = reference_normalizer() if fmt == "json" and request_flag("normalized") else None
+    if normalizer is not None:
+        rows = normalizer.iter_rows(items)
+    elif convert is not None:
+        rows = map(convert, items)
+    else:
+        rows = convert_factory().iter_collection(items)
+    if pager is not None and pager.fields:
+        rows = map(pager.project, rows)
+
+    if normalizer is not None:
+        if stream:
+            return response_json.iter_normalized(rows, normalizer, request_indent())
+        return json_encoder.dumpb({"rows": list(rows), "refs": normalizer.refs}, request_indent())
+    if formatter.streaming and stream:
+        return formatter.iter_response(rows, **options)
+    return formatter.create_response(list(rows), **options)
+
+
+def encoded_response(body, mimetype, status=200, encoding=None):
+    """
+    Ответ, сжатый в кодировке encoding (gzip/br, см. response_compressor.encode):
+    небольшие тела отдаются как есть, потоковые сжимаются по частям
+    """
+    body, encoding = response_compressor.encode(body, encoding)
+    return precompressed_response(body, encoding, mimetype, status)
+
+
+def precompressed_response(body, encoding, mimetype, status=200):
+    """ Ответ с уже закодированным телом (encoding - Content-Encoding или None) """
+    response = Response(body, mimetype=mimetype, status=status)
+    response.vary.add("Accept-Encoding")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def request_encoding():
+    """ Кодировка сжатия ответа по Accept-Encoding (None - без сжатия) """
+    return response_compressor.negotiate(request.headers.get("Accept-Encoding"))
+
+
+def request_format(receipts: bool = False) -> str:
+    """
+    Формат ответа: ?format=, иначе Accept; неизвестный ?format= - operation_exception.
+    Markdown (factory_entities.RECEIPT_FORMATS) - только для рецептов (receipts)
+    """
+    exclude = () if receipts else factory_entities.RECEIPT_FORMATS
+    return factory_entities.negotiate(request.args.get("format"), request.headers.get("Accept"), exclude)
+
+
+def report_row(obj):
+    """ Строка коллекции без моделей (остатки, строки ОСВ, /api/data): convert_factory.convert_record """
+    return report_converter.convert_record(obj)
+
+
+def json_response(data, status=200):
+    """ JSON-ответ одним телом: компактный, ?pretty=1 - с отступами; сжимается по Accept-Encoding """
+    return encoded_response(json_encoder.dumpb(data, request_indent()), "application/json", status, request_encoding())
+
+
+def request_indent():
+    """ Отступ JSON ответа: None - компактный (по умолчанию), 2 - ?pretty=1 """
+    return 2 if request_flag("pretty") else None
+
+
+def request_flag(name, default=False) -> bool:
+    """ Логический параметр запроса: 1/true/yes или 0/false/no """
+    value = request.args.get(name)
+    if value is None or value == "":
+        return default
+    return value.lower() not in ("0", "false", "no")
+
+
+def with_next_cursor(response, next_cursor):
+    """ Курсор следующей страницы передаётся заголовком: тело остаётся массивом в любом формате """
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+
+def request_paginator():
+    """ Параметры страницы запроса (?limit=, ?cursor=, ?fields=); ошибки - argument_exception """
+    return paginator.from_args(request.args)
+
 
 """
 Маршрут проверки доступности API
@@ -29,75 +158,68 @@ def accessibility():
 
 """
 Маршрут для получения данных в выбранном формате
-http://127.0.0.1:8080/api/data?type=receipt&format=xml
+http://127.0.0.1:8080/api/data?type=receipt&format=xml (или заголовок Accept)
+Элементы - to_dict() моделей (report_row), ответ потоковый (см. collection_response)
+Постранично: ?limit=100&cursor=<X-Next-Cursor предыдущей страницы>&fields=id,name
 """
 @app.route("/api/data", methods=["GET"])
 def get_data():
     entity_type = request.args.get("type", "nomenclature").lower()
-    fmt = request.args.get("format", "json").lower()
 
-    repo = storage_repository()
-    service = start_service(repo)
-    service.create()
-
-    settings = settings_manager()
-    settings.default()
-    settings.response_format = fmt
-
-    factory = factory_entities(settings)
+    repo = repository_provider().get()
 
     if entity_type not in repo.data:
         raise ValueError(f"Неизвестный тип данных: {entity_type}")
 
-    data = [item.to_dict() if hasattr(item, "to_dict") else item for item in repo.data[entity_type]]
-    response = factory.create_default(data)
-
-    mime = {
-        "csv": "text/csv",
-        "json": "application/json",
-        "markdown": "text/markdown",
-        "xml": "application/xml"
-    }.get(fmt, "text/plain")
+    try:
+        pager = request_paginator()
+    except argument_exception as e:
+        return jsonify({"error": str(e)}), 400
 
-    return Response(response, status=200, mimetype=mime)
+    items, next_cursor = pager.page(repo.collection(entity_type))
+    return collection_response(items, pager=pager, next_cursor=next_cursor, convert=report_row,
+                               receipts=entity_type == "receipt")
 
 
 """
-Возвращает справочник в JSON, используя convert_factory
+Возвращает справочник, используя convert_factory
 Пример: /api/reference/nomenclature
 Теперь поддерживает также 'warehouse' и 'transaction'
+Ответ потоковый в формате запроса (см. collection_response), постранично - ?limit=&cursor=&fields=
 """
 @app.route("/api/reference/<entity_type>", methods=["GET"])
 def get_reference(entity_type: str):
-    repo = storage_repository()
-    service = start_service(repo)
-    service.create()
+    repo = repository_provider().get()
 
     if entity_type not in repo.data:
         return jsonify({"error": f"Unknown entity type: {entity_type}"}), 404
 
-    converter = convert_factory()
-    result = converter.convert_collection(repo.data[entity_type])
+    try:
+        pager = request_paginator()
+    except argument_exception as e:
+        return jsonify({"error": str(e)}), 400
 
-    return Response(json.dumps(result, ensure_ascii=False, indent=2), mimetype="application/json", status=200)
+    items, next_cursor = pager.page(repo.collection(entity_type))
+    return collection_response(items, pager=pager, next_cursor=next_cursor, receipts=entity_type == "receipt")
 
 
 """
-Возвращает список рецептов (в JSON)
+Возвращает список рецептов (JSON или формат запроса)
 """
 @app.route("/api/receipts", methods=["GET"])
 def get_receipts():
-    repo = storage_repository()
-    service = start_service(repo)
-    service.create()
+    repo = repository_provider().get()
 
     if "receipt" not in repo.data:
         return jsonify({"error": "Receipt data not found"}), 404
 
-    converter = convert_factory()
-    receipts = converter.convert_collection(repo.data["receipt"])
+    try:
+        pager = request_paginator()
+    except argument_exception as e:
+        return jsonify({"error": str(e)}), 400
 
-    return Response(json.dumps(receipts, ensure_ascii=False, indent=2), mimetype="application/json", status=200)
+    items, next_cursor = pager.page(repo.data["receipt"])
+    return collection_response(items, pager=pager, next_cursor=next_cursor, receipts=True)
 
 
 """
@@ -108,29 +230,26 @@ def get_receipts():
 def get_receipt():
     code = request.args.get("code", "").upper()
 
-    repo = storage_repository()
-    service = start_service(repo)
-    service.create()
+    repo = repository_provider().get()
 
-    receipt = next((r for r in repo.data.get("receipt", []) if getattr(r, "code", None) == code), None)
+    receipt = repo.get_receipt_by_code(code)
     if not receipt:
         return {"error": f"Receipt with code '{code}' not found"}, 404
 
-    factory = convert_factory()
-    result = factory.convert(receipt)
-
-    return Response(json.dumps(result, ensure_ascii=False, indent=2), status=200, mimetype="application/json")
+    return json_response(convert_factory().convert(receipt))
 
 
 """
-GET /api/report/osv?start=YYYY-MM-DD&end=YYYY-MM-DD&warehouse=W1
-Возвращает JSON список строк ОСВ
+GET /api/report/osv?start=YYYY-MM-DD&end=YYYY-MM-DD&warehouse=W1&engine=python|numpy
+Возвращает список строк ОСВ в формате запроса (?normalized=1 - строки с id и таблицы ссылок)
+Тело отчёта кэшируется вместе с результатом расчёта (в каждом формате и кодировке сжатия)
 """
 @app.route("/api/report/osv", methods=["GET"])
 def api_report_osv():
     start_s = request.args.get("start")
     end_s = request.args.get("end")
     warehouse_id = request.args.get("warehouse")  # optional
+    engine = request.args.get("engine")  # optional, по умолчанию - из настроек
 
     if not start_s or not end_s:
         return jsonify({"error": "start and end parameters required, format YYYY-MM-DD"}), 400
@@ -141,22 +260,37 @@ def api_report_osv():
     except Exception:
         return jsonify({"error": "Bad date format, expected YYYY-MM-DD"}), 400
 
-    repo = storage_repository()
-    service = start_service(repo)
-    service.create()
-
-    rows = compute_osv_result_for_response(repo=repo, start_date=start_date, end_date=end_date, warehouse_id=warehouse_id)
-    return Response(json.dumps(rows, ensure_ascii=False, indent=2), mimetype="application/json", status=200)
+    repo = repository_provider().get()
 
-
-def compute_osv_result_for_response(repo, start_date, end_date, warehouse_id):
+    try:
+        fmt = request_format()
+        key = OSVCalculator(repo).osv_cache_key(start_date, end_date, warehouse_id, engine=engine)
+    except (argument_exception, operation_exception) as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Готовое (сжатое) тело хранится рядом со строками ОСВ в записи кэша результатов:
+    # повторный запрос не пересчитывает отчёт и не сжимает его заново
+    encoding = request_encoding()
+    variant = ("body", fmt, request_flag("pretty"), request_flag("normalized"), encoding)
+    cached = repo.result_cache.attachment(key, variant)
+    if cached is None:
+        rows = compute_osv_result_for_response(repo=repo, start_date=start_date, end_date=end_date,
+                                               warehouse_id=warehouse_id, engine=engine)
+        cached = response_compressor.encode(collection_body(rows, fmt, convert=report_row, stream=False), encoding)
+        repo.result_cache.attach(key, variant, cached)
+
+    body, used_encoding = cached
+    return precompressed_response(body, used_encoding, factory_entities.MIME_TYPES[fmt])
+
+
+def compute_osv_result_for_response(repo, start_date, end_date, warehouse_id, engine=None):
     osv_calc  = OSVCalculator(repo)
-    rows = osv_calc.compute_osv(start_date, end_date, warehouse_id)
+    rows = osv_calc.compute_osv(start_date, end_date, warehouse_id, engine=engine)
     rows = sorted(
         rows,
         key=lambda r: (
-            r.get("Номенклатура", {}).get("name", ""),
-            r.get("Номенклатура", {}).get("id", "")
+            getattr(r.item, "name", "") or "",
+            getattr(r.item, "id", "") or ""
         )
     )
     return rows
@@ -166,32 +300,46 @@ def compute_osv_result_for_response(repo, start_date, end_date, warehouse_id):
 POST /api/data/save
 Сохраняет все коллекции из репозитория в JSON-файлы в папке 'data_out'
 Тело запроса не обязательно. Возвращает список сохранённых файлов
+?normalized=1 - справочники один раз в таблицах "refs" по id (как storage_repository.save_all)
 """
 @app.route("/api/data/save", methods=["GET", "POST"])
 def save_data():
-    repo = storage_repository()
-    service = start_service(repo)
-    service.create()
+    repo = repository_provider().get()
 
     os.makedirs("data_out", exist_ok=True)
     path = os.path.join("data_out", "repository.json")
 
-    full = {}
-    for name, items in repo.data.items():
-        full[name] = [getattr(i, "to_dict", lambda: i.__dict__)() for i in items]
+    # Транзакции колоночного хранилища тоже попадают в файл (collection читает строки колонок)
+    collections = {name: repo.collection(name) for name in repo.data}
+    if request_flag("normalized", repo.normalized_output):
+        full = repo.normalized_document(collections)
+    else:
+        full = {}
+        for name, items in collections.items():
+            full[name] = [getattr(i, "to_dict", lambda: i.__dict__)() for i in items]
 
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(full, f, ensure_ascii=False, indent=2)
+    json_encoder.dump_file(full, path)
 
     return jsonify({"saved_file": path})
 
 
+"""
+POST /api/data/reload
+Принудительно перечитывает репозиторий из файла данных
+"""
+@app.route("/api/data/reload", methods=["POST"])
+def reload_data():
+    repo = repository_provider().reload()
+    return jsonify({name: len(items) for name, items in repo.data.items()})
+
+
 @app.route("/api/filter/<entity_type>", methods=["POST"])
 def api_filter(entity_type):
-    """Фильтрует объекты указанного типа по заданным критериям"""
-    repository = storage_repository()
-    service = start_service(repository)
-    service.create()
+    """
+    Фильтрует объекты указанного типа по заданным критериям.
+    Постранично - ?limit=&cursor=&fields= (курсор продолжает обход с позиции последнего совпадения)
+    """
+    repository = repository_provider().get()
 
     if entity_type not in repository.data:
         return jsonify({"error": f"Unknown entity type '{entity_type}'"}), 404
@@ -208,14 +356,16 @@ def api_filter(entity_type):
         except Exception as e:
             return jsonify({"error": str(e)}), 400
 
-    objects = repository.data[entity_type]
-    filtered_objects = FilterUtils.apply(objects, filters)
+    try:
+        pager = request_paginator()
+    except argument_exception as e:
+        return jsonify({"error": str(e)}), 400
 
-    converter = convert_factory()
-    result = converter.convert_collection(filtered_objects)
+    objects = repository.collection(entity_type)
+    filtered_objects, next_cursor = pager.page_filtered(objects, filters, entity_type=entity_type)
 
-    return Response(json.dumps(result, ensure_ascii=False, indent=2),
-                    mimetype="application/json")
+    return collection_response(filtered_objects, pager=pager, next_cursor=next_cursor,
+                               receipts=entity_type == "receipt")
 
 
 @app.route("/api/report/osv/filter", methods=["POST"])
@@ -231,25 +381,37 @@ def api_osv_filter():
     warehouse = body.get("warehouse")
 
     raw_filters = body.get("filters", [])
-    filters = filter_parser.parse(raw_filters)
+    try:
+        filters = filter_parser.parse(raw_filters)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    repo = storage_repository()
-    service = start_service(repo)
-    service.create()
+    repo = repository_provider().get()
 
     osv_calc = OSVCalculator(repo)
 
-    osv_rows = osv_calc.compute_osv(
-        start_date=start_date,
-        end_date=end_date,
-        warehouse=warehouse,
-        filters=filters
-    )
+    try:
+        osv_rows = osv_calc.compute_osv(
+            start_date=start_date,
+            end_date=end_date,
+            warehouse=warehouse,
+            filters=filters,
+            engine=body.get("engine")
+        )
+    except argument_exception as e:
+        return jsonify({"error": str(e)}), 400
+
+    return collection_response(osv_rows, convert=report_row)
+
+"""
+GET /api/cache/stats
+Попадания/промахи и заполненность кэша результатов ОСВ и остатков
+"""
+@app.route("/api/cache/stats", methods=["GET"])
+def api_cache_stats():
+    repo = repository_provider().get()
+    return jsonify(repo.result_cache.stats())
 
-    return Response(
-        json.dumps(osv_rows, ensure_ascii=False, indent=2),
-        mimetype="application/json"
-    )
 
 # POST /api/settings/block_period
 @app.route("/api/settings/block_period", methods=["POST"])
@@ -274,7 +436,7 @@ def api_get_block_period():
     bd = settings.get_block_period()
     return jsonify({"block_period": bd.isoformat() if bd else None}), 200
 
-# GET /api/balances?date=YYYY-MM-DD
+# GET /api/balances?date=YYYY-MM-DD&engine=python|numpy (&normalized=1)
 @app.route("/api/balances", methods=["GET"])
 def api_get_balances():
     date_str = request.args.get("date")
@@ -285,18 +447,16 @@ def api_get_balances():
     except:
         return jsonify({"error":"invalid date format; use YYYY-MM-DD"}), 400
 
-    repo = storage_repository()
-    service = start_service(repo)
-    service.create()
+    repo = repository_provider().get()
 
     osv = OSVCalculator(repo)
     osv.settings_manager = settings_manager()
-    balances = osv.compute_balances_at(target_date)
+    try:
+        balances = osv.compute_balances_at(target_date, engine=request.args.get("engine"))
+    except argument_exception as e:
+        return jsonify({"error": str(e)}), 400
 
-    return Response(
-        json.dumps(Serializer.dump_jsonable(balances), ensure_ascii=False, indent=2),
-        mimetype="application/json"
-    )
+    return collection_response(balances, convert=report_row)
 
 
 if __name__ == "__main__":
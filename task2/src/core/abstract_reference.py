@@ -33,6 +33,10 @@ class abstract_model(ABC):
     def __eq__(self, value: str) -> bool:
         return self.__unique_code == value
 
+    """ Хеш согласован со сравнением: модели можно использовать как ключи словарей """
+    def __hash__(self) -> int:
+        return hash(self.__unique_code)
+
 
 """
 Абстрактный класс для справочных сущностей с общим полем name
@@ -3,7 +3,18 @@ from src.core.validator import validator, operation_exception
 
 """ Абстрактный класс для формирования ответов в различных форматах """
 class abstract_response(abc.ABC):
-  
+    # Формат умеет отдавать ответ частями по мере чтения строк (iter_response)
+    streaming = False
+    # Формат строится из колонок элементов коллекции (create_columns), а не из словарей строк
+    columnar = False
+    # Табличный формат: строки выводятся плоскими (flat_row), create_response/iter_response
+    # принимают references - поля-ссылки коллекции по схеме модели
+    tabular = False
+
+    """ pretty - форматирование с отступами (учитывают форматы, где оно необязательно, например JSON) """
+    def __init__(self, pretty: bool = False):
+        self.pretty = pretty
+
     """ Абстрактный метод, который должен быть реализован в каждом потомке """
     @abc.abstractmethod
     def create_response(self, data: list[dict]) -> str:
@@ -12,3 +23,49 @@ class abstract_response(abc.ABC):
         if len(data) == 0:
             raise operation_exception("Нет данных!")
         return ""
+
+    """
+    Ответ частями. По умолчанию - одной частью create_response; потоковые
+    форматы (streaming = True) переопределяют и не собирают строки в список
+    """
+    def iter_response(self, rows):
+        yield self.create_response(list(rows))
+
+    """
+    Плоская строка для табличных форматов (CSV, XML): вложенная ссылка (словарь с id
+    или name, модель) - поля <ключ>_id и <ключ>_name (как колонки response_columnar),
+    прочий вложенный словарь - поля <ключ>_<поле>, список - строка через запятую
+    (ссылки в списке - по имени). unique_code ссылок не выводится.
+    references - поля-ссылки по схеме модели (model_serializer.reference_fields): они
+    всегда дают <ключ>_id и <ключ>_name (пустые, если ссылки нет), поэтому набор полей
+    строки не зависит от данных.
+    """
+    @classmethod
+    def flat_row(cls, row: dict, references=()) -> dict:
+        flat = {}
+        for key, value in row.items():
+            if hasattr(value, "unique_code") and not isinstance(value, dict):
+                value = {"id": getattr(value, "id", None), "name": getattr(value, "name", None)}
+            if value is None and key in references:
+                flat[f"{key}_id"] = None
+                flat[f"{key}_name"] = None
+            elif isinstance(value, dict):
+                if key in references or "id" in value or "name" in value:
+                    flat[f"{key}_id"] = value.get("id")
+                    flat[f"{key}_name"] = value.get("name")
+                else:
+                    for name, nested in cls.flat_row(value).items():
+                        flat[f"{key}_{name}"] = nested
+            elif isinstance(value, list):
+                flat[key] = ", ".join(map(cls._flat_item, value))
+            else:
+                flat[key] = value
+        return flat
+
+    @staticmethod
+    def _flat_item(value) -> str:
+        if isinstance(value, dict):
+            value = value.get("name", value.get("id", value))
+        elif hasattr(value, "unique_code"):
+            value = getattr(value, "name", None) or getattr(value, "id", None)
+        return str(value)
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from datetime import datetime
+from datetime import date, datetime
 
 """
 Абстрактный класс конвертора
@@ -27,12 +27,12 @@ class basic_convertor(abstract_covertor):
 
 
 """
-Конвертор для объектов datetime
+Конвертор для объектов datetime и date
 Возвращает ISO-строку
 """
 class datetime_convertor(abstract_covertor):
     def convert(self, obj: any):
-        if isinstance(obj, datetime):
+        if isinstance(obj, (datetime, date)):
             return obj.isoformat()
         raise TypeError(f"Unsupported type for datetime_convertor: {type(obj)}")
 
@@ -52,6 +52,6 @@ class reference_convertor(abstract_covertor):
             if callable(value):
                 continue
 
-            result[clean_name] = factory.convert(value)
+            result[clean_name] = factory.convert_reflective(value)
 
         return result
@@ -0,0 +1,66 @@
+"""
+Индекс транзакций по дате (отсортированный список + bisect)
+"""
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Iterable, List, Tuple
+
+
+class date_index:
+    """
+    Транзакции, упорядоченные по дате (при равных датах - в порядке добавления).
+    Позволяет за O(log n) найти границы периода и перебирать только
+    нужный срез, а не всю историю.
+    Транзакции без даты в индекс не попадают.
+    positions - порядковые номера добавления (для обхода среза в порядке добавления).
+    """
+
+    def __init__(self, transactions: Iterable = ()):
+        dated = [(t, i) for i, t in enumerate(transactions) if getattr(t, "date", None) is not None]
+        dated.sort(key=lambda r: r[0].date)
+        self.items: List = [t for t, _ in dated]
+        self.dates: List[date] = [t.date for t in self.items]
+        self.positions: List[int] = [i for _, i in dated]
+        self._next = max(self.positions, default=-1) + 1
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def add(self, t):
+        """ Добавление с сохранением порядка (в конец - O(1), задним числом - вставка) """
+        if getattr(t, "date", None) is None:
+            return
+        sequence = self._next
+        self._next += 1
+        if not self.dates or t.date >= self.dates[-1]:
+            self.dates.append(t.date)
+            self.items.append(t)
+            self.positions.append(sequence)
+            return
+        position = bisect_right(self.dates, t.date)
+        self.dates.insert(position, t.date)
+        self.items.insert(position, t)
+        self.positions.insert(position, sequence)
+
+    def bounds(self, start_date: date, end_date: date) -> Tuple[int, int]:
+        """ Позиции [lo, hi) транзакций с start_date <= date <= end_date """
+        return bisect_left(self.dates, start_date), bisect_right(self.dates, end_date)
+
+    def before(self, start_date: date) -> List:
+        """ Транзакции с date < start_date """
+        return self.items[:bisect_left(self.dates, start_date)]
+
+    def between(self, start_date: date, end_date: date) -> List:
+        """ Транзакции с start_date <= date <= end_date """
+        lo, hi = self.bounds(start_date, end_date)
+        return self.items[lo:hi]
+
+    def after(self, after_date: date, until_date: date) -> List:
+        """ Транзакции с after_date < date <= until_date """
+        return self.items[bisect_right(self.dates, after_date):bisect_right(self.dates, until_date)]
+
+    def after_in_order(self, after_date: date, until_date: date) -> List:
+        """ То же, что after, но в порядке добавления (как при переборе исходного списка) """
+        lo, hi = bisect_right(self.dates, after_date), bisect_right(self.dates, until_date)
+        order = sorted(range(lo, hi), key=self.positions.__getitem__)
+        return [self.items[i] for i in order]
@@ -0,0 +1,212 @@
+"""
+Индексы по полям моделей: хеш/триграммы для EQUALS и LIKE,
+отсортированный индекс для диапазонов (GREATER, LESS, BETWEEN, IN)
+"""
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from src.core.filter_utils import FilterUtils, field_accessor
+
+
+class field_index:
+    """
+    Индекс одного поля коллекции (путь как в фильтрах, например "group.name").
+    values   - хеш-индекс: нормализованное значение -> позиции объектов (по возрастанию);
+    trigrams - триграмма -> множество различных нормализованных значений, её содержащих.
+    EQUALS обслуживается одним обращением к values, LIKE - пересечением
+    триграмм искомой строки с проверкой подстроки только у найденных значений.
+    Значения нормализуются так же, как при фильтрации (FilterUtils.normalize_value).
+    """
+
+    def __init__(self, field_path: str):
+        self.field_path = field_path
+        self.key = field_index.path_key(field_path)
+        self.accessor = field_accessor(field_path)
+        self.values: Dict[str, List[int]] = {}
+        self.trigrams: Dict[str, Set[str]] = {}
+
+    @staticmethod
+    def path_key(field_path: str) -> str:
+        """ Нормализованный путь: "Group.Name" и "group.name" - один индекс """
+        return ".".join(FilterUtils.normalize(part) for part in field_path.split("."))
+
+    @staticmethod
+    def grams(value: str) -> Iterable[str]:
+        return {value[i:i + 3] for i in range(len(value) - 2)}
+
+    def add(self, position: int, item):
+        value = self.accessor(item)
+        if value is None:
+            return
+        norm = FilterUtils.normalize_value(value)
+        positions = self.values.get(norm)
+        if positions is None:
+            positions = []
+            self.values[norm] = positions
+            for gram in self.grams(norm):
+                self.trigrams.setdefault(gram, set()).add(norm)
+        positions.append(position)
+
+    def clear(self):
+        self.values.clear()
+        self.trigrams.clear()
+
+    def rebuild(self, items: Iterable):
+        self.clear()
+        for position, item in enumerate(items):
+            self.add(position, item)
+
+    def _like_values(self, needle: str) -> List[str]:
+        if len(needle) < 3:
+            return [v for v in self.values if needle in v]
+
+        candidates = None
+        for gram in sorted(self.grams(needle), key=lambda g: len(self.trigrams.get(g, ()))):
+            found = self.trigrams.get(gram)
+            if not found:
+                return []
+            candidates = set(found) if candidates is None else candidates & found
+            if not candidates:
+                return []
+        return [v for v in candidates if needle in v]
+
+    def lookup(self, filter_type: str, needle: str) -> Optional[List[int]]:
+        """
+        Позиции объектов (по возрастанию), у которых поле проходит фильтр.
+        None - тип фильтра индексом не обслуживается.
+        """
+        if filter_type == "EQUALS":
+            return list(self.values.get(needle, ()))
+        if filter_type == "LIKE":
+            matched = self._like_values(needle)
+            if len(matched) == 1:
+                return list(self.values[matched[0]])
+            return sorted(p for v in matched for p in self.values[v])
+        return None
+
+    def estimate(self, filter_type: str) -> Optional[float]:
+        """ Ожидаемая доля совпадений для EQUALS - по кардинальности индекса """
+        if filter_type == "EQUALS" and self.values:
+            return 1.0 / len(self.values)
+        return None
+
+
+class sorted_index:
+    """
+    Отсортированный индекс поля с числами или датами (например, transaction.date).
+    keys      - значения поля (FilterUtils.comparable) по возрастанию;
+    positions - позиции объектов в том же порядке (при равных значениях - по возрастанию).
+    GREATER / LESS / BETWEEN / IN находят границы bisect'ом вместо перебора.
+    add дописывает значение в конец за O(1); если порядок нарушен, пары сортируются
+    один раз при первом поиске после изменений (ordered), а не вставкой на каждое значение.
+    Если в поле встретились несравнимые типы, индекс отказывается от поиска (lookup -> None).
+    """
+
+    RANGE_FILTERS = ("GREATER", "LESS", "BETWEEN", "IN")
+
+    def __init__(self, field_path: str):
+        self.field_path = field_path
+        self.key = field_index.path_key(field_path)
+        self.accessor = field_accessor(field_path)
+        self.keys: List[Any] = []
+        self.positions: List[int] = []
+        self.kind = None
+        self.mixed = False
+        # keys/positions упорядочены (после add значения меньше последнего - нет)
+        self.is_sorted = True
+
+    @staticmethod
+    def kind_of(value):
+        """ Группа взаимно сравнимых значений: числа, даты, дата-время, строки """
+        if isinstance(value, (int, float)):
+            return "number"
+        if isinstance(value, datetime):
+            return "datetime"
+        return type(value).__name__
+
+    def _value(self, item):
+        value = self.accessor(item)
+        if value is None:
+            return None
+        value = FilterUtils.comparable(value)
+        kind = self.kind_of(value)
+        if self.kind is None:
+            self.kind = kind
+        elif kind != self.kind:
+            self.mixed = True
+        return value
+
+    def add(self, position: int, item):
+        value = self._value(item)
+        if value is None or self.mixed:
+            return
+        if self.is_sorted and self.keys and value < self.keys[-1]:
+            self.is_sorted = False
+        self.keys.append(value)
+        self.positions.append(position)
+
+    def ordered(self):
+        """ Упорядочивание после добавлений не по порядку: одна сортировка пар на серию add """
+        if self.is_sorted:
+            return
+        pairs = sorted(zip(self.keys, self.positions))
+        self.keys = [value for value, _ in pairs]
+        self.positions = [position for _, position in pairs]
+        self.is_sorted = True
+
+    def clear(self):
+        self.keys.clear()
+        self.positions.clear()
+        self.kind = None
+        self.mixed = False
+        self.is_sorted = True
+
+    def rebuild(self, items: Iterable):
+        self.clear()
+        pairs = []
+        for position, item in enumerate(items):
+            value = self._value(item)
+            if value is not None:
+                pairs.append((value, position))
+        if self.mixed:
+            return
+        pairs.sort()
+        self.keys = [value for value, _ in pairs]
+        self.positions = [position for _, position in pairs]
+
+    def _range(self, filter_type: str, bounds: List[Any]):
+        keys = self.keys
+        if filter_type == "GREATER":
+            return bisect_right(keys, bounds[0]), len(keys)
+        if filter_type == "LESS":
+            return 0, bisect_left(keys, bounds[0])
+        low, high = bounds
+        return bisect_left(keys, low), bisect_right(keys, high)
+
+    def lookup(self, filter_type: str, needle) -> Optional[List[int]]:
+        """
+        Позиции объектов (по возрастанию), у которых поле проходит фильтр.
+        needle - операнды filter_plan; они приводятся к типу значений индекса.
+        None - тип фильтра индексом не обслуживается.
+        """
+        if filter_type not in self.RANGE_FILTERS or self.mixed or needle is None:
+            return None
+        if not self.keys:
+            return []
+
+        self.ordered()
+        bounds = [FilterUtils.coerce(o, self.keys[0]) for o in needle]
+        if filter_type == "IN":
+            found = []
+            for value in set(b for b in bounds if b is not None):
+                found.extend(self.positions[bisect_left(self.keys, value):bisect_right(self.keys, value)])
+            return sorted(found)
+        if any(b is None for b in bounds):
+            return []
+
+        lo, hi = self._range(filter_type, bounds)
+        return sorted(self.positions[lo:hi]) if lo < hi else []
+
+    def estimate(self, filter_type: str) -> Optional[float]:
+        return None
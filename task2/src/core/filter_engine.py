@@ -1,7 +1,12 @@
+from src.core.filter_utils import FilterUtils
+
+
 class filter_engine:
     """
     Класс для универсальной фильтрации моделей и словарей по пути вида
-    "group.name" или "Номенклатура.name"
+    "group.name" или "Номенклатура.name".
+    EQUALS/LIKE сравнивают строки, GREATER/LESS/BETWEEN/IN - значения
+    с приведением к типу поля (FilterUtils.typed_predicate).
     """
 
     @staticmethod
@@ -21,6 +26,9 @@ class filter_engine:
 
     @staticmethod
     def match(obj, filter_dto):
+        if filter_dto.filter_type.name in FilterUtils.TYPED_FILTERS:
+            return filter_engine.compile(filter_dto)(obj)
+
         value = filter_engine.get_nested(obj, filter_dto.field_name)
         if value is None:
             return False
@@ -37,9 +45,65 @@ class filter_engine:
         return False
 
     @staticmethod
-    def filter(objects, filters):
-        result = []
+    def compile(filter_dto):
+        """
+        Предикат для фильтра: путь разбирается, искомое значение
+        приводится к нижнему регистру один раз.
+        """
+        parts = filter_dto.field_name.split(".")
+        filter_s = str(filter_dto.value).lower()
+        ftype = filter_dto.filter_type.name
+
+        if ftype in FilterUtils.TYPED_FILTERS:
+            return filter_engine._compile_typed(parts, ftype, FilterUtils.operands(ftype, filter_dto.value))
+
+        def predicate(obj):
+            for p in parts:
+                if obj is None:
+                    return False
+                obj = obj.get(p) if isinstance(obj, dict) else getattr(obj, p, None)
+            if obj is None:
+                return False
+
+            value_s = str(obj).lower()
+            if ftype == "EQUALS":
+                return value_s == filter_s
+            if ftype == "LIKE":
+                return filter_s in value_s
+            return False
+
+        return predicate
+
+    @staticmethod
+    def _compile_typed(parts, ftype, operands):
+        """ Предикат типизированного сравнения; операнды приводятся один раз на тип значения """
+        predicates = {}
+
+        def predicate(obj):
+            for p in parts:
+                if obj is None:
+                    return False
+                obj = obj.get(p) if isinstance(obj, dict) else getattr(obj, p, None)
+            if obj is None:
+                return False
+
+            value = FilterUtils.comparable(obj)
+            check = predicates.get(type(value))
+            if check is None:
+                check = FilterUtils.typed_predicate(ftype, operands, value)
+                predicates[type(value)] = check
+            return check(value)
+
+        return predicate
+
+    @staticmethod
+    def iterate(objects, filters):
+        """ Генератор: все фильтры проверяются за один проход с выходом на первом несовпадении """
+        predicates = [filter_engine.compile(f) for f in filters]
         for obj in objects:
-            if all(filter_engine.match(obj, f) for f in filters):
-                result.append(obj)
-        return result
+            if all(p(obj) for p in predicates):
+                yield obj
+
+    @staticmethod
+    def filter(objects, filters):
+        return list(filter_engine.iterate(objects, filters))
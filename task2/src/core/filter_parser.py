@@ -1,4 +1,3 @@
-from src.core.filters_enum import FilterType
 from src.models.filter_dto import FilterDTO
 
 
@@ -26,17 +25,7 @@ class filter_parser:
                     f"Filter item missing fields. Required: {filter_parser.REQUIRED_FIELDS}"
                 )
 
-            try:
-                filter_type = FilterType[item["filter_type"]]
-            except KeyError:
-                raise ValueError(f"Unknown filter type: {item['filter_type']}")
-
-            filters.append(
-                FilterDTO(
-                    field_name=item["field_name"],
-                    value=item["value"],
-                    filter_type=filter_type
-                )
-            )
+            # Тип фильтра без учёта регистра и проверка формы значения - как в /api/filter
+            filters.append(FilterDTO.from_dict(item))
 
         return filters
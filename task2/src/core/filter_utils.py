@@ -1,4 +1,120 @@
 import unicodedata
+from bisect import bisect_left
+from datetime import date, datetime, time
+from enum import Enum
+from functools import lru_cache
+
+
+_MISSING = object()
+
+
+class field_accessor:
+    """
+    Скомпилированный путь к полю (например, "Номенклатура.name").
+    Сегменты разбираются и нормализуются один раз; найденные имена
+    атрибутов запоминаются по типу объекта, ключи словарей - по сегменту,
+    поэтому на строку приходится только цепочка getattr / обращений к dict.
+    Семантика совпадает с FilterUtils.get_nested_value.
+    """
+
+    def __init__(self, field_path: str):
+        self.field_path = field_path
+        # (нормализованное имя, только ключ словаря)
+        self.steps = []
+        for part in field_path.split("."):
+            part_norm = FilterUtils.normalize(part)
+            dict_only = False
+            if part_norm in FilterUtils.FIELD_ALIASES:
+                alias = FilterUtils.FIELD_ALIASES[part_norm]
+                if alias == "":
+                    dict_only = True
+                else:
+                    part_norm = FilterUtils.normalize(alias)
+            self.steps.append((part_norm, dict_only))
+
+        self._dict_keys = [None] * len(self.steps)
+        self._attr_names = [{} for _ in self.steps]
+        self._calls = [self._step(i, name, dict_only) for i, (name, dict_only) in enumerate(self.steps)]
+
+    def _step(self, i, name, dict_only):
+        """ Функция одного сегмента: объект -> значение или _MISSING """
+        dict_keys, names = self._dict_keys, self._attr_names[i]
+
+        def step(current):
+            if isinstance(current, dict):
+                key = dict_keys[i]
+                if key is not None and key in current:
+                    return current[key]
+                for key in current.keys():
+                    if FilterUtils.normalize(key) == name:
+                        dict_keys[i] = key
+                        return current[key]
+                return _MISSING
+
+            if dict_only:
+                return _MISSING
+
+            attr = names.get(type(current))
+            if attr is None:
+                attrs = {FilterUtils.normalize(a): a for a in dir(current) if not a.startswith("_")}
+                attr = attrs.get(name)
+                if attr is None:
+                    return _MISSING
+                names[type(current)] = attr
+            return getattr(current, attr, _MISSING)
+
+        return step
+
+    def __call__(self, obj):
+        current = obj
+        for step in self._calls:
+            if current is None:
+                return None
+            current = step(current)
+            if current is _MISSING:
+                return None
+        return current
+
+
+class filter_plan:
+    """
+    Скомпилированный фильтр: путь к полю, нормализованное искомое значение
+    и выбранная функция сравнения.
+    Для GREATER / LESS / BETWEEN / IN needle - кортеж операндов; они приводятся
+    к типу значения поля (число, дата, строка) один раз на тип, сравнение типизированное.
+    """
+
+    def __init__(self, accessor: field_accessor, filter_type, value, entity_type=None):
+        self.accessor = accessor
+        ftype = filter_type if isinstance(filter_type, str) else filter_type.name
+        self.filter_type = ftype.upper()
+        # Ключ статистики селективности: тип сущности, путь и вид сравнения
+        self.key = (entity_type, accessor.field_path, self.filter_type)
+
+        if self.filter_type in FilterUtils.TYPED_FILTERS:
+            self.needle = FilterUtils.operands(self.filter_type, value)
+            self._predicates = {}
+            self.matches = self._matches_typed
+        else:
+            self.needle = FilterUtils.normalize(str(value))
+            self.compare = FilterUtils.COMPARATORS.get(self.filter_type, FilterUtils._never)
+
+    def matches(self, obj) -> bool:
+        value = self.accessor(obj)
+        if value is None:
+            return False
+        return self.compare(FilterUtils.normalize_value(value), self.needle)
+
+    def _matches_typed(self, obj) -> bool:
+        value = self.accessor(obj)
+        if value is None:
+            return False
+        value = FilterUtils.comparable(value)
+        predicate = self._predicates.get(type(value))
+        if predicate is None:
+            predicate = FilterUtils.typed_predicate(self.filter_type, self.needle, value)
+            self._predicates[type(value)] = predicate
+        return predicate(value)
 
 
 class FilterUtils:
@@ -73,31 +189,274 @@ class FilterUtils:
         return current
 
     @staticmethod
-    def apply(objects, filters):
-        result = objects
+    def _never(value, needle) -> bool:
+        return False
 
-        for f in filters:
-            filtered = []
+    COMPARATORS = {
+        "EQUALS": lambda value, needle: value == needle,
+        "LIKE": lambda value, needle: needle in value,
+    }
 
-            ft = f.filter_type
-            ftype = ft if isinstance(ft, str) else ft.name
-            ftype = ftype.upper()
+    # Фильтры с типизированным сравнением (операнды приводятся к типу поля)
+    TYPED_FILTERS = ("GREATER", "LESS", "BETWEEN", "IN")
 
-            for obj in result:
-                value = FilterUtils.get_nested_value(obj, f.field_name)
-                if value is None:
-                    continue
+    @staticmethod
+    def operands(filter_type: str, value):
+        """
+        Операнды фильтра: GREATER/LESS - (значение,), BETWEEN - (от, до) включительно,
+        IN - перечень значений. None - значение не подходит для фильтра.
+        """
+        if filter_type == "BETWEEN":
+            if isinstance(value, (list, tuple)) and len(value) == 2:
+                return tuple(value)
+            return None
+        if filter_type == "IN":
+            return tuple(value) if isinstance(value, (list, tuple, set, frozenset)) else (value,)
+        return (value,)
+
+    @staticmethod
+    def comparable(value):
+        """ Значение поля для типизированного сравнения: числа и даты как есть, остальное - нормализованная строка """
+        if isinstance(value, Enum):
+            value = value.value
+        if isinstance(value, (int, float, date)):
+            return value
+        return FilterUtils.normalize_value(value)
+
+    @staticmethod
+    def coerce(operand, sample):
+        """ Операнд, приведённый к типу значения поля sample (см. comparable); None - не приводится """
+        try:
+            if isinstance(sample, datetime):
+                if isinstance(operand, datetime):
+                    return operand
+                if isinstance(operand, date):
+                    return datetime.combine(operand, time())
+                return datetime.fromisoformat(str(operand).strip())
+            if isinstance(sample, date):
+                if isinstance(operand, datetime):
+                    return operand.date()
+                if isinstance(operand, date):
+                    return operand
+                return date.fromisoformat(str(operand).strip()[:10])
+            if isinstance(sample, (int, float)):
+                if isinstance(operand, (int, float)):
+                    return operand
+                return float(str(operand).strip().replace(",", "."))
+        except (TypeError, ValueError):
+            return None
+        return FilterUtils.comparable(operand)
+
+    @staticmethod
+    def typed_predicate(filter_type: str, operands, sample):
+        """ Проверка для значений того же типа, что sample (операнды приводятся один раз) """
+        if operands is None:
+            return FilterUtils._never_one
+        values = [FilterUtils.coerce(o, sample) for o in operands]
+
+        if filter_type == "IN":
+            allowed = {v for v in values if v is not None}
+            return allowed.__contains__
+        if any(v is None for v in values):
+            return FilterUtils._never_one
+
+        if filter_type == "GREATER":
+            bound = values[0]
+            return lambda value: value > bound
+        if filter_type == "LESS":
+            bound = values[0]
+            return lambda value: value < bound
+        if filter_type == "BETWEEN":
+            low, high = values
+            return lambda value: low <= value <= high
+        return FilterUtils._never_one
+
+    @staticmethod
+    def _never_one(value) -> bool:
+        return False
+
+    # Скомпилированные пути полей по (тип сущности, путь)
+    _accessors = {}
+    MAX_ACCESSORS = 1024
+
+    # Наблюдаемая селективность фильтров: ключ плана -> [проверено, прошло]
+    # (ключи строятся из полей и значений запроса - размер ограничен, как у _accessors)
+    _selectivity = {}
+    MAX_SELECTIVITY = 4096
+    # Оценка доли прошедших объектов, пока статистики нет
+    DEFAULT_SELECTIVITY = {"EQUALS": 0.1, "LIKE": 0.5, "GREATER": 0.5, "LESS": 0.5, "BETWEEN": 0.25, "IN": 0.2}
+
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def _normalize_str(value: str) -> str:
+        return unicodedata.normalize("NFKC", value).strip().lower()
+
+    @staticmethod
+    def normalize_value(value) -> str:
+        """ Нормализованное строковое представление значения поля (с кэшем для повторов) """
+        return FilterUtils._normalize_str(value if isinstance(value, str) else str(value))
 
-                val_norm = FilterUtils.normalize(str(value))
-                flt_norm = FilterUtils.normalize(str(f.value))
+    @staticmethod
+    def entity_type_of(objects):
+        """ Тип сущности коллекции - по первому элементу """
+        for obj in objects[:1] if isinstance(objects, (list, tuple)) else ():
+            return type(obj)
+        return None
 
-                if ftype == "EQUALS" and val_norm == flt_norm:
-                    filtered.append(obj)
+    @staticmethod
+    def accessor(entity_type, field_path: str) -> field_accessor:
+        """ Скомпилированный путь к полю; кэшируется по (тип сущности, путь) """
+        key = (entity_type, field_path)
+        accessor = FilterUtils._accessors.get(key)
+        if accessor is None:
+            if len(FilterUtils._accessors) >= FilterUtils.MAX_ACCESSORS:
+                FilterUtils._accessors.clear()
+            accessor = field_accessor(field_path)
+            FilterUtils._accessors[key] = accessor
+        return accessor
 
-                elif ftype == "LIKE" and flt_norm in val_norm:
-                    filtered.append(obj)
+    @staticmethod
+    def compile(filters, entity_type=None):
+        """ План фильтрации: по filter_plan на каждый фильтр """
+        return [FilterUtils.compile_one(f, entity_type) for f in filters]
 
-            result = filtered
+    @staticmethod
+    def compile_one(f, entity_type=None) -> filter_plan:
+        return filter_plan(FilterUtils.accessor(entity_type, f.field_name), f.filter_type, f.value, entity_type)
 
-        return result
+    @staticmethod
+    def selectivity(plan: filter_plan, estimate=None) -> float:
+        """
+        Ожидаемая доля объектов, проходящих фильтр: по прошлым запускам,
+        иначе по оценке estimate(plan) (например, по кардинальности индекса),
+        иначе по типу сравнения.
+        """
+        observed = FilterUtils._selectivity.get(plan.key)
+        if observed and observed[0]:
+            return observed[1] / observed[0]
+        if estimate is not None:
+            value = estimate(plan)
+            if value is not None:
+                return value
+        return FilterUtils.DEFAULT_SELECTIVITY.get(plan.filter_type, 1.0)
+
+    @staticmethod
+    def order(plans, estimate=None):
+        """ Сначала самые селективные фильтры - они чаще всего завершают проверку объекта """
+        return sorted(plans, key=lambda p: FilterUtils.selectivity(p, estimate))
+
+    @staticmethod
+    def iterate(objects, filters, entity_type=None, estimate=None):
+        """
+        Генератор объектов, прошедших все фильтры.
+        Все фильтры проверяются для объекта за один проход с выходом на первом
+        несовпадении, промежуточные списки не создаются. Порядок фильтров -
+        по селективности; по завершении обхода статистика обновляется.
+        Если у коллекции есть индекс по полю фильтра (indexed_collection.get_field_index),
+        кандидаты берутся из индекса, а проверяются только остальные фильтры.
+        """
+        if entity_type is None:
+            entity_type = FilterUtils.entity_type_of(objects)
+        return FilterUtils.iterate_plans(objects, FilterUtils.compile(filters, entity_type), estimate)
+
+    @staticmethod
+    def iterate_plans(objects, plans, estimate=None):
+        """
+        То же, что iterate, но по готовым планам (например, с accessor'ом,
+        читающим поле не по пути, а из вычисляемой колонки модели).
+        """
+        positions, plans = FilterUtils._index_positions(objects, plans)
+        if positions is not None:
+            objects = [objects[p] for p in positions]
+        return FilterUtils._scan(objects, plans, estimate)
+
+    @staticmethod
+    def iterate_positions(objects, plans, estimate=None, start: int = 0):
+        """
+        Генератор пар (позиция в objects, объект) для объектов, прошедших фильтры,
+        начиная с позиции start - для постраничной выдачи по курсору.
+        objects должен поддерживать len() и обращение по индексу.
+        """
+        positions, plans = FilterUtils._index_positions(objects, plans)
+        if positions is None:
+            positions = range(start, len(objects))
+        else:
+            positions = positions[bisect_left(positions, start):]
+
+        current = [None]
+
+        def candidates():
+            for p in positions:
+                current[0] = p
+                yield objects[p]
+
+        for obj in FilterUtils._scan(candidates(), plans, estimate):
+            yield current[0], obj
+
+    @staticmethod
+    def _scan(objects, plans, estimate=None):
+        """ Однопроходная проверка объектов планами (порядок - по селективности) """
+        plans = FilterUtils.order(plans, estimate)
+        checks = list(enumerate(plan.matches for plan in plans))
+        # Считаются только отказы: проверки и прохождения по фильтрам выводятся из них
+        failed = [0] * len(plans)
+        total = 0
+
+        try:
+            for obj in objects:
+                total += 1
+                for i, matches in checks:
+                    if not matches(obj):
+                        failed[i] += 1
+                        break
+                else:
+                    yield obj
+        finally:
+            evaluated = total
+            for plan, rejected in zip(plans, failed):
+                stats = FilterUtils._selectivity.get(plan.key)
+                if stats is None:
+                    if len(FilterUtils._selectivity) >= FilterUtils.MAX_SELECTIVITY:
+                        FilterUtils._selectivity.clear()
+                    stats = FilterUtils._selectivity[plan.key] = [0, 0]
+                stats[0] += evaluated
+                stats[1] += evaluated - rejected
+                evaluated -= rejected
+
+    @staticmethod
+    def _index_positions(objects, plans):
+        """
+        Позиции кандидатов по индексам полей коллекции (по возрастанию) и
+        неиндексированные планы; (None, plans) - индексы не применимы.
+        """
+        get_index = getattr(objects, "get_field_index", None)
+        if get_index is None:
+            return None, plans
+
+        positions = None
+        remaining = []
+        for plan in plans:
+            index = get_index(plan.accessor.field_path)
+            found = index.lookup(plan.filter_type, plan.needle) if index is not None else None
+            if found is None:
+                remaining.append(plan)
+            elif positions is None:
+                positions = found
+            else:
+                positions = sorted(set(positions).intersection(found))
+
+        if positions is None:
+            return None, plans
+        return positions, remaining
+
+    @staticmethod
+    def apply(objects, filters, entity_type=None, estimate=None):
+        """
+        Фильтрует коллекцию. Фильтры компилируются один раз (filter_plan),
+        на объект приходится вызов готового accessor'а и сравнение с заранее
+        нормализованным значением. Возвращает список (см. iterate для потоковой обработки).
+        """
+        if not filters:
+            return objects
+        return list(FilterUtils.iterate(objects, filters, entity_type, estimate))
 
@@ -4,3 +4,7 @@ from enum import Enum
 class FilterType(Enum):
     EQUALS = "equals"
     LIKE = "like"
+    GREATER = "greater"
+    LESS = "less"
+    BETWEEN = "between"
+    IN = "in"
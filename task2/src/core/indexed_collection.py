@@ -0,0 +1,177 @@
+"""
+Коллекция моделей с поддерживаемыми индексами по атрибутам (id, code, ...)
+"""
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from src.core.field_index import field_index, sorted_index
+
+
+class indexed_collection(list):
+    """
+    Список моделей, который при любом изменении (append, extend, insert,
+    remove, pop, clear, sort, reverse, *=, присваивание срезов) обновляет
+    индексы атрибут -> объект.
+    Поиск по индексу - O(1). Объекты, у которых на момент добавления ключ
+    ещё не был задан (id назначили позже), запоминаются: при промахе проверяются
+    только они, получившие ключ попадают в индекс (стоимость промаха зависит от
+    числа объектов без ключа, а не от размера коллекции).
+    Дополнительно можно объявить индексы по полям для фильтров: field_index
+    (EQUALS/LIKE) или sorted_index (GREATER/LESS/BETWEEN/IN по числам и датам) -
+    не больше одного на поле; они поддерживаются теми же операциями.
+    """
+
+    def __init__(self, keys: Iterable[str] = ("id",), items: Iterable = ()):
+        super().__init__()
+        self._indexes: Dict[str, Dict[Any, Any]] = {key: {} for key in keys}
+        self._unkeyed: Dict[str, List[Any]] = {key: [] for key in keys}
+        self._field_indexes: Dict[str, Union[field_index, sorted_index]] = {}
+        # Счётчик изменений: зависимые структуры (индекс по дате, кэши) сверяются с ним
+        self.version = 0
+        self.extend(items)
+
+    # --- Обслуживание индексов ---
+
+    def _index(self, item):
+        for key, index in self._indexes.items():
+            value = getattr(item, key, None)
+            if value is None:
+                self._unkeyed[key].append(item)
+                continue
+            try:
+                index.setdefault(value, item)
+            except TypeError:
+                pass
+
+    def rebuild(self):
+        """ Полная перестройка индексов по текущему содержимому """
+        for key, index in self._indexes.items():
+            index.clear()
+            self._unkeyed[key] = []
+        for item in self:
+            self._index(item)
+        for index in self._field_indexes.values():
+            index.rebuild(self)
+
+    def add_field_index(self, field_path: str) -> field_index:
+        """ Объявляет индекс по полю (путь как в фильтрах) и строит его по текущему содержимому """
+        index = field_index(field_path)
+        index.rebuild(self)
+        self._field_indexes[index.key] = index
+        return index
+
+    def add_sorted_index(self, field_path: str) -> sorted_index:
+        """ Объявляет отсортированный индекс по полю (диапазоны по числам и датам) """
+        index = sorted_index(field_path)
+        index.rebuild(self)
+        self._field_indexes[index.key] = index
+        return index
+
+    def get_field_index(self, field_path: str) -> Optional[Union[field_index, sorted_index]]:
+        if not self._field_indexes:
+            return None
+        return self._field_indexes.get(field_index.path_key(field_path))
+
+    def find(self, key: str, value) -> Optional[Any]:
+        """ Возвращает первый объект с атрибутом key == value или None """
+        if value is None:
+            return None
+
+        try:
+            found = self._indexes[key].get(value)
+            if found is None and self._unkeyed[key]:
+                self._index_unkeyed(key)
+                found = self._indexes[key].get(value)
+        except TypeError:
+            return None
+        return found
+
+    def _index_unkeyed(self, key: str):
+        """ Добавляет в индекс key объекты, которым ключ назначили после добавления """
+        index = self._indexes[key]
+        pending = []
+        for item in self._unkeyed[key]:
+            value = getattr(item, key, None)
+            if value is None:
+                pending.append(item)
+                continue
+            try:
+                index.setdefault(value, item)
+            except TypeError:
+                pass
+        self._unkeyed[key] = pending
+
+    # --- Изменяющие операции list ---
+
+    def append(self, item):
+        super().append(item)
+        self.version += 1
+        self._index(item)
+        for index in self._field_indexes.values():
+            index.add(len(self) - 1, item)
+
+    def extend(self, items):
+        items = list(items)
+        start = len(self)
+        super().extend(items)
+        self.version += 1
+        for item in items:
+            self._index(item)
+        for index in self._field_indexes.values():
+            for position, item in enumerate(items, start):
+                index.add(position, item)
+
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
+
+    def insert(self, position, item):
+        super().insert(position, item)
+        self.version += 1
+        self.rebuild()
+
+    def remove(self, item):
+        super().remove(item)
+        self.version += 1
+        self.rebuild()
+
+    def pop(self, position=-1):
+        item = super().pop(position)
+        self.version += 1
+        self.rebuild()
+        return item
+
+    def clear(self):
+        super().clear()
+        self.version += 1
+        for key, index in self._indexes.items():
+            index.clear()
+            self._unkeyed[key] = []
+        for index in self._field_indexes.values():
+            index.clear()
+
+    def sort(self, *args, **kwargs):
+        # Позиции в индексах полей и первый объект по ключу зависят от порядка
+        super().sort(*args, **kwargs)
+        self.version += 1
+        self.rebuild()
+
+    def reverse(self):
+        super().reverse()
+        self.version += 1
+        self.rebuild()
+
+    def __imul__(self, count):
+        super().__imul__(count)
+        self.version += 1
+        self.rebuild()
+        return self
+
+    def __setitem__(self, position, value):
+        super().__setitem__(position, value)
+        self.version += 1
+        self.rebuild()
+
+    def __delitem__(self, position):
+        super().__delitem__(position)
+        self.version += 1
+        self.rebuild()
@@ -0,0 +1,107 @@
+"""
+Кодирование JSON: orjson, если установлен, иначе стандартный json
+"""
+import json
+from dataclasses import fields, is_dataclass
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - зависит от окружения
+    orjson = None
+
+
+class json_encoder:
+    """
+    Единая точка сериализации JSON для ответов API и файлов репозитория.
+    Бэкенд выбирается при импорте: orjson (в разы быстрее, сразу отдаёт UTF-8 байты)
+    или стандартный json; use(...) переключает его явно. Оформление у обоих бэкендов общее:
+    - indent=None - компактный ("," и ":" без пробелов), по умолчанию для API;
+    - indent=2 - построчный вид, как json.dumps(..., indent=2) (orjson умеет только 2,
+      другой отступ всегда пишется стандартным json);
+    - не-ASCII символы не экранируются.
+    Байты совпадают для строк, дат, Enum, моделей, целых в пределах 64 бит и дробных
+    чисел, которые repr пишет без экспоненты (1e-4 <= |x| < 1e16). Вне этого диапазона
+    записи эквивалентны, но не одинаковы: orjson пишет 1e16 и 0.00001, json - 1e+16 и 1e-05
+    (значение после разбора то же). NaN и бесконечность orjson пишет как null,
+    json - как NaN/Infinity; целые больше 64 бит orjson не кодирует (TypeError).
+    Даты, Enum, dataclass и модели кодируются самим кодировщиком (default) с тем же
+    результатом, что и Serializer.to_dict, но без предварительного прохода по данным:
+    у модели берётся to_dict(), у dataclass без него - поля, у прочих объектов -
+    словарь convert_factory (model_serializer).
+    """
+    BACKENDS = ("orjson", "json")
+    backend = "orjson" if orjson is not None else "json"
+
+    @classmethod
+    def use(cls, backend: Optional[str] = None) -> str:
+        """ Выбор бэкенда (None - лучший доступный); возвращает выбранный """
+        if backend is None:
+            backend = "orjson" if orjson is not None else "json"
+        if backend not in cls.BACKENDS:
+            raise ValueError(f"Неизвестный JSON-бэкенд: {backend}")
+        if backend == "orjson" and orjson is None:
+            raise ValueError("orjson не установлен")
+        cls.backend = backend
+        return backend
+
+    @staticmethod
+    def default(value) -> Any:
+        """ Значения, которых нет в JSON: даты - ISO-строки, Enum - значение, модели - словари """
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Enum):
+            return value.value
+        if isinstance(value, (set, frozenset)):
+            return list(value)
+        to_dict = getattr(value, "to_dict", None)
+        if callable(to_dict):
+            return to_dict()
+        if is_dataclass(value) and not isinstance(value, type):
+            # Поля dataclass - в порядке объявления (как у orjson)
+            return {f.name: getattr(value, f.name) for f in fields(value)}
+        if hasattr(value, "__dict__"):
+            from src.logics.model_serializer import model_serializer
+            return model_serializer.convert(value)
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+    @classmethod
+    def dumpb(cls, data, indent: Optional[int] = None) -> bytes:
+        """ JSON в UTF-8 байтах (для ответов и файлов) """
+        if cls.backend == "orjson" and indent in (None, 2):
+            # dataclass - через default, чтобы to_dict() имел приоритет, как в стандартном json
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(data, default=cls.default, option=option)
+        return cls._stdlib(data, indent).encode("utf-8")
+
+    @classmethod
+    def dumps(cls, data, indent: Optional[int] = None) -> str:
+        if cls.backend == "orjson" and indent in (None, 2):
+            return cls.dumpb(data, indent).decode("utf-8")
+        return cls._stdlib(data, indent)
+
+    @classmethod
+    def _stdlib(cls, data, indent: Optional[int]) -> str:
+        separators = (",", ":") if indent is None else (",", ": ")
+        return json.dumps(data, ensure_ascii=False, indent=indent, separators=separators, default=cls.default)
+
+    @classmethod
+    def loads(cls, data):
+        """ Разбор JSON (str или bytes) тем же бэкендом """
+        if cls.backend == "orjson":
+            return orjson.loads(data)
+        return json.loads(data)
+
+    @classmethod
+    def dump_file(cls, data, path: str, indent: Optional[int] = 2):
+        with open(path, "wb") as f:
+            f.write(cls.dumpb(data, indent))
+
+    @classmethod
+    def load_file(cls, path: str):
+        with open(path, "rb") as f:
+            return cls.loads(f.read())
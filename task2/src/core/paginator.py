@@ -0,0 +1,139 @@
+"""
+Постраничная выдача коллекций репозитория по курсору
+"""
+import base64
+import binascii
+import json
+from itertools import islice
+from typing import Any, List, Optional, Sequence, Tuple
+
+from src.core.filter_utils import FilterUtils
+from src.core.validator import argument_exception
+
+
+class paginator:
+    """
+    Страница коллекции в её устойчивом порядке (порядок добавления в indexed_collection).
+    Курсор - непрозрачная строка: позиция следующего элемента и id последнего отданного.
+    Если коллекцию с тех пор изменили вставкой или удалением и позиция сместилась,
+    продолжение находится по id (индекс id -> объект коллекции).
+    Страница берётся срезом коллекции (для фильтров - продолжением обхода с позиции
+    курсора), пропущенные элементы не конвертируются.
+    fields - список полей верхнего уровня, остальные поля элемента не отдаются.
+    Без limit и cursor выдача не ограничивается (прежнее поведение).
+    """
+    DEFAULT_LIMIT = 100
+    MAX_LIMIT = 10000
+
+    def __init__(self, limit=None, cursor: Optional[str] = None, fields=None):
+        self.limit = self.parse_limit(limit)
+        self.cursor = cursor or None
+        self.position, self.last_id = self.decode(self.cursor) if self.cursor else (0, None)
+        self.fields = self.parse_fields(fields)
+
+    @staticmethod
+    def from_args(args) -> "paginator":
+        """ Параметры запроса: ?limit=, ?cursor=, ?fields=a,b """
+        return paginator(args.get("limit"), args.get("cursor"), args.get("fields"))
+
+    @property
+    def active(self) -> bool:
+        return self.limit is not None or self.cursor is not None
+
+    @staticmethod
+    def parse_limit(limit) -> Optional[int]:
+        if limit is None or limit == "":
+            return None
+        try:
+            value = int(limit)
+        except (TypeError, ValueError):
+            raise argument_exception(f"limit должен быть целым числом: {limit}")
+        if value <= 0 or value > paginator.MAX_LIMIT:
+            raise argument_exception(f"limit должен быть от 1 до {paginator.MAX_LIMIT}")
+        return value
+
+    @staticmethod
+    def parse_fields(fields) -> Optional[Tuple[str, ...]]:
+        if not fields:
+            return None
+        if isinstance(fields, str):
+            fields = fields.split(",")
+        names = tuple(f.strip() for f in fields if f and f.strip())
+        return names or None
+
+    # --- Курсор ---
+
+    @staticmethod
+    def encode(position: int, last_id) -> str:
+        raw = json.dumps([position, last_id], ensure_ascii=False).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode(cursor: str) -> Tuple[int, Any]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            position, last_id = json.loads(raw.decode("utf-8"))
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+            raise argument_exception("Некорректный курсор")
+        if not isinstance(position, int) or position < 0:
+            raise argument_exception("Некорректный курсор")
+        return position, last_id
+
+    def start(self, collection: Sequence) -> int:
+        """ Позиция, с которой продолжается выдача """
+        position, last_id = self.position, self.last_id
+        if last_id is None:
+            return min(position, len(collection))
+        if 0 < position <= len(collection) and getattr(collection[position - 1], "id", None) == last_id:
+            return position
+
+        # Коллекция изменилась: продолжаем после элемента с тем же id
+        find = getattr(collection, "find", None)
+        found = find("id", last_id) if find is not None else None
+        if found is not None:
+            return collection.index(found) + 1
+        return min(position, len(collection))
+
+    def _size(self) -> int:
+        return self.limit or self.DEFAULT_LIMIT
+
+    # --- Страницы ---
+
+    def page(self, collection: Sequence) -> Tuple[Sequence, Optional[str]]:
+        """ (элементы страницы, курсор следующей страницы или None) """
+        if not self.active:
+            return collection, None
+
+        start = self.start(collection)
+        end = start + self._size()
+        items = collection[start:end]
+        if end < len(collection) and items:
+            return items, self.encode(end, getattr(items[-1], "id", None))
+        return items, None
+
+    def page_filtered(self, collection: Sequence, filters, entity_type=None) -> Tuple[Any, Optional[str]]:
+        """
+        Страница объектов, прошедших фильтры. Без пагинации - ленивый
+        генератор FilterUtils.iterate, иначе обход с позиции курсора
+        до limit + 1 совпадения (лишнее показывает, что есть следующая страница).
+        """
+        if not self.active:
+            return FilterUtils.iterate(collection, filters, entity_type=entity_type), None
+
+        size = self._size()
+        matches = FilterUtils.iterate_positions(collection, FilterUtils.compile(filters, entity_type),
+                                                start=self.start(collection))
+        found = list(islice(matches, size + 1))
+        matches.close()
+
+        items: List = [obj for _, obj in found[:size]]
+        if len(found) > size:
+            position, last = found[size - 1]
+            return items, self.encode(position + 1, getattr(last, "id", None))
+        return items, None
+
+    def project(self, data):
+        """ Оставляет в словаре элемента только запрошенные поля (fields) """
+        if not self.fields or not isinstance(data, dict):
+            return data
+        return {k: v for k, v in data.items() if k in self.fields}
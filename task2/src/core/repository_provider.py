@@ -0,0 +1,78 @@
+"""
+Общий (на процесс) экземпляр репозитория для REST API
+"""
+import os
+import threading
+from typing import Optional, Tuple
+
+from src.core.storage_repository import storage_repository
+
+
+"""
+Поставщик репозитория (Singleton)
+Лениво загружает storage_repository один раз на процесс и перезагружает его
+только при изменении файла данных (st_mtime_ns/размер) или по явному запросу.
+Потокобезопасен: новый репозиторий собирается под блокировкой и подменяется
+целиком, поэтому уже выполняющиеся запросы дорабатывают со старым экземпляром.
+"""
+class repository_provider:
+    _instance = None
+    _creation_lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            with cls._creation_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._lock = threading.RLock()
+                    instance._repo = None
+                    instance._signature = None
+                    cls._instance = instance
+        return cls._instance
+
+    @staticmethod
+    def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+        """ (st_mtime_ns - время изменения в наносекундах, размер) файла данных или None, если файла нет """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _build(self) -> storage_repository:
+        from src.start_service import start_service
+
+        repo = storage_repository()
+        start_service(repo).create()
+        return repo
+
+    def get(self) -> storage_repository:
+        """
+        Возвращает актуальный репозиторий.
+        Если файл данных изменился с момента загрузки - перезагружает.
+        """
+        repo = self._repo
+        if repo is not None and self._file_signature(repo.file_path) == self._signature:
+            return repo
+
+        with self._lock:
+            repo = self._repo
+            if repo is None or self._file_signature(repo.file_path) != self._signature:
+                repo = self._build()
+                self._signature = self._file_signature(repo.file_path)
+                self._repo = repo
+            return repo
+
+    def reload(self) -> storage_repository:
+        """ Принудительная перезагрузка репозитория """
+        with self._lock:
+            repo = self._build()
+            self._signature = self._file_signature(repo.file_path)
+            self._repo = repo
+            return repo
+
+    def reset(self) -> None:
+        """ Сбрасывает загруженный репозиторий (следующий get() загрузит заново) """
+        with self._lock:
+            self._repo = None
+            self._signature = None
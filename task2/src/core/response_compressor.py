@@ -0,0 +1,123 @@
+"""
+Сжатие ответов API: gzip и Brotli (если установлен пакет brotli)
+"""
+import gzip
+import itertools
+import zlib
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - зависит от окружения
+    brotli = None
+
+
+class response_compressor:
+    """
+    Сжатие тела ответа по заголовку Accept-Encoding.
+    Кодировка - поддерживаемая с наибольшим q (при равном q - br, затем gzip).
+    Тела меньше min_size байт не сжимаются: выигрыш меньше накладных расходов.
+    Потоковое тело (генератор частей) сжимается одним потоком компрессора по частям:
+    после каждой части компрессор сбрасывается (flush), клиент получает данные сразу,
+    а память не зависит от размера ответа.
+    """
+    ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+    # Уровни для ответов "на лету": почти максимальное сжатие JSON/CSV при малом времени
+    GZIP_LEVEL = 6
+    BROTLI_QUALITY = 5
+
+    enabled = True
+    min_size = 1024
+
+    @classmethod
+    def configure(cls, enabled: Optional[bool] = None, min_size: Optional[int] = None) -> None:
+        if enabled is not None:
+            cls.enabled = bool(enabled)
+        if min_size is not None:
+            cls.min_size = max(int(min_size), 0)
+
+    @classmethod
+    def negotiate(cls, accept_encoding: Optional[str]) -> Optional[str]:
+        """ Кодировка ответа по Accept-Encoding; None - без сжатия """
+        if not cls.enabled or not accept_encoding:
+            return None
+
+        qualities = {}
+        for part in accept_encoding.split(","):
+            name, *params = [p.strip() for p in part.split(";")]
+            quality = 1.0
+            for param in params:
+                if param.startswith("q="):
+                    try:
+                        quality = float(param[2:])
+                    except ValueError:
+                        quality = 0.0
+            if name:
+                qualities[name.lower()] = quality
+
+        best, best_quality = None, 0.0
+        for encoding in cls.ENCODINGS:
+            quality = qualities.get(encoding, qualities.get("*", 0.0))
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    @classmethod
+    def compress(cls, data: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(data, quality=cls.BROTLI_QUALITY)
+        if encoding == "gzip":
+            return gzip.compress(data, cls.GZIP_LEVEL, mtime=0)
+        raise ValueError(f"Неподдерживаемая кодировка: {encoding}")
+
+    @classmethod
+    def iter_compress(cls, chunks: Iterable[Union[str, bytes]], encoding: str) -> Iterator[bytes]:
+        """ Сжатие потока частей: одна сжатая часть на каждую исходную (пустые пропускаются) """
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=cls.BROTLI_QUALITY)
+            for chunk in chunks:
+                data = compressor.process(cls._bytes(chunk)) + compressor.flush()
+                if data:
+                    yield data
+            yield compressor.finish()
+        elif encoding == "gzip":
+            compressor = zlib.compressobj(cls.GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            for chunk in chunks:
+                data = compressor.compress(cls._bytes(chunk)) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                if data:
+                    yield data
+            yield compressor.flush()
+        else:
+            raise ValueError(f"Неподдерживаемая кодировка: {encoding}")
+
+    @classmethod
+    def encode(cls, body, encoding: Optional[str]) -> Tuple[object, Optional[str]]:
+        """
+        Тело ответа в кодировке encoding и применённая кодировка (None - не сжато:
+        кодировка не выбрана или тело меньше min_size). Строка или байты сжимаются целиком;
+        у потокового тела читаются первые части до min_size байт, чтобы решить,
+        сжимать ли его, остальные сжимаются по мере отдачи.
+        """
+        if encoding is None:
+            return body, None
+
+        if isinstance(body, (str, bytes)):
+            data = cls._bytes(body)
+            if len(data) < cls.min_size:
+                return data, None
+            return cls.compress(data, encoding), encoding
+
+        chunks = iter(body)
+        head = []
+        size = 0
+        for chunk in chunks:
+            chunk = cls._bytes(chunk)
+            head.append(chunk)
+            size += len(chunk)
+            if size >= cls.min_size:
+                return cls.iter_compress(itertools.chain(head, chunks), encoding), encoding
+        return cls.encode(b"".join(head), encoding)
+
+    @staticmethod
+    def _bytes(chunk: Union[str, bytes]) -> bytes:
+        return chunk.encode("utf-8") if isinstance(chunk, str) else chunk
@@ -0,0 +1,104 @@
+"""
+Кэш результатов расчётов (LRU + TTL)
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+"""
+Кэш результатов с вытеснением давно не использованных записей (LRU)
+и ограничением времени жизни записи (TTL, секунды; 0 - без ограничения).
+Считает попадания и промахи - по ним подбирается размер кэша.
+К записи можно приложить производные значения (attach), например готовое сжатое
+тело ответа: они живут и вытесняются вместе с записью, put заменяет их.
+Потокобезопасен.
+"""
+class result_cache:
+    _MISSING = object()
+
+    def __init__(self, max_size: int = 128, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """ Значение по ключу (запись становится самой свежей) или default """
+        with self._lock:
+            entry = self._entry(key)
+            if entry is self._MISSING:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            return entry[1]
+
+    def attach(self, key: Hashable, name: Hashable, value: Any) -> bool:
+        """ Прикладывает к записи key значение name; False - записи нет (не кэшируется) """
+        with self._lock:
+            entry = self._entry(key)
+            if entry is self._MISSING:
+                return False
+            entry[2][name] = value
+            return True
+
+    def attachment(self, key: Hashable, name: Hashable, default: Any = None) -> Any:
+        """ Приложенное к записи key значение name или default; найденное считается попаданием """
+        with self._lock:
+            entry = self._entry(key)
+            if entry is self._MISSING or name not in entry[2]:
+                return default
+            self.hits += 1
+            return entry[2][name]
+
+    def _entry(self, key: Hashable):
+        """ Живая запись (становится самой свежей) или _MISSING; вызывается под блокировкой """
+        entry = self._entries.get(key, self._MISSING)
+        if entry is self._MISSING:
+            return entry
+        if self.ttl and time.monotonic() - entry[0] > self.ttl:
+            del self._entries[key]
+            return self._MISSING
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value, {})
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """ Сбрасывает все записи (счётчики сохраняются) """
+        with self._lock:
+            self._entries.clear()
+
+    def configure(self, max_size: Optional[int] = None, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            if max_size is not None:
+                self.max_size = max_size
+            if ttl is not None:
+                self.ttl = ttl
+            while len(self._entries) > max(self.max_size, 0):
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl
+        }
@@ -1,10 +1,9 @@
 """
 Назначение: хранилище данных для моделей проекта
 """
-import os, json
+import os
 from datetime import date
-from typing import List, Optional
-from dataclasses import asdict
+from typing import Dict, Hashable, List, Optional
 
 from src.models.nomenclature_model import nomenclature_model
 from src.models.unit_model import unit_model
@@ -13,22 +12,70 @@ from src.models.receipt_model import receipt_model
 from src.models.warehouse_model import warehouse_model
 from src.models.transaction_model import transaction_model
 from src.models.turnover_snapshot_model import turnover_snapshot_model
+from src.core.indexed_collection import indexed_collection
+from src.core.transaction_column_store import transaction_column_store, transaction_rows
+from src.core.date_index import date_index
+from src.core.turnover_checkpoints import turnover_checkpoints
+from src.core.result_cache import result_cache
+from src.core.json_encoder import json_encoder
 
 class storage_repository:
     """
     Репозиторий для хранения всех моделей приложения
     """
+    # Индексы по полям для фильтров EQUALS/LIKE (/api/filter/<entity_type>)
+    FIELD_INDEXES = {
+        "nomenclature": ("name", "group.name"),
+        "warehouse": ("code",),
+    }
+    # Отсортированные индексы для GREATER/LESS/BETWEEN/IN (диапазоны дат проводок)
+    SORTED_INDEXES = {
+        "transaction": ("date",),
+    }
+
     def __init__(self):
-        self.nomenclatures = []
-        self.units = []
-        self.groups = []
-        self.receipts = []
-        self.warehouses = []
-        self.transactions = []
+        # Коллекции сами поддерживают индексы id -> объект (и code -> объект)
+        self.nomenclatures = indexed_collection(("id",))
+        self.units = indexed_collection(("id",))
+        self.groups = indexed_collection(("id",))
+        self.receipts = indexed_collection(("id", "code"))
+        self.warehouses = indexed_collection(("id", "code"))
+        self.transactions = indexed_collection(("id",))
 
         self.file_path = os.path.join("task2", "data_out", "repository.json")
         self.snapshot_file = os.path.join("task2", "data_out", "turnover_snapshot.json")
 
+        # Альтернативное хранение транзакций: "json" (модели в списке) или "columnar" (mmap-колонки)
+        self.transaction_backend = "json"
+        self.transaction_store_file = os.path.join("task2", "data_out", "transactions.col")
+        self.transaction_store: Optional[transaction_column_store] = None
+
+        # Вид файла save_all: False - вложенные копии ссылок, True - таблицы ссылок по id
+        self.normalized_output = False
+
+        # Вторичный индекс транзакций по дате и версия коллекции, для которой он построен
+        self._date_index: Optional[date_index] = None
+        self._date_index_version = -1
+
+        # Помесячные checkpoint'ы остатков и состояние данных, для которого они построены
+        self._checkpoints: Optional[turnover_checkpoints] = None
+        self._checkpoints_state = None
+
+        # Первые проводки номенклатуры по складам (подписи строк ОСВ) и их состояние
+        self._first_movements: Optional[Dict[Hashable, Dict[Hashable, tuple]]] = None
+        self._first_movements_state = None
+
+        # Версия данных: растёт при каждой проводке, сохраняется вместе с репозиторием.
+        # Snapshot в памяти хранит state_version(), на которое он актуален; файл snapshot'а -
+        # только data_version, поэтому он принимается, пока состояние данных совпадает
+        # с _snapshot_file_state (состояние при записи файла или загрузке репозитория).
+        self.data_version = 0
+        self._snapshot = None
+        self._snapshot_file_state = None
+
+        # Кэш результатов ОСВ/остатков; ключи включают state_version()
+        self.result_cache = result_cache()
+
         self.data = {
             "nomenclature": self.nomenclatures,
             "unit": self.units,
@@ -38,28 +85,277 @@ class storage_repository:
             "transaction": self.transactions
         }
 
+        for entity_type, paths in self.FIELD_INDEXES.items():
+            for path in paths:
+                self.add_field_index(entity_type, path)
+        for entity_type, paths in self.SORTED_INDEXES.items():
+            for path in paths:
+                self.add_sorted_index(entity_type, path)
+        self._snapshot_file_state = self.state_version()
+
+    def add_field_index(self, entity_type: str, field_path: str):
+        """ Объявляет индекс по полю сущности; поддерживается при каждом добавлении """
+        return self.data[entity_type].add_field_index(field_path)
+
+    def add_sorted_index(self, entity_type: str, field_path: str):
+        """ Объявляет отсортированный индекс по полю сущности (диапазоны по числам и датам) """
+        return self.data[entity_type].add_sorted_index(field_path)
+
     def add_nomenclature(self, item): self.nomenclatures.append(item)
     def add_unit(self, item): self.units.append(item)
     def add_group(self, item): self.groups.append(item)
     def add_receipt(self, item): self.receipts.append(item)
     def add_warehouse(self, item): self.warehouses.append(item)
-    def add_transaction(self, item): self.transactions.append(item)
+    def add_transaction(self, item):
+        """
+        Добавляет проводку и поддерживает производные структуры без пересчёта:
+        индекс дат, помесячные checkpoint'ы и snapshot до даты блокировки
+        получают дельту только по затронутым записям.
+        """
+        index_current = self._date_index is not None and self._date_index_version == self.transactions.version
+        checkpoints_current = self._checkpoints is not None and self._checkpoints_state == self._checkpoints_source()
+        movements_current = self._first_movements is not None and self._first_movements_state == self._checkpoints_source()
+        snapshot_current = self._snapshot is not None and self._snapshot["state"] == self.state_version()
+
+        self.transactions.append(item)
+        self.data_version += 1
+        self.result_cache.clear()
+
+        if index_current:
+            self._date_index.add(item)
+            self._date_index_version = self.transactions.version
 
-    # Поиск по id
+        if checkpoints_current and item.date is not None:
+            key = turnover_checkpoints.key_of(item)
+            if self._checkpoints.apply(item.date, key, item.unit.to_base(item.quantity)):
+                self._checkpoints_state = self._checkpoints_source()
+            else:
+                self._checkpoints = None
+
+        if movements_current:
+            self._add_first_movement(self._first_movements, item.nomenclature, item.warehouse, item.unit)
+            self._first_movements_state = self._checkpoints_source()
+
+        self._apply_snapshot_delta(item, snapshot_current)
+
+    def state_version(self) -> tuple:
+        """
+        Версия состояния данных для ключей кэша: data_version и версии всех коллекций
+        (меняются при любой правке, в том числе в обход add_*), плюс колоночное хранилище.
+        """
+        return (self.data_version, id(self.transaction_store)) + \
+            tuple(getattr(items, "version", len(items)) for items in self.data.values())
+
+    def _checkpoints_source(self):
+        return self.transactions.version, id(self.transaction_store)
+
+    def _apply_snapshot_delta(self, t, current: bool):
+        """
+        Проводка задним числом (до даты блокировки) меняет только строку своей номенклатуры.
+        current - snapshot был актуален (state_version()) до добавления проводки.
+        """
+        snap = self._snapshot
+        if snap is None:
+            return
+        if not current:
+            # Snapshot уже устарел (данные менялись, в том числе в обход add_*) - дельта на нём некорректна
+            self._snapshot = None
+            return
+
+        if t.date is not None and t.date <= snap["block_date"]:
+            qty = t.unit.to_base(t.quantity)
+            row = snap["by_item"].get(t.nomenclature.id)
+            if row is not None:
+                row.closing += qty
+            else:
+                base = t.unit.base if t.unit.base else t.unit
+                row = turnover_snapshot_model(
+                    warehouse_id=t.warehouse.id if t.warehouse else None,
+                    item_id=t.nomenclature.id,
+                    unit_id=base.id,
+                    closing=qty,
+                    snapshot_date=snap["block_date"]
+                )
+                snap["rows"].append(row)
+                snap["by_item"][row.item_id] = row
+            snap["dirty"] = True
+
+        snap["data_version"] = self.data_version
+        snap["state"] = self.state_version()
+
+    def transactions_by_date(self) -> date_index:
+        """
+        Индекс транзакций по дате. Перестраивается, только если коллекция
+        менялась в обход add_transaction.
+        """
+        if self._date_index is None or self._date_index_version != self.transactions.version:
+            self._date_index = date_index(self.transactions)
+            self._date_index_version = self.transactions.version
+        return self._date_index
+
+    # Поиск по id / code (O(1) через индексы коллекций)
     def get_warehouse_by_id(self, warehouse_id: Optional[int]):
-        return next((w for w in self.warehouses if getattr(w, "id", None) == warehouse_id), None)
+        return self.warehouses.find("id", warehouse_id)
 
     def get_nomenclature_by_id(self, item_id: int):
-        return next((n for n in self.nomenclatures if getattr(n, "id", None) == item_id), None)
+        return self.nomenclatures.find("id", item_id)
 
     def get_unit_by_id(self, unit_id: Optional[int]):
-        return next((u for u in self.units if getattr(u, "id", None) == unit_id), None)
+        return self.units.find("id", unit_id)
+
+    def get_group_by_id(self, group_id: Optional[int]):
+        return self.groups.find("id", group_id)
+
+    def get_transaction_by_id(self, transaction_id: Optional[int]):
+        return self.transactions.find("id", transaction_id)
 
-    def save_all(self):
+    def get_warehouse_by_code(self, code: Optional[str]):
+        return self.warehouses.find("code", code)
+
+    def get_receipt_by_code(self, code: Optional[str]):
+        return self.receipts.find("code", code)
+
+    def turnover_checkpoints(self) -> turnover_checkpoints:
+        """
+        Помесячные checkpoint'ы остатков. Строятся одним проходом по истории
+        и переиспользуются, пока не изменились транзакции.
+        """
+        state = self._checkpoints_source()
+        if self._checkpoints is None or self._checkpoints_state != state:
+            self._checkpoints = turnover_checkpoints.build(self)
+            self._checkpoints_state = state
+        return self._checkpoints
+
+    def first_movements(self) -> Dict[Hashable, Dict[Hashable, tuple]]:
+        """
+        Первая проводка номенклатуры на каждом складе в порядке добавления:
+        unique_code номенклатуры -> {unique_code склада: (склад, единица)}.
+        Склад и единица строки ОСВ берутся отсюда (первая подходящая проводка, как
+        при полном переборе списка), независимо от порядка обхода движком расчёта.
+        Строки колоночного хранилища идут первыми, в порядке файла.
+        """
+        state = self._checkpoints_source()
+        if self._first_movements is None or self._first_movements_state != state:
+            movements: Dict[Hashable, Dict[Hashable, tuple]] = {}
+            store = self.transaction_store
+            if store is not None:
+                items = [self.get_nomenclature_by_id(i) for i in store.item_ids]
+                warehouses = [self.get_warehouse_by_id(w) for w in store.warehouse_ids]
+                units = [self.get_unit_by_id(u) for u in store.unit_ids]
+                seen = set()
+                for n, w, u in zip(store.items, store.warehouses, store.units):
+                    if (n, w) not in seen:
+                        seen.add((n, w))
+                        self._add_first_movement(movements, items[n], warehouses[w], units[u])
+            for t in self.transactions:
+                self._add_first_movement(movements, t.nomenclature, t.warehouse, t.unit)
+            self._first_movements = movements
+            self._first_movements_state = state
+        return self._first_movements
+
+    @staticmethod
+    def _add_first_movement(movements, nomenclature, warehouse, unit):
+        if nomenclature is None:
+            return
+        by_warehouse = movements.setdefault(nomenclature.unique_code, {})
+        key = warehouse.unique_code if warehouse is not None else None
+        if key not in by_warehouse:
+            by_warehouse[key] = (warehouse, unit)
+
+    def open_transaction_store(self, path: Optional[str] = None) -> transaction_column_store:
+        """ Подключает колоночное хранилище транзакций (заменяет ранее открытое) """
+        if self.transaction_store is not None:
+            self.transaction_store.close()
+        self.transaction_store = transaction_column_store(path or self.transaction_store_file)
+        return self.transaction_store
+
+    def save_transactions_columnar(self):
+        """
+        Переносит транзакции из списка в колоночный файл (дописывая к уже открытому
+        хранилищу) и переоткрывает его. Список transactions после этого пуст.
+        """
+        transaction_column_store.write(self.transaction_store_file, self.transactions, base=self.transaction_store)
+        self.transactions.clear()
+        self.open_transaction_store()
+
+    def collection(self, entity_type: str):
+        """
+        Коллекция сущности для выдачи через API и выгрузки. Транзакции при открытом
+        колоночном хранилище - представление transaction_rows: строки колонок (модели
+        строятся при чтении) и дописанные после открытия. Хранилище не закрывается и
+        не копируется в список: общий репозиторий процесса продолжает читать колонки
+        """
+        if entity_type == "transaction" and self.transaction_store is not None:
+            return transaction_rows(self.transaction_store, self, self.transactions)
+        return self.data[entity_type]
+
+    def materialize_transactions(self):
+        """ Переносит строки колоночного хранилища обратно в список transaction_model """
+        if self.transaction_store is None:
+            return
+        rows = self.transaction_store.materialize(self)
+        self.transaction_store.close()
+        self.transaction_store = None
+        self.transactions[:0] = rows
+
+    def save_all(self, normalized: Optional[bool] = None):
+        """
+        Записывает коллекции в file_path.
+        normalized (по умолчанию - self.normalized_output) - справочники один раз
+        в таблицах "refs" по id, коллекции и транзакции ссылаются на них ключами
+        (см. reference_normalizer); load_all читает оба вида файла.
+        """
+        if normalized is None:
+            normalized = self.normalized_output
         os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
-        full = {name: [getattr(i, "to_dict", lambda: i.__dict__)() for i in items] for name, items in self.data.items()}
-        with open(self.file_path, "w", encoding="utf-8") as f:
-            json.dump(full, f, ensure_ascii=False, indent=2)
+        if self.transaction_backend == "columnar":
+            self.save_transactions_columnar()
+        if normalized:
+            full = self.normalized_document()
+        else:
+            full = {name: [getattr(i, "to_dict", lambda: i.__dict__)() for i in items] for name, items in self.data.items()}
+        full["data_version"] = self.data_version
+        # Модели внутри to_dict() и даты кодирует json_encoder
+        json_encoder.dump_file(full, self.file_path)
+
+        self.flush_turnovers_snapshot()
+
+    def normalized_document(self, collections: Optional[dict] = None) -> dict:
+        """
+        Нормализованный вид коллекций: справочные коллекции - списки ключей
+        (порядок и состав), их записи и все объекты, на которые ссылаются строки, - в "refs".
+        collections - коллекции по имени (по умолчанию data; для выгрузки с транзакциями
+        колоночного хранилища - collection(name))
+        """
+        from src.logics.reference_normalizer import reference_normalizer
+
+        normalizer = reference_normalizer()
+        full = {}
+        for name, items in (self.data if collections is None else collections).items():
+            if normalizer.refs.get(name) is not None:
+                full[name] = [normalizer.ref(i) for i in items]
+            else:
+                full[name] = list(normalizer.iter_rows(items))
+        full["refs"] = normalizer.refs
+        return full
+
+    @staticmethod
+    def expand_document(data: dict) -> dict:
+        """ Файл нормализованного вида -> вид с вложенными словарями ссылок (как у to_dict) """
+        refs = data.get("refs")
+        if not isinstance(refs, dict):
+            return data
+        from src.logics.reference_normalizer import reference_normalizer
+
+        full = {}
+        for name, items in data.items():
+            if name == "refs" or not isinstance(items, list):
+                full[name] = items
+            elif name in refs:
+                full[name] = [reference_normalizer.expand(refs[name].get(key, {"id": key}), refs) for key in items]
+            else:
+                full[name] = reference_normalizer.expand(items, refs)
+        return full
 
     @staticmethod
     def restore_ref(mapping, container, key):
@@ -72,11 +368,14 @@ class storage_repository:
         if not os.path.exists(self.file_path):
             return False
 
-        with open(self.file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = self.expand_document(json_encoder.load_file(self.file_path))
 
         for arr in self.data.values():
             arr.clear()
+        self._snapshot = None
+        self._checkpoints = None
+        self._first_movements = None
+        self.result_cache.clear()
 
         id_to_unit = {}
 
@@ -129,6 +428,16 @@ class storage_repository:
             id_to_nom[nom.id] = nom
             self.add_nomenclature(nom)
 
+        if self.transaction_store is not None:
+            self.transaction_store.close()
+            self.transaction_store = None
+
+        if self.transaction_backend == "columnar" and os.path.exists(self.transaction_store_file):
+            self.open_transaction_store()
+            self.data_version = data.get("data_version", 0)
+            self._snapshot_file_state = self.state_version()
+            return True
+
         for t in data.get("transaction", []):
             nom = self.restore_ref(id_to_nom, t, "nomenclature")
             wh = self.restore_ref(id_to_wh, t, "warehouse")
@@ -149,42 +458,83 @@ class storage_repository:
             tr.id = t.get("id")
             self.add_transaction(tr)
 
+        # Загруженные данные соответствуют версии, с которой они были сохранены
+        self.data_version = data.get("data_version", 0)
+        self._snapshot_file_state = self.state_version()
         return True
 
     def save_turnovers_snapshot(self, block_date: date, data: List[turnover_snapshot_model]):
         """
-        Сохраняет snapshot в JSON. Использует единый механизм сериализации:
+        Сохраняет snapshot в JSON. Использует единый механизм сериализации (json_encoder):
         - Если у модели есть to_dict() — используем его.
-        - Иначе — используем dataclasses.asdict().
-        Гарантируем, что все даты преобразованы в ISO-строки.
+        - Иначе — поля dataclass.
+        Даты кодируются ISO-строками.
+        В файл записывается data_version - версия данных, на которую snapshot актуален.
         """
         os.makedirs(os.path.dirname(self.snapshot_file), exist_ok=True)
-        serialized = [s.to_dict() if hasattr(s, "to_dict") else asdict(s) for s in data]
         payload = {
             "block_date": block_date.isoformat() if isinstance(block_date, date) else str(block_date),
-            "data": serialized
+            "data_version": self.data_version,
+            "data": data
+        }
+        json_encoder.dump_file(payload, self.snapshot_file)
+        self._snapshot_file_state = self.state_version()
+
+        self._cache_snapshot(block_date, list(data), dirty=False)
+
+    def _cache_snapshot(self, block_date: date, rows: List[turnover_snapshot_model], dirty: bool):
+        self._snapshot = {
+            "block_date": block_date,
+            "rows": rows,
+            "by_item": {r.item_id: r for r in rows},
+            "data_version": self.data_version,
+            "state": self.state_version(),
+            "dirty": dirty
         }
-        with open(self.snapshot_file, "w", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2)
+
+    def flush_turnovers_snapshot(self):
+        """ Записывает в файл snapshot, изменённый проводками задним числом """
+        if self._snapshot is not None and self._snapshot["dirty"]:
+            self.save_turnovers_snapshot(self._snapshot["block_date"], self._snapshot["rows"])
+
+    def turnovers_snapshot_version(self) -> Optional[int]:
+        """ Версия данных, на которую актуален загруженный snapshot (None - snapshot не загружен) """
+        return self._snapshot["data_version"] if self._snapshot is not None else None
 
     def load_turnovers_snapshot(self, block_date: date) -> Optional[List[turnover_snapshot_model]]:
         """
         Загружает snapshot из файла и возвращает список turnover_snapshot_model.
-        Возвращает None, если файл отсутствует или имает другую block_date.
+        Возвращает None, если файл отсутствует, имеет другую block_date
+        или записан для другой версии данных (устарел). Данные, изменённые в обход add_*
+        (версии коллекций в state_version()), тоже делают snapshot устаревшим.
+        Snapshot, поддерживаемый в памяти через add_transaction, отдаётся без чтения файла.
         """
+        snap = self._snapshot
+        if snap is not None and snap["block_date"] == block_date:
+            if snap["state"] == self.state_version():
+                return snap["rows"]
+            self._snapshot = None
+
+        if self._snapshot_file_state != self.state_version():
+            return None
+
         if not os.path.exists(self.snapshot_file):
             return None
 
-        with open(self.snapshot_file, "r", encoding="utf-8") as f:
-            payload = json.load(f)
+        payload = json_encoder.load_file(self.snapshot_file)
 
         if payload.get("block_date") != (block_date.isoformat() if isinstance(block_date, date) else str(block_date)):
             return None
 
+        # Файлы старого формата (без версии) принимаются как есть
+        if "data_version" in payload and payload["data_version"] != self.data_version:
+            return None
+
         raw = payload.get("data", [])
         result: List[turnover_snapshot_model] = []
         for s in raw:
             model_obj = turnover_snapshot_model.from_dict(s, fallback_date=block_date)
             result.append(model_obj)
 
+        self._cache_snapshot(block_date, result, dirty=False)
         return result
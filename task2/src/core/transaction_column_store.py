@@ -0,0 +1,234 @@
+"""
+Колоночное хранилище транзакций с чтением через mmap
+"""
+import array
+import json
+import mmap
+import os
+import struct
+from datetime import date
+from typing import Iterable, List, Optional, Sequence
+
+from src.core.validator import operation_exception
+
+
+"""
+Колоночное хранилище транзакций.
+
+Формат файла (фиксированная ширина, порядок байт платформы):
+    заголовок   : MAGIC (8 байт) + количество строк (uint64)
+    date        : int32   - date.toordinal()
+    nomenclature: int32   - индекс в словаре id номенклатуры
+    warehouse   : int32   - индекс в словаре id складов
+    unit        : int32   - индекс в словаре id единиц
+    quantity    : float64 - количество
+Словари id лежат рядом в <файл>.meta.json, номера и id транзакций -
+в <файл>.rows.json (читаются только при материализации моделей).
+Строки упорядочены по дате, поэтому границы периода ищутся bisect'ом
+прямо по колонке dates.
+Колонки отображаются в память и отдаются как memoryview, поэтому
+агрегация идёт без создания transaction_model на каждую строку.
+"""
+class transaction_column_store:
+    MAGIC = b"TXCOL001"
+    HEADER = struct.Struct("<8sQ")
+    COLUMNS = (("dates", "i"), ("items", "i"), ("warehouses", "i"), ("units", "i"), ("quantities", "d"))
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._file = None
+        self._mmap = None
+        # id и номера транзакций (row_keys): читаются из файла при первом обращении
+        self._row_keys = None
+
+        with open(self.meta_path(file_path), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.item_ids: List = meta.get("nomenclature", [])
+        self.warehouse_ids: List = meta.get("warehouse", [])
+        self.unit_ids: List = meta.get("unit", [])
+
+        self._file = open(file_path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count = self.HEADER.unpack_from(self._mmap, 0)
+        if magic != self.MAGIC:
+            self.close()
+            raise operation_exception(f"Неверный формат колоночного файла: {file_path}")
+        self.count = count
+
+        view = memoryview(self._mmap)
+        offset = self.HEADER.size
+        for name, code in self.COLUMNS:
+            width = struct.calcsize(code)
+            setattr(self, name, view[offset:offset + width * count].cast(code))
+            offset += width * count
+
+    @staticmethod
+    def meta_path(file_path: str) -> str:
+        return file_path + ".meta.json"
+
+    @staticmethod
+    def rows_path(file_path: str) -> str:
+        return file_path + ".rows.json"
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self):
+        """ Освобождает отображение файла """
+        for name, _ in self.COLUMNS:
+            column = getattr(self, name, None)
+            if column is not None:
+                column.release()
+                setattr(self, name, None)
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._row_keys = None
+
+    @staticmethod
+    def write(file_path: str, transactions: Iterable, base: Optional["transaction_column_store"] = None):
+        """
+        Записывает транзакции в колоночный формат.
+        base - уже открытое хранилище, строки которого копируются первыми.
+        Строки сортируются по дате (устойчиво). Запись идёт во временный файл
+        с атомарной подменой; base закрывается перед подменой (на Windows нельзя
+        заменить отображённый в память файл) - после записи его нужно открыть заново.
+        """
+        columns = {name: array.array(code) for name, code in transaction_column_store.COLUMNS}
+        dictionaries = {"nomenclature": {}, "warehouse": {}, "unit": {}}
+        ids, numbers = [], []
+
+        def dict_index(kind, ref_id):
+            mapping = dictionaries[kind]
+            if ref_id not in mapping:
+                mapping[ref_id] = len(mapping)
+            return mapping[ref_id]
+
+        if base is not None:
+            for kind, source in (("nomenclature", base.item_ids), ("warehouse", base.warehouse_ids), ("unit", base.unit_ids)):
+                for ref_id in source:
+                    dict_index(kind, ref_id)
+            for name, _ in transaction_column_store.COLUMNS:
+                columns[name].extend(getattr(base, name))
+            base_ids, base_numbers = base.load_rows()
+            ids.extend(base_ids)
+            numbers.extend(base_numbers)
+
+        base_count = len(columns["dates"])
+        new_rows = sorted((t for t in transactions if t.date is not None), key=lambda t: t.date)
+        for t in new_rows:
+            columns["dates"].append(t.date.toordinal())
+            columns["items"].append(dict_index("nomenclature", t.nomenclature.id))
+            columns["warehouses"].append(dict_index("warehouse", t.warehouse.id))
+            columns["units"].append(dict_index("unit", t.unit.id))
+            columns["quantities"].append(float(t.quantity))
+            ids.append(t.id)
+            numbers.append(t.number)
+
+        dates = columns["dates"]
+        if 0 < base_count < len(dates) and dates[base_count] < dates[base_count - 1]:
+            # Дозапись задним числом: устойчиво переупорядочиваем все строки
+            order = sorted(range(len(dates)), key=dates.__getitem__)
+            for name, code in transaction_column_store.COLUMNS:
+                column = columns[name]
+                columns[name] = array.array(code, (column[i] for i in order))
+            ids = [ids[i] for i in order]
+            numbers = [numbers[i] for i in order]
+
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        tmp_path = file_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(transaction_column_store.HEADER.pack(transaction_column_store.MAGIC, len(ids)))
+            for name, _ in transaction_column_store.COLUMNS:
+                columns[name].tofile(f)
+
+        meta = {kind: list(mapping.keys()) for kind, mapping in dictionaries.items()}
+        meta["count"] = len(ids)
+        with open(transaction_column_store.meta_path(tmp_path), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        with open(transaction_column_store.rows_path(tmp_path), "w", encoding="utf-8") as f:
+            json.dump({"id": ids, "number": numbers}, f, ensure_ascii=False)
+
+        if base is not None:
+            base.close()
+        os.replace(transaction_column_store.meta_path(tmp_path), transaction_column_store.meta_path(file_path))
+        os.replace(transaction_column_store.rows_path(tmp_path), transaction_column_store.rows_path(file_path))
+        os.replace(tmp_path, file_path)
+
+    def load_rows(self):
+        """ Номера и id транзакций (нужны только для материализации) """
+        path = self.rows_path(self.file_path)
+        if not os.path.exists(path):
+            return [None] * self.count, [f"TX{i}" for i in range(self.count)]
+        with open(path, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+        return rows.get("id", []), rows.get("number", [])
+
+    def row_keys(self):
+        """ id и номера транзакций (load_rows), прочитанные один раз за время открытия хранилища """
+        if self._row_keys is None:
+            self._row_keys = self.load_rows()
+        return self._row_keys
+
+    def materialize(self, repo) -> list:
+        """
+        Строит transaction_model для каждой строки.
+        Используется только там, где действительно нужны все модели сразу.
+        """
+        return list(transaction_rows(self, repo))
+
+
+class transaction_rows(Sequence):
+    """
+    Транзакции открытого колоночного хранилища и дописанные после его открытия
+    (tail - список repo.transactions) как последовательность только для чтения.
+    transaction_model строится при чтении строки, поэтому в памяти - только
+    прочитанные строки (страница, отфильтрованные), хранилище остаётся открытым.
+    """
+
+    def __init__(self, store: transaction_column_store, repo, tail: Sequence = ()):
+        self.store = store
+        self.tail = tail
+        self.items = [repo.get_nomenclature_by_id(i) for i in store.item_ids]
+        self.warehouses = [repo.get_warehouse_by_id(w) for w in store.warehouse_ids]
+        self.units = [repo.get_unit_by_id(u) for u in store.unit_ids]
+        self.ids, self.numbers = store.row_keys()
+
+    def __len__(self) -> int:
+        return self.store.count + len(self.tail)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        if index >= self.store.count:
+            return self.tail[index - self.store.count]
+        return self.row(index)
+
+    def __iter__(self):
+        for i in range(self.store.count):
+            yield self.row(i)
+        yield from self.tail
+
+    def row(self, i: int):
+        """ Модель строки i хранилища """
+        from src.models.transaction_model import transaction_model
+
+        store = self.store
+        t = transaction_model(
+            number=self.numbers[i],
+            nomenclature=self.items[store.items[i]],
+            warehouse=self.warehouses[store.warehouses[i]],
+            quantity=store.quantities[i],
+            unit=self.units[store.units[i]],
+            date_=date.fromordinal(store.dates[i])
+        )
+        t.id = self.ids[i]
+        return t
@@ -0,0 +1,135 @@
+"""
+Помесячные контрольные точки остатков (checkpoint'ы закрытия месяца)
+"""
+import calendar
+import heapq
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from src.models.turnover_snapshot_model import turnover_snapshot_model
+
+
+CheckpointKey = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+class turnover_checkpoints:
+    """
+    Накопленные остатки (в базовых единицах) по ключу
+    (id склада, id номенклатуры, id единицы) на конец каждого месяца,
+    в котором были движения.
+    Порядок ключей в каждом checkpoint'е - порядок первого появления
+    (по дате), это используется для подписи строк ОСВ.
+    """
+
+    def __init__(self):
+        self.dates: List[date] = []
+        self.balances: List[Dict[CheckpointKey, float]] = []
+        # False - у части транзакций нет id склада, номенклатуры или единицы: ключи
+        # неоднозначны (разные склады сливаются в один), checkpoint'ы не применяются
+        self.usable = True
+
+    @staticmethod
+    def month_end(d: date) -> date:
+        return date(d.year, d.month, calendar.monthrange(d.year, d.month)[1])
+
+    @staticmethod
+    def _rows(index, store, repo):
+        """ Поток (ordinal, ключ, количество в базовых единицах) из колонок и индекса """
+        if store is not None:
+            factors = []
+            for unit_id in store.unit_ids:
+                unit = repo.get_unit_by_id(unit_id)
+                factors.append(unit.factor if unit is not None else 1)
+
+            def store_rows():
+                for i in range(store.count):
+                    u = store.units[i]
+                    yield (store.dates[i],
+                           (store.warehouse_ids[store.warehouses[i]], store.item_ids[store.items[i]], store.unit_ids[u]),
+                           store.quantities[i] * factors[u])
+            yield from heapq.merge(store_rows(), turnover_checkpoints._index_rows(index), key=lambda r: r[0])
+        else:
+            yield from turnover_checkpoints._index_rows(index)
+
+    @staticmethod
+    def key_of(t) -> CheckpointKey:
+        """ Ключ проводки; у модели без id (атрибут не задан) компонент - None """
+        return (getattr(t.warehouse, "id", None), getattr(t.nomenclature, "id", None), getattr(t.unit, "id", None))
+
+    @staticmethod
+    def _index_rows(index):
+        key_of = turnover_checkpoints.key_of
+        for t in index.items:
+            yield t.date.toordinal(), key_of(t), t.unit.to_base(t.quantity)
+
+    @classmethod
+    def build(cls, repo) -> "turnover_checkpoints":
+        """ Один проход по всей истории (индекс дат + колоночное хранилище) """
+        result = cls()
+        running: Dict[CheckpointKey, float] = {}
+        current_end: Optional[date] = None
+
+        for ordinal, key, qty in cls._rows(repo.transactions_by_date(), repo.transaction_store, repo):
+            if None in key:
+                result.usable = False
+
+            if current_end is None or ordinal > current_end.toordinal():
+                if current_end is not None:
+                    result.dates.append(current_end)
+                    result.balances.append(dict(running))
+                current_end = cls.month_end(date.fromordinal(ordinal))
+
+            running[key] = running.get(key, 0.0) + qty
+
+        if current_end is not None:
+            result.dates.append(current_end)
+            result.balances.append(running)
+
+        return result
+
+    def apply(self, d: date, key: CheckpointKey, qty: float) -> bool:
+        """
+        Дельта от новой проводки: добавляется в checkpoint'ы с датой >= d.
+        Проводка позже последнего checkpoint'а открывает новый месяц.
+        Возвращает False, если дельту применить нельзя без нарушения порядка
+        ключей (новый ключ внутри уже закрытой истории) - тогда нужна перестройка.
+        """
+        if None in key:
+            self.usable = False
+
+        if not self.dates or d > self.dates[-1]:
+            self.dates.append(self.month_end(d))
+            self.balances.append(dict(self.balances[-1]) if self.balances else {})
+        elif key not in self.balances[bisect_left(self.dates, d)]:
+            return False
+
+        for i in range(bisect_left(self.dates, d), len(self.dates)):
+            balances = self.balances[i]
+            balances[key] = balances.get(key, 0.0) + qty
+        return True
+
+    def at_or_before(self, d: date) -> Tuple[Optional[date], Dict[CheckpointKey, float]]:
+        """ Ближайший checkpoint с датой <= d; (None, {}) если такого нет """
+        position = bisect_right(self.dates, d) - 1
+        if position < 0:
+            return None, {}
+        return self.dates[position], self.balances[position]
+
+    def to_snapshots(self) -> List[turnover_snapshot_model]:
+        """ Плоское представление для сохранения: по строке на ключ и месяц """
+        return [
+            turnover_snapshot_model(warehouse_id=k[0], item_id=k[1], unit_id=k[2], closing=v, snapshot_date=d)
+            for d, balances in zip(self.dates, self.balances)
+            for k, v in balances.items()
+        ]
+
+    @classmethod
+    def from_snapshots(cls, snapshots: List[turnover_snapshot_model]) -> "turnover_checkpoints":
+        result = cls()
+        for s in snapshots:
+            if not result.dates or result.dates[-1] != s.snapshot_date:
+                result.dates.append(s.snapshot_date)
+                result.balances.append({})
+            result.balances[-1][(s.warehouse_id, s.item_id, s.unit_id)] = s.closing
+        return result
@@ -1,12 +1,15 @@
-from datetime import datetime
+from datetime import date, datetime
 from collections import OrderedDict
 from src.core.convertors import basic_convertor, datetime_convertor, reference_convertor
+from src.logics.model_serializer import model_serializer
 
 
 class convert_factory:
     """
     Универсальная фабрика для конвертации объектов разных типов в словари.
     Реализует рекурсивную обработку и сортировку ключей для читаемого JSON.
+    convert использует подготовленные по типам модели поля (model_serializer),
+    convert_reflective - прежний разбор каждого объекта через конверторы; результат одинаков.
     """
     def __init__(self):
         self._registry = {
@@ -15,26 +18,26 @@ class convert_factory:
             "reference": reference_convertor()
         }
 
-        self._preferred_order = [
-            "code", "unique_code", "name", "group", "author",
-            "unit", "portions", "ingredients", "steps"
-        ]
+        self._preferred_order = list(model_serializer.PREFERRED_ORDER)
 
     def convert(self, obj: any):
+        return model_serializer.convert(obj)
+
+    def convert_reflective(self, obj: any):
         if obj is None:
             return None
 
         if isinstance(obj, (int, float, str, bool)):
             return self._registry["basic"].convert(obj)
 
-        if isinstance(obj, datetime):
+        if isinstance(obj, (datetime, date)):
             return self._registry["datetime"].convert(obj)
 
         if isinstance(obj, list):
-            return [self.convert(i) for i in obj]
+            return [self.convert_reflective(i) for i in obj]
 
         if isinstance(obj, dict):
-            data = {k: self.convert(v) for k, v in obj.items()}
+            data = {k: self.convert_reflective(v) for k, v in obj.items()}
             return self._sort_keys(data)
 
         if hasattr(obj, "code") or hasattr(obj, "id") or hasattr(obj, "__class__"):
@@ -42,7 +45,7 @@ class convert_factory:
             return self._sort_keys(data)
 
         if hasattr(obj, "__dict__"):
-            data = {k: self.convert(v) for k, v in vars(obj).items()}
+            data = {k: self.convert_reflective(v) for k, v in vars(obj).items()}
             return self._sort_keys(data)
 
         return str(obj)
@@ -63,5 +66,20 @@ class convert_factory:
 
         return ordered
 
-    def convert_collection(self, items: list):
-        return [self.convert(i) for i in items]
+    def convert_record(self, obj: any):
+        """
+        Запись коллекции без моделей: to_dict() модели (остатки, /api/data), вложенные
+        модели которого конвертируются convert, иначе convert (строки ОСВ)
+        """
+        if hasattr(obj, "to_dict"):
+            return {key: self.convert(value) if hasattr(value, "unique_code") else value
+                    for key, value in obj.to_dict().items()}
+        return self.convert(obj)
+
+    def iter_collection(self, items):
+        """ Потоковая конвертация: элементы (в том числе из генератора) по одному """
+        for i in items:
+            yield self.convert(i)
+
+    def convert_collection(self, items):
+        return list(self.iter_collection(items))
@@ -1,4 +1,7 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
 from src.core.abstract_response import abstract_response
+from src.logics.response_columnar import response_columnar
 from src.logics.response_csv import response_csv
 from src.logics.response_json import response_json
 from src.logics.response_md import response_md
@@ -7,30 +10,120 @@ from src.core.validator import operation_exception
 
 """ Фабрика для создания ответов в различных форматах """
 class factory_entities:
+    _registry = {
+        "csv": response_csv,
+        "json": response_json,
+        "md": response_md,
+        "xml": response_xml,
+    }
+
+    # MIME-типы форматов (Content-Type ответа) и обратное соответствие для заголовка Accept
+    MIME_TYPES = {
+        "csv": "text/csv",
+        "json": "application/json",
+        "md": "text/markdown",
+        "xml": "application/xml",
+    }
+    _ACCEPT = {
+        "text/csv": "csv",
+        "application/json": "json",
+        "text/markdown": "md",
+        "application/xml": "xml",
+        "text/xml": "xml",
+        "*/*": "json",
+        "application/*": "json",
+    }
+    # Другие названия форматов в ?format=
+    ALIASES = {"markdown": "md"}
+    DEFAULT_FORMAT = "json"
+    # Форматы только для рецептов: response_md - шаблон карточки рецепта, а не таблица
+    RECEIPT_FORMATS = ("md",)
+
+    # Колоночный двоичный формат (Arrow IPC или .npz) - только при установленном NumPy
+    if response_columnar.available():
+        _registry["columnar"] = response_columnar
+        MIME_TYPES["columnar"] = response_columnar.MIME_TYPE
+        _ACCEPT[response_columnar.MIME_TYPE] = "columnar"
+        ALIASES[response_columnar.BACKEND] = "columnar"
+
+    # Формирователи не хранят состояния, кроме pretty: один экземпляр на (формат, pretty)
+    _formatters: Dict[Tuple[str, bool], abstract_response] = {}
+
     """
     Инициализация фабрики с настройками приложения
     :param settings: экземпляр settings_manager (для определения формата по умолчанию)
     """
-    def __init__(self, settings):
+    def __init__(self, settings=None):
         self.settings = settings
-        self._registry = {
-            "csv": response_csv,
-            "json": response_json,
-            "md": response_md,
-            "xml": response_xml,
-        }
-
-    def create(self, fmt: str) -> abstract_response:
-        fmt = fmt.lower()
-        if fmt not in self._registry:
-            raise operation_exception(f"No formatter registered for format: {fmt}")
-        return self._registry[fmt]()
+
+    def create(self, fmt: str, pretty: bool = False) -> abstract_response:
+        return self.formatter(fmt, pretty)
+
+    @classmethod
+    def formatter(cls, fmt: str, pretty: bool = False) -> abstract_response:
+        """ Закэшированный формирователь ответа для формата """
+        fmt = cls.ALIASES.get(fmt.lower(), fmt.lower())
+        key = (fmt, bool(pretty))
+        formatter = cls._formatters.get(key)
+        if formatter is None:
+            if fmt not in cls._registry:
+                raise operation_exception(f"No formatter registered for format: {fmt}")
+            formatter = cls._registry[fmt](bool(pretty))
+            cls._formatters[key] = formatter
+        return formatter
+
+    """
+    Формат ответа по запросу: ?format= (если задан), иначе заголовок Accept,
+    иначе JSON. Запрос браузера (в Accept есть text/html) получает JSON, как и раньше.
+    exclude - форматы, недоступные для коллекции (например, RECEIPT_FORMATS вне рецептов):
+    в Accept они пропускаются. Неизвестный или исключённый ?format= - operation_exception
+    """
+    @classmethod
+    def negotiate(cls, fmt: Optional[str] = None, accept: Optional[str] = None,
+                  exclude: Iterable[str] = ()) -> str:
+        if fmt:
+            key = cls.ALIASES.get(fmt.lower(), fmt.lower())
+            if key not in cls._registry:
+                raise operation_exception(f"No formatter registered for format: {fmt}")
+            if key in exclude:
+                raise operation_exception(f"Format {fmt} is not available for this collection")
+            return key
+
+        mimes = cls.parse_accept(accept or "")
+        if "text/html" in mimes:
+            return cls.DEFAULT_FORMAT
+        for mime in mimes:
+            if mime in cls._ACCEPT and cls._ACCEPT[mime] not in exclude:
+                return cls._ACCEPT[mime]
+        return cls.DEFAULT_FORMAT
+
+    @staticmethod
+    def parse_accept(header: str) -> List[str]:
+        """ MIME-типы заголовка Accept по убыванию q (при равном q - в порядке заголовка), без q=0 """
+        ranked = []
+        for position, part in enumerate(header.split(",")):
+            mime, *params = [p.strip() for p in part.split(";")]
+            quality = 1.0
+            for param in params:
+                if param.startswith("q="):
+                    try:
+                        quality = float(param[2:])
+                    except ValueError:
+                        quality = 0.0
+            if mime and quality > 0:
+                ranked.append((-quality, position, mime.lower()))
+        return [mime for _, _, mime in sorted(ranked)]
 
     """
     Формирует ответ в формате, указанном в настройках
     Если формат отсутствует в реестре - генерируется исключение
+    pretty - вывод с отступами (для JSON; по умолчанию компактный)
     """
-    def create_default(self, data):
+    def create_default(self, data, pretty: bool = False):
+        return self.default_formatter(pretty).create_response(data)
+
+    """ Формирователь ответа для формата из настроек (для потоковой выдачи - iter_response) """
+    def default_formatter(self, pretty: bool = False) -> abstract_response:
         fmt = getattr(self.settings, "response_format", "json")
 
         if hasattr(fmt, "value"):
@@ -38,8 +131,4 @@ class factory_entities:
         else:
             fmt_key = str(fmt).lower()
 
-        if fmt_key not in self._registry:
-            raise operation_exception(f"No formatter registered for format: {fmt_key}")
-
-        formatter = self._registry[fmt_key]()
-        return formatter.create_response(data)
+        return self.formatter(fmt_key, pretty)
@@ -0,0 +1,197 @@
+"""
+Сериализаторы моделей для convert_factory с разбором схемы один раз на тип
+"""
+from datetime import date, datetime
+from itertools import chain
+from operator import attrgetter
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Sequence, Tuple, get_args, get_type_hints
+
+from src.core.abstract_reference import abstract_reference
+
+
+class _callable_value(Exception):
+    """ Значение атрибута - вызываемый объект (такие атрибуты в вывод не попадают) """
+
+
+class model_serializer:
+    """
+    Преобразование объектов в словари с тем же результатом, что и рефлексивный
+    путь convert_factory + reference_convertor, но без разбора на каждом объекте:
+    - способ конвертации значения выбирается один раз на тип (_kinds);
+    - для модели при первой встрече её набора атрибутов (тип + ключи vars(obj))
+      один раз строится кортеж пар (очищенное от name-mangling имя, attrgetter атрибута)
+      в итоговом порядке ключей (_compiled); словарь заполняется простым циклом по нему.
+    Набор атрибутов экземпляров одного класса может различаться (необязательные
+    поля задаются в __init__ не всегда), поэтому ключ кэша - тип и кортеж ключей.
+    Если у модели встретился атрибут-функция, объект обрабатывается медленным
+    путём, который пропускает такие атрибуты, как reference_convertor.
+    """
+
+    # Ключи, которые выводятся первыми (в этом порядке), остальные - в порядке атрибутов
+    PREFERRED_ORDER = ("code", "unique_code", "name", "group", "author", "unit", "portions", "ingredients", "steps")
+    _PREFERRED = frozenset(PREFERRED_ORDER)
+    _PLAIN = frozenset((str, int, float, bool, type(None)))
+
+    _kinds: Dict[type, Callable] = {}
+    _compiled: Dict[Tuple[type, Tuple[str, ...]], Tuple[Tuple[str, Callable], ...]] = {}
+    _references: Dict[type, FrozenSet[str]] = {}
+
+    @classmethod
+    def convert(cls, value):
+        """ Конвертация значения любого поддерживаемого типа (как convert_factory.convert) """
+        if value is None:
+            return None
+        kind = cls._kinds.get(type(value))
+        if kind is None:
+            kind = cls._kind(type(value))
+        try:
+            return kind(value)
+        except _callable_value:
+            return cls._serialize_slow(value)
+
+    @staticmethod
+    def clean_name(attr: str) -> str:
+        """ Имя атрибута без name-mangling: _nomenclature_model__unit -> unit """
+        return attr.split("__")[-1] if "__" in attr else attr
+
+    @classmethod
+    def is_model(cls, value) -> bool:
+        """ Значение конвертируется как модель (словарь атрибутов), а не как простое значение """
+        kind = cls._kinds.get(type(value))
+        if kind is None:
+            kind = cls._kind(type(value))
+        return kind == cls.serialize
+
+    @classmethod
+    def key_order(cls, names) -> list:
+        """ Порядок ключей как в convert_factory._sort_keys """
+        names = list(names)
+        present = set(names)
+        return [n for n in cls.PREFERRED_ORDER if n in present] + [n for n in names if n not in cls._PREFERRED]
+
+    @classmethod
+    def reference_fields(cls, model_type: type) -> FrozenSet[str]:
+        """
+        Поля-ссылки модели по её схеме: аннотации класса и параметров __init__
+        (имена без name-mangling), тип которых - справочник (abstract_reference),
+        в том числе Optional. Не зависят от значений: ссылка может быть и None
+        """
+        fields = cls._references.get(model_type)
+        if fields is None:
+            hints = {}
+            for source in (model_type, model_type.__init__):
+                try:
+                    hints.update(get_type_hints(source))
+                except (NameError, TypeError):
+                    continue
+            fields = frozenset(cls.clean_name(name) for name, hint in hints.items()
+                               if any(isinstance(t, type) and issubclass(t, abstract_reference)
+                                      for t in (hint, *get_args(hint))))
+            cls._references[model_type] = fields
+        return fields
+
+    @classmethod
+    def collection_references(cls, items: Iterable) -> Tuple[Iterable, FrozenSet[str]]:
+        """
+        Поля-ссылки коллекции по схеме модели её первого элемента (reference_fields):
+        табличные форматы выводят их колонками <ключ>_id, <ключ>_name и при пустой ссылке.
+        Возвращает элементы (генератор - с возвращённым первым элементом) и поля
+        """
+        if isinstance(items, Sequence):
+            first: Any = items[0] if len(items) else None
+        else:
+            items = iter(items)
+            first = next(items, None)
+            if first is not None:
+                items = chain((first,), items)
+        return items, cls.reference_fields(type(first)) if first is not None else frozenset()
+
+    # --- Выбор способа конвертации по типу значения ---
+
+    @classmethod
+    def _kind(cls, value_type: type) -> Callable:
+        if issubclass(value_type, (int, float, str, bool)):
+            kind = cls._identity
+        elif issubclass(value_type, (datetime, date)):
+            kind = value_type.isoformat
+        elif issubclass(value_type, list):
+            kind = cls._convert_list
+        elif issubclass(value_type, dict):
+            kind = cls._convert_dict
+        elif any("__call__" in vars(base) for base in value_type.__mro__):
+            # Экземпляры вызываемы (функции, методы, классы) - как callable(value)
+            kind = cls._raise_callable
+        else:
+            kind = cls.serialize
+        cls._kinds[value_type] = kind
+        return kind
+
+    @staticmethod
+    def _identity(value):
+        return value
+
+    @staticmethod
+    def _raise_callable(value):
+        raise _callable_value()
+
+    @classmethod
+    def _convert_list(cls, value):
+        convert = cls.convert
+        return [convert(i) for i in value]
+
+    @classmethod
+    def _convert_dict(cls, value):
+        convert = cls.convert
+        data = {k: convert(v) for k, v in value.items()}
+        if cls._PREFERRED.isdisjoint(data):
+            return data
+        return {k: data[k] for k in cls.key_order(data)}
+
+    # --- Модели ---
+
+    @classmethod
+    def serialize(cls, obj) -> dict:
+        """ Словарь модели по полям, подготовленным для её набора атрибутов """
+        shape = (type(obj), tuple(vars(obj)))
+        fields = cls._compiled.get(shape)
+        if fields is None:
+            fields = cls._fields(shape[1])
+            cls._compiled[shape] = fields
+
+        # Простые значения (строки, числа, None) подставляются без вызова конвертации
+        plain, convert = cls._PLAIN, cls.convert_attribute
+        data = {}
+        for name, get in fields:
+            value = get(obj)
+            data[name] = value if value.__class__ in plain else convert(value)
+        return data
+
+    @classmethod
+    def _fields(cls, keys: Tuple[str, ...]) -> Tuple[Tuple[str, Callable], ...]:
+        """ Пары (очищенное имя, attrgetter атрибута) в порядке key_order """
+        # Как в reference_convertor: при совпадении очищенных имён побеждает
+        # последний атрибут, а позиция ключа - по первому
+        source: Dict[str, str] = {}
+        for attr in keys:
+            source[cls.clean_name(attr)] = attr
+        return tuple((name, attrgetter(source[name])) for name in cls.key_order(source))
+
+    @classmethod
+    def convert_attribute(cls, value):
+        """ Значение атрибута модели; для функций - сигнал перейти на медленный путь """
+        if value is None:
+            return None
+        kind = cls._kinds.get(type(value))
+        if kind is None:
+            kind = cls._kind(type(value))
+        return kind(value)
+
+    @classmethod
+    def _serialize_slow(cls, obj) -> dict:
+        """ Рефлексивный путь (как reference_convertor) - для моделей с атрибутами-функциями """
+        data = {}
+        for attr, value in vars(obj).items():
+            if callable(value):
+                continue
+            data[cls.clean_name(attr)] = cls.convert(value)
+        return {k: data[k] for k in cls.key_order(data)}
@@ -0,0 +1,279 @@
+"""
+Агрегатор оборотов для ОСВ.
+Раскладывает транзакции по корзинам за один проход и считает
+начальный остаток, приход и расход одновременно.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Callable, Dict, Hashable, Iterable, Optional, Set
+
+
+class osv_bucket:
+    """
+    Корзина агрегации: склад и единица первой попавшей транзакции
+    и накопленные суммы (в базовых единицах).
+    """
+    __slots__ = ("warehouse", "unit", "opening", "incoming", "outgoing")
+
+    def __init__(self, warehouse, unit):
+        self.warehouse = warehouse
+        self.unit = unit
+        # Начинаем с int 0 — так же, как встроенный sum(): целые суммы остаются целыми.
+        # Дробные суммы складываются в другом порядке, чем при переборе по номенклатуре,
+        # поэтому эквивалентны ему с точностью до округления
+        self.opening = 0
+        self.incoming = 0
+        self.outgoing = 0
+
+
+class OSVAggregator:
+    """
+    Однопроходный агрегатор транзакций.
+    По умолчанию группирует по (склад, номенклатура, единица).
+    Источник - список transaction_model, индекс по дате (date_index)
+    и/или колоночное хранилище (transaction_column_store), которое
+    читается без создания моделей.
+    Транзакции позже end_date не учитываются и корзин не создают.
+    items - множество unique_code номенклатуры (фильтры ОСВ, применённые до агрегации):
+    движения остальных позиций пропускаются и не суммируются.
+    """
+
+    def __init__(self, start_date: date, end_date: date, warehouse: Optional[str] = None,
+                 items: Optional[Set[Hashable]] = None):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.warehouse = warehouse
+        self.items = items
+
+    @staticmethod
+    def warehouse_match(tx_wh, wanted) -> bool:
+        """ Проверка склада по наименованию (подстрока) или коду """
+        if not wanted:
+            return True
+        if tx_wh is None:
+            return False
+        wanted = wanted.lower()
+        return wanted in tx_wh.name.lower() or wanted == getattr(tx_wh, "code", "").lower()
+
+    @staticmethod
+    def _ref_key(obj):
+        return obj.unique_code if obj is not None else None
+
+    def item_allowed(self, nomenclature) -> bool:
+        """ Номенклатура проходит фильтры, применённые до агрегации """
+        return self.items is None or self._ref_key(nomenclature) in self.items
+
+    @staticmethod
+    def full_key(warehouse, nomenclature, unit) -> Hashable:
+        """ Ключ (склад, номенклатура, единица) """
+        return (
+            OSVAggregator._ref_key(warehouse),
+            OSVAggregator._ref_key(nomenclature),
+            OSVAggregator._ref_key(unit)
+        )
+
+    @staticmethod
+    def item_key(warehouse, nomenclature, unit) -> Hashable:
+        """ Ключ только по номенклатуре (разрез строк ОСВ) """
+        return OSVAggregator._ref_key(nomenclature)
+
+    def aggregate(self, transactions: Iterable, key: Callable = None,
+                  buckets: Optional[Dict[Hashable, osv_bucket]] = None) -> Dict[Hashable, osv_bucket]:
+        """
+        Один проход по транзакциям в произвольном порядке.
+        Порядок сложения внутри корзины совпадает с порядком транзакций.
+        """
+        key = key or OSVAggregator.full_key
+        start_date = self.start_date
+        end_date = self.end_date
+        warehouse = self.warehouse
+        items = self.items
+        match = OSVAggregator.warehouse_match
+        ref_key = OSVAggregator._ref_key
+
+        if buckets is None:
+            buckets = {}
+
+        for t in transactions:
+            t_date = t.date
+            if t_date > end_date:
+                continue
+            if warehouse and not match(t.warehouse, warehouse):
+                continue
+            if items is not None and ref_key(t.nomenclature) not in items:
+                continue
+
+            k = key(t.warehouse, t.nomenclature, t.unit)
+            bucket = buckets.get(k)
+            if bucket is None:
+                bucket = osv_bucket(t.warehouse, t.unit)
+                buckets[k] = bucket
+
+            if t_date < start_date:
+                bucket.opening += t.unit.to_base(t.quantity)
+            elif t.quantity > 0:
+                bucket.incoming += t.unit.to_base(t.quantity)
+            elif t.quantity < 0:
+                bucket.outgoing += t.unit.to_base(t.quantity)
+
+        return buckets
+
+    def aggregate_index(self, index, key: Callable = None,
+                        buckets: Optional[Dict[Hashable, osv_bucket]] = None,
+                        after: Optional[date] = None) -> Dict[Hashable, osv_bucket]:
+        """
+        Агрегация по индексу дат: границы периода находятся bisect'ом,
+        дальше перебираются только префикс (< start_date) и срез периода,
+        без сравнения дат на каждой транзакции.
+        after - дата checkpoint'а: транзакции до неё включительно уже учтены (seed_checkpoint).
+        """
+        key = key or OSVAggregator.full_key
+        warehouse = self.warehouse
+        allowed_items = self.items
+        match = OSVAggregator.warehouse_match
+        ref_key = OSVAggregator._ref_key
+
+        if buckets is None:
+            buckets = {}
+
+        lo, hi = index.bounds(self.start_date, self.end_date)
+        first = bisect_right(index.dates, after) if after is not None else 0
+        items = index.items
+
+        for i in range(first, hi):
+            t = items[i]
+            if warehouse and not match(t.warehouse, warehouse):
+                continue
+            if allowed_items is not None and ref_key(t.nomenclature) not in allowed_items:
+                continue
+
+            k = key(t.warehouse, t.nomenclature, t.unit)
+            bucket = buckets.get(k)
+            if bucket is None:
+                bucket = osv_bucket(t.warehouse, t.unit)
+                buckets[k] = bucket
+
+            if i < lo:
+                bucket.opening += t.unit.to_base(t.quantity)
+            elif t.quantity > 0:
+                bucket.incoming += t.unit.to_base(t.quantity)
+            elif t.quantity < 0:
+                bucket.outgoing += t.unit.to_base(t.quantity)
+
+        return buckets
+
+    def aggregate_store(self, store, repo, key: Callable = None,
+                        buckets: Optional[Dict[Hashable, osv_bucket]] = None,
+                        after: Optional[date] = None) -> Dict[Hashable, osv_bucket]:
+        """
+        То же, что aggregate_index, но по колоночному хранилищу.
+        Словари id разрешаются в модели один раз, строки читаются
+        напрямую из отображённых в память колонок, границы периода
+        ищутся bisect'ом по колонке дат.
+        """
+        key = key or OSVAggregator.full_key
+        if buckets is None:
+            buckets = {}
+
+        items = [repo.get_nomenclature_by_id(i) for i in store.item_ids]
+        warehouses = [repo.get_warehouse_by_id(w) for w in store.warehouse_ids]
+        units = [repo.get_unit_by_id(u) for u in store.unit_ids]
+        factors = [u.factor if u is not None else 1 for u in units]
+        allowed = [not self.warehouse or self.warehouse_match(w, self.warehouse) for w in warehouses]
+        item_allowed = [self.item_allowed(n) for n in items] if self.items is not None else None
+
+        item_col, wh_col, unit_col, qty_col = store.items, store.warehouses, store.units, store.quantities
+        lo = bisect_left(store.dates, self.start_date.toordinal())
+        hi = bisect_right(store.dates, self.end_date.toordinal())
+        first = bisect_right(store.dates, after.toordinal()) if after is not None else 0
+
+        for i in range(first, hi):
+            w = wh_col[i]
+            if not allowed[w]:
+                continue
+
+            n, u = item_col[i], unit_col[i]
+            if item_allowed is not None and not item_allowed[n]:
+                continue
+            k = key(warehouses[w], items[n], units[u])
+            bucket = buckets.get(k)
+            if bucket is None:
+                bucket = osv_bucket(warehouses[w], units[u])
+                buckets[k] = bucket
+
+            q = qty_col[i]
+            if i < lo:
+                bucket.opening += q * factors[u]
+            elif q > 0:
+                bucket.incoming += q * factors[u]
+            elif q < 0:
+                bucket.outgoing += q * factors[u]
+
+        return buckets
+
+    def seed_checkpoint(self, balances: Dict[Hashable, float], repo, key: Callable = None,
+                        buckets: Optional[Dict[Hashable, osv_bucket]] = None) -> Dict[Hashable, osv_bucket]:
+        """
+        Заполняет начальный остаток корзин из checkpoint'а
+        (ключ checkpoint'а - id склада, номенклатуры и единицы).
+        """
+        key = key or OSVAggregator.full_key
+        if buckets is None:
+            buckets = {}
+
+        for (wh_id, item_id, unit_id), closing in balances.items():
+            wh = repo.get_warehouse_by_id(wh_id)
+            if self.warehouse and not self.warehouse_match(wh, self.warehouse):
+                continue
+            item = repo.get_nomenclature_by_id(item_id)
+            if not self.item_allowed(item):
+                continue
+            unit = repo.get_unit_by_id(unit_id)
+
+            k = key(wh, item, unit)
+            bucket = buckets.get(k)
+            if bucket is None:
+                bucket = osv_bucket(wh, unit)
+                buckets[k] = bucket
+            bucket.opening += closing
+
+        return buckets
+
+    @staticmethod
+    def balance_deltas(transactions: Iterable, after_date: date, until_date: date,
+                       store=None, repo=None, deltas: Optional[Dict[Hashable, float]] = None) -> Dict[Hashable, float]:
+        """
+        Суммы движений в базовых единицах за (after_date, until_date]
+        с ключом (id склада, id номенклатуры, id единицы).
+        transactions - список или date_index (тогда берётся только срез периода).
+        Если передан deltas (например, остатки snapshot'а), суммы добавляются в него.
+        """
+        if deltas is None:
+            deltas = {}
+
+        if store is not None:
+            factors = []
+            for unit_id in store.unit_ids:
+                unit = repo.get_unit_by_id(unit_id) if repo is not None else None
+                factors.append(unit.factor if unit is not None else 1)
+
+            item_col, wh_col, unit_col, qty_col = store.items, store.warehouses, store.units, store.quantities
+            lo = bisect_right(store.dates, after_date.toordinal())
+            hi = bisect_right(store.dates, until_date.toordinal())
+            for i in range(lo, hi):
+                u = unit_col[i]
+                k = (store.warehouse_ids[wh_col[i]], store.item_ids[item_col[i]], store.unit_ids[u])
+                deltas[k] = deltas.get(k, 0.0) + qty_col[i] * factors[u]
+
+        if hasattr(transactions, "after_in_order"):
+            # Новые ключи добавляются в deltas в порядке добавления проводок, как при переборе списка
+            transactions = transactions.after_in_order(after_date, until_date)
+        elif hasattr(transactions, "after"):
+            transactions = transactions.after(after_date, until_date)
+
+        for t in transactions:
+            if t.date and after_date < t.date <= until_date:
+                k = (t.warehouse.id if t.warehouse else None, t.nomenclature.id, t.unit.id if t.unit else None)
+                deltas[k] = deltas.get(k, 0.0) + t.unit.to_base(t.quantity)
+
+        return deltas
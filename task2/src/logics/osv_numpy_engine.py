@@ -0,0 +1,210 @@
+"""
+Векторизованный (NumPy) движок расчёта ОСВ и остатков.
+NumPy - необязательная зависимость: без неё движок недоступен
+и расчёт идёт эталонным путём на чистом Python (OSVAggregator).
+"""
+import weakref
+from datetime import date
+from typing import Dict, Hashable, List, Optional, Set
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - зависит от окружения
+    np = None
+
+from src.logics.osv_aggregator import OSVAggregator, osv_bucket
+
+
+ENGINE_PYTHON = "python"
+ENGINE_NUMPY = "numpy"
+ENGINES = (ENGINE_PYTHON, ENGINE_NUMPY)
+
+
+class _code_space:
+    """ Справочник кодов: модель (или id без модели) -> целочисленный код """
+
+    def __init__(self):
+        self.codes: Dict[Hashable, int] = {}
+        self.refs: List = []
+        self.ids: List = []
+
+    def code(self, ref, ref_id=None) -> int:
+        key = ref.unique_code if ref is not None else ("id", ref_id)
+        code = self.codes.get(key)
+        if code is None:
+            code = len(self.refs)
+            self.codes[key] = code
+            self.refs.append(ref)
+            self.ids.append(ref.id if ref is not None else ref_id)
+        return code
+
+
+"""
+Транзакции репозитория, один раз разложенные в массивы:
+ordinal даты, коды номенклатуры/склада/единицы, количество и количество
+в базовых единицах. Строки упорядочены по дате (при равных датах сначала
+колоночное хранилище, затем список - как в turnover_checkpoints).
+Обороты считаются np.bincount по кодам вместо цикла с to_base() на строку.
+"""
+class osv_numpy_engine:
+    _cache = weakref.WeakKeyDictionary()
+
+    def __init__(self, storage):
+        self.items = _code_space()
+        self.warehouses = _code_space()
+        self.units = _code_space()
+
+        parts = []
+        store = getattr(storage, "transaction_store", None)
+        if store is not None and store.count:
+            parts.append(self._store_arrays(store, storage))
+
+        index = storage.transactions_by_date()
+        if len(index):
+            parts.append(self._index_arrays(index))
+
+        columns = ("dates", "items", "warehouses", "units", "quantities")
+        if parts:
+            merged = {name: np.concatenate([p[name] for p in parts]) for name in columns}
+            order = np.argsort(merged["dates"], kind="stable")
+            merged = {name: values[order] for name, values in merged.items()}
+        else:
+            merged = {name: np.zeros(0, dtype=np.float64 if name == "quantities" else np.int64) for name in columns}
+
+        self.dates = merged["dates"]
+        self.item_codes = merged["items"]
+        self.warehouse_codes = merged["warehouses"]
+        self.unit_codes = merged["units"]
+        self.quantities = merged["quantities"]
+
+        factors = np.array([u.factor if u is not None else 1 for u in self.units.refs], dtype=np.float64)
+        self.base_quantities = self.quantities * factors[self.unit_codes] if len(factors) else self.quantities.copy()
+
+    @staticmethod
+    def available() -> bool:
+        return np is not None
+
+    @staticmethod
+    def _state(storage):
+        transactions = storage.transactions
+        return getattr(transactions, "version", len(transactions)), id(getattr(storage, "transaction_store", None))
+
+    @classmethod
+    def for_storage(cls, storage) -> "osv_numpy_engine":
+        """ Массивы строятся один раз и переиспользуются, пока не изменились транзакции """
+        state = cls._state(storage)
+        cached = cls._cache.get(storage)
+        if cached is None or cached[0] != state:
+            cached = (state, cls(storage))
+            cls._cache[storage] = cached
+        return cached[1]
+
+    def _store_arrays(self, store, repo):
+        def remap(space, ids, resolve, column):
+            lookup = np.array([space.code(resolve(i), i) for i in ids], dtype=np.int64)
+            return lookup[np.frombuffer(column, dtype=np.int32)]
+
+        return {
+            "dates": np.frombuffer(store.dates, dtype=np.int32).astype(np.int64),
+            "items": remap(self.items, store.item_ids, repo.get_nomenclature_by_id, store.items),
+            "warehouses": remap(self.warehouses, store.warehouse_ids, repo.get_warehouse_by_id, store.warehouses),
+            "units": remap(self.units, store.unit_ids, repo.get_unit_by_id, store.units),
+            "quantities": np.frombuffer(store.quantities, dtype=np.float64).copy()
+        }
+
+    def _index_arrays(self, index):
+        items = index.items
+        return {
+            "dates": np.fromiter((t.toordinal() for t in index.dates), dtype=np.int64, count=len(items)),
+            "items": np.fromiter((self.items.code(t.nomenclature) for t in items), dtype=np.int64, count=len(items)),
+            "warehouses": np.fromiter((self.warehouses.code(t.warehouse) for t in items), dtype=np.int64, count=len(items)),
+            "units": np.fromiter((self.units.code(t.unit) for t in items), dtype=np.int64, count=len(items)),
+            "quantities": np.fromiter((t.quantity for t in items), dtype=np.float64, count=len(items))
+        }
+
+    def _warehouse_mask(self, warehouse: Optional[str], rows: slice):
+        if not warehouse:
+            return None
+        allowed = np.array([OSVAggregator.warehouse_match(w, warehouse) for w in self.warehouses.refs], dtype=bool)
+        return allowed[self.warehouse_codes[rows]]
+
+    def _item_mask(self, items: Optional[Set[Hashable]], rows: slice):
+        if items is None:
+            return None
+        allowed = np.array([OSVAggregator._ref_key(n) in items for n in self.items.refs], dtype=bool)
+        return allowed[self.item_codes[rows]]
+
+    def aggregate(self, start_date: date, end_date: date, warehouse: Optional[str] = None,
+                  items: Optional[Set[Hashable]] = None) -> Dict[Hashable, osv_bucket]:
+        """
+        Корзины ОСВ по номенклатуре (ключ - unique_code, как OSVAggregator.item_key).
+        Склад и единица корзины - из первой по дате транзакции.
+        items - unique_code номенклатуры, прошедшей фильтры (None - вся).
+        """
+        lo = int(np.searchsorted(self.dates, start_date.toordinal(), side="left"))
+        hi = int(np.searchsorted(self.dates, end_date.toordinal(), side="right"))
+
+        rows = slice(0, hi)
+        item_mask = self._item_mask(items, rows)
+        items = self.item_codes[rows]
+        qty = self.quantities[rows]
+        base = self.base_quantities[rows]
+        opening_rows = np.arange(hi) < lo
+
+        mask = self._warehouse_mask(warehouse, rows)
+        if item_mask is not None:
+            mask = item_mask if mask is None else mask & item_mask
+        if mask is not None:
+            items, qty, base, opening_rows = items[mask], qty[mask], base[mask], opening_rows[mask]
+            positions = np.flatnonzero(mask)
+        else:
+            positions = np.arange(hi)
+
+        size = len(self.items.refs)
+        period = ~opening_rows
+        opening = np.bincount(items[opening_rows], weights=base[opening_rows], minlength=size)
+        incoming = np.bincount(items[period & (qty > 0)], weights=base[period & (qty > 0)], minlength=size)
+        outgoing = np.bincount(items[period & (qty < 0)], weights=base[period & (qty < 0)], minlength=size)
+
+        present, first = np.unique(items, return_index=True)
+        buckets: Dict[Hashable, osv_bucket] = {}
+        for code, position in zip(present.tolist(), positions[first].tolist()):
+            ref = self.items.refs[code]
+            bucket = osv_bucket(
+                self.warehouses.refs[self.warehouse_codes[position]],
+                self.units.refs[self.unit_codes[position]]
+            )
+            bucket.opening = float(opening[code])
+            bucket.incoming = float(incoming[code])
+            bucket.outgoing = float(outgoing[code])
+            buckets[OSVAggregator._ref_key(ref)] = bucket
+        return buckets
+
+    def balance_deltas(self, after_date: date, until_date: date,
+                       deltas: Optional[Dict[Hashable, float]] = None) -> Dict[Hashable, float]:
+        """
+        То же, что OSVAggregator.balance_deltas: суммы за (after_date, until_date]
+        с ключом (id склада, id номенклатуры, id единицы).
+        """
+        if deltas is None:
+            deltas = {}
+
+        lo = int(np.searchsorted(self.dates, after_date.toordinal(), side="right"))
+        hi = int(np.searchsorted(self.dates, until_date.toordinal(), side="right"))
+        if hi <= lo:
+            return deltas
+
+        rows = slice(lo, hi)
+        n_wh, n_units = max(len(self.warehouses.refs), 1), max(len(self.units.refs), 1)
+        combined = (self.item_codes[rows] * n_wh + self.warehouse_codes[rows]) * n_units + self.unit_codes[rows]
+
+        keys, first, inverse = np.unique(combined, return_index=True, return_inverse=True)
+        sums = np.bincount(inverse.ravel(), weights=self.base_quantities[rows], minlength=len(keys))
+
+        for position in np.argsort(first, kind="stable").tolist():
+            key = int(keys[position])
+            unit_code, rest = key % n_units, key // n_units
+            wh_code, item_code = rest % n_wh, rest // n_wh
+            k = (self.warehouses.ids[wh_code], self.items.ids[item_code], self.units.ids[unit_code])
+            deltas[k] = deltas.get(k, 0.0) + float(sums[position])
+        return deltas
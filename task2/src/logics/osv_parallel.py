@@ -0,0 +1,199 @@
+"""
+Параллельный расчёт оборотов ОСВ в пуле процессов.
+Строки колоночного хранилища делятся на шарды по номенклатуре (хеш unique_code)
+или по складу, частичные обороты считаются в процессах ProcessPoolExecutor и сливаются.
+"""
+import zlib
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Dict, Hashable, List, Optional, Set
+
+from src.core.transaction_column_store import transaction_column_store
+from src.logics.osv_aggregator import OSVAggregator, osv_bucket
+
+
+SHARD_NOMENCLATURE = "nomenclature"
+SHARD_WAREHOUSE = "warehouse"
+SHARD_MODES = (SHARD_NOMENCLATURE, SHARD_WAREHOUSE)
+
+# Пулы переиспользуются между расчётами: запуск процессов дороже самого шарда
+_pools: Dict[int, ProcessPoolExecutor] = {}
+
+
+def shutdown_pools():
+    """ Останавливает созданные пулы процессов """
+    for pool in _pools.values():
+        pool.shutdown(wait=True)
+    _pools.clear()
+
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+    pool = _pools.get(workers)
+    if pool is None:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        _pools[workers] = pool
+    return pool
+
+
+def _aggregate_shard(task: dict) -> Dict[Hashable, list]:
+    """
+    Обороты одного шарда (выполняется в процессе пула).
+    Корзина - [ранг первой строки, код склада, код единицы, начальный остаток, приход, расход].
+    Процесс сам открывает колоночное хранилище (mmap) и читает строки [first, hi) своего
+    шарда - из основного процесса приходят только словари кодов и границы.
+    """
+    buckets = {k: list(v) for k, v in task["seed"].items()}
+    factors, allowed, shard = task["factors"], task["allowed"], task["shard"]
+    item_allowed = task["store_item_allowed"]
+
+    store = transaction_column_store(task["store_path"])
+    try:
+        keys, warehouses, units = task["store_items"], task["store_warehouses"], task["store_units"]
+        shards = task["store_shards"]
+        by_item = task["shard_by"] == SHARD_NOMENCLATURE
+        item_col, wh_col, unit_col, qty_col = store.items, store.warehouses, store.units, store.quantities
+        lo = task["lo"]
+
+        for i in range(task["first"], task["hi"]):
+            n, w = item_col[i], wh_col[i]
+            if (shards[n] if by_item else shards[w]) != shard:
+                continue
+            if item_allowed is not None and not item_allowed[n]:
+                continue
+            wh = warehouses[w]
+            if not allowed[wh]:
+                continue
+
+            u = units[unit_col[i]]
+            k = keys[n]
+            bucket = buckets.get(k)
+            if bucket is None:
+                bucket = [i, wh, u, 0, 0, 0]
+                buckets[k] = bucket
+
+            q = qty_col[i]
+            if i < lo:
+                bucket[3] += q * factors[u]
+            elif q > 0:
+                bucket[4] += q * factors[u]
+            elif q < 0:
+                bucket[5] += q * factors[u]
+    finally:
+        store.close()
+
+    return buckets
+
+
+class _refs:
+    """ Справочник кодов моделей (по unique_code), передаваемых в процессы числами """
+
+    def __init__(self):
+        self.codes: Dict[Hashable, int] = {}
+        self.items: List = []
+
+    def code(self, ref) -> int:
+        key = OSVAggregator._ref_key(ref)
+        code = self.codes.get(key)
+        if code is None:
+            code = len(self.items)
+            self.codes[key] = code
+            self.items.append(ref)
+        return code
+
+
+"""
+Параллельный агрегатор ОСВ по номенклатуре (разрез строк OSVPrototype) - только
+для колоночного хранилища: процессы читают его строки сами через mmap, в процессы
+передаются только словари кодов и границы периода. Транзакции из списка
+(repo.transactions) параллельно не считаются: их обход и передача в процессы
+дороже самого суммирования, поэтому OSVPrototype досчитывает их последовательно
+после слияния (в том же порядке, что и последовательный расчёт).
+При шардировании по складу частичные суммы одной номенклатуры складываются
+при слиянии, поэтому возможны отличия в последнем знаке дробной части;
+шардирование по номенклатуре даёт результат, идентичный последовательному.
+"""
+class OSVParallelAggregator:
+
+    def __init__(self, start_date: date, end_date: date, warehouse: Optional[str] = None,
+                 workers: int = 2, shard_by: str = SHARD_NOMENCLATURE, items: Optional[Set[Hashable]] = None):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.warehouse = warehouse
+        self.items = items
+        self.workers = max(1, int(workers))
+        self.shard_by = shard_by
+
+    def _item_shard(self, key) -> int:
+        # hash() строк различается между процессами, crc32 - нет
+        return zlib.crc32(str(key).encode("utf-8")) % self.workers
+
+    @staticmethod
+    def applicable(storage) -> bool:
+        """ Параллельный расчёт имеет смысл: у storage открыто непустое колоночное хранилище """
+        store = getattr(storage, "transaction_store", None)
+        return store is not None and store.count > 0
+
+    def aggregate(self, storage, buckets: Dict[Hashable, osv_bucket], after: Optional[date] = None) -> Dict[Hashable, osv_bucket]:
+        """
+        Досчитывает корзины (ключ - OSVAggregator.item_key) по колоночному хранилищу storage
+        (см. applicable); транзакции списка не учитываются.
+        buckets - уже заполненные начальные остатки (seed_checkpoint).
+        """
+        warehouses, units = _refs(), _refs()
+        by_item = self.shard_by == SHARD_NOMENCLATURE
+
+        def item_shard(key):
+            return self._item_shard(key) if by_item else None
+
+        # Начальные остатки: при шардировании по номенклатуре передаются в свой шард,
+        # по складу - остаются в основном процессе и добавляются при слиянии
+        seeds = [dict() for _ in range(self.workers)]
+        merged: Dict[Hashable, list] = {}
+        for k, b in buckets.items():
+            state = [-1, warehouses.code(b.warehouse), units.code(b.unit), b.opening, b.incoming, b.outgoing]
+            if by_item:
+                seeds[item_shard(k)][k] = state
+            else:
+                merged[k] = state
+
+        store = storage.transaction_store
+        item_keys = [OSVAggregator._ref_key(storage.get_nomenclature_by_id(i)) for i in store.item_ids]
+        store_warehouses = [warehouses.code(storage.get_warehouse_by_id(w)) for w in store.warehouse_ids]
+        base = {
+            "shard_by": self.shard_by,
+            "store_path": store.file_path,
+            "store_items": item_keys,
+            "store_item_allowed": [k in self.items for k in item_keys] if self.items is not None else None,
+            "store_warehouses": store_warehouses,
+            "store_units": [units.code(storage.get_unit_by_id(u)) for u in store.unit_ids],
+            "store_shards": [item_shard(k) for k in item_keys] if by_item
+                            else [code % self.workers for code in store_warehouses],
+            "first": bisect_right(store.dates, after.toordinal()) if after is not None else 0,
+            "lo": bisect_left(store.dates, self.start_date.toordinal()),
+            "hi": bisect_right(store.dates, self.end_date.toordinal())
+        }
+
+        match = OSVAggregator.warehouse_match
+        base["factors"] = [u.factor if u is not None else 1 for u in units.items]
+        base["allowed"] = [not self.warehouse or match(w, self.warehouse) for w in warehouses.items]
+
+        tasks = [dict(base, shard=s, seed=seeds[s]) for s in range(self.workers)]
+        for partial in _pool(self.workers).map(_aggregate_shard, tasks):
+            for k, state in partial.items():
+                current = merged.get(k)
+                if current is None:
+                    merged[k] = state
+                    continue
+                if state[0] < current[0]:
+                    current[0:3] = state[0:3]
+                current[3] += state[3]
+                current[4] += state[4]
+                current[5] += state[5]
+
+        result: Dict[Hashable, osv_bucket] = {}
+        for k, (_, wh, u, opening, incoming, outgoing) in merged.items():
+            bucket = osv_bucket(warehouses.items[wh], units.items[u])
+            bucket.opening, bucket.incoming, bucket.outgoing = opening, incoming, outgoing
+            result[k] = bucket
+        return result
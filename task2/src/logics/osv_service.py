@@ -6,10 +6,15 @@ from datetime import date, timedelta
 from typing import List, Optional
 
 from src.settings_manager import settings_manager
-from src.core.filter_utils import FilterUtils
+from src.core.filter_utils import FilterUtils, field_accessor, filter_plan
+from src.models.filter_dto import FilterDTO
 from src.models.balance_model import balance_model
 from src.models.turnover_snapshot_model import turnover_snapshot_model
 from src.models.osv_row_model import osv_row_model
+from src.logics.osv_aggregator import OSVAggregator
+from src.logics.osv_numpy_engine import ENGINE_NUMPY, ENGINE_PYTHON, ENGINES, osv_numpy_engine
+from src.logics.osv_parallel import OSVParallelAggregator, SHARD_MODES, SHARD_NOMENCLATURE
+from src.core.validator import argument_exception
 
 
 class OSVCalculator:
@@ -17,25 +22,99 @@ class OSVCalculator:
     Калькулятор ОСВ, оперирующий доменными моделями.
     """
 
-    def __init__(self, repo):
+    def __init__(self, repo, engine: Optional[str] = None):
         self.repo = repo
         self.settings_manager = settings_manager()
+        self.engine = engine
         self.prototype = OSVPrototype(repo)
 
-    def compute_osv(self, start_date: date, end_date: date, warehouse: Optional[str] = None, filters=None) -> List[osv_row_model]:
+    def resolve_engine(self, engine: Optional[str] = None) -> str:
         """
-        Возвращает список osv_row_model за период.
+        Движок расчёта: явно переданный в запросе, заданный калькулятору
+        или из настроек (osv_engine). По умолчанию - эталонный python.
+        """
+        if not engine:
+            engine = self.engine
+        if not engine:
+            try:
+                engine = self.settings_manager.get_osv_engine()
+            except Exception:
+                engine = ENGINE_PYTHON
+        engine = (engine or ENGINE_PYTHON).lower()
+        if engine not in ENGINES:
+            raise argument_exception(f"Неизвестный движок расчёта: {engine}")
+        return engine
+
+    def _prototype(self, engine: Optional[str] = None) -> "OSVPrototype":
+        """
+        Копия прототипа с движком и параметрами параллельного расчёта
+        (osv_workers, osv_shard_by) из настроек.
         """
         proto = self.prototype.clone()
-        return proto.generate(start_date, end_date, warehouse, filters)
+        proto.engine = self.resolve_engine(engine)
+        try:
+            proto.workers = max(1, int(self.settings_manager.get_osv_workers()))
+            proto.shard_by = self.settings_manager.get_osv_shard_by()
+        except Exception:
+            pass
+        if proto.shard_by not in SHARD_MODES:
+            raise argument_exception(f"Неизвестный способ шардирования: {proto.shard_by}")
+        return proto
+
+    @staticmethod
+    def _freeze(value):
+        """ Значение фильтра в хешируемом нормализованном виде """
+        if isinstance(value, (list, tuple, set)):
+            return tuple(OSVCalculator._freeze(v) for v in value)
+        if isinstance(value, dict):
+            return tuple(sorted((str(k), OSVCalculator._freeze(v)) for k, v in value.items()))
+        return FilterUtils.normalize(value) if isinstance(value, str) else value
+
+    @staticmethod
+    def filters_key(filters) -> tuple:
+        """ Нормализованные фильтры для ключа кэша (регистр и Unicode-форма не влияют) """
+        if not filters:
+            return ()
+        return tuple(
+            (FilterUtils.normalize(f.field_name), getattr(f.filter_type, "name", f.filter_type), OSVCalculator._freeze(f.value))
+            for f in filters
+        )
+
+    def _cache(self):
+        """ Кэш результатов репозитория (у тестовых хранилищ его может не быть) """
+        cache = getattr(self.repo, "result_cache", None)
+        return cache if cache is not None and hasattr(self.repo, "state_version") else None
+
+    def osv_cache_key(self, start_date: date, end_date: date, warehouse: Optional[str] = None, filters=None,
+                      engine: Optional[str] = None) -> tuple:
+        """ Ключ записи ОСВ в кэше результатов (к ней можно приложить готовые ответы, см. result_cache.attach) """
+        return ("osv", start_date, end_date, warehouse.lower() if warehouse else None,
+                self.filters_key(filters), self.resolve_engine(engine), self.repo.state_version())
+
+    def compute_osv(self, start_date: date, end_date: date, warehouse: Optional[str] = None, filters=None,
+                    engine: Optional[str] = None) -> List[osv_row_model]:
+        """
+        Возвращает список osv_row_model за период.
+        Результат кэшируется по (период, склад, фильтры, движок, версия данных).
+        """
+        engine = self.resolve_engine(engine)
+        cache = self._cache()
+        if cache is None:
+            return self._prototype(engine).generate(start_date, end_date, warehouse, filters)
+
+        key = self.osv_cache_key(start_date, end_date, warehouse, filters, engine)
+        rows = cache.get(key)
+        if rows is None:
+            rows = self._prototype(engine).generate(start_date, end_date, warehouse, filters)
+            cache.put(key, rows)
+        return list(rows)
 
     def compute_turnovers_until_block(self, block_period: date) -> List[turnover_snapshot_model]:
         """
         Рассчитывает агрегированные обороты до block_period с использованием прототипа.
         Прототип гарантирует ЕДИНУЮ логику расчёта ОСВ по модели osv_row_model.
         """
-        proto = self.prototype.clone()
-        rows = proto.generate(date(1900, 1, 1), block_period)
+        rows = self._prototype().generate(date(1900, 1, 1), block_period)
 
         snapshot_list: List[turnover_snapshot_model] = []
 
@@ -54,15 +133,34 @@ class OSVCalculator:
 
         return snapshot_list
 
-    def compute_balances_at(self, target_date: date) -> List[balance_model]:
+    def compute_balances_at(self, target_date: date, engine: Optional[str] = None) -> List[balance_model]:
         """
         Возвращает остатки на target_date с учётом сохранённого snapshot до даты блокировки.
+        Даты раньше блокировки (или без неё) считаются от ближайшего помесячного
+        checkpoint'а с досчётом только хвоста транзакций.
         Всегда возвращает список balance_model.
+        Результат кэшируется по (дата, дата блокировки, движок, версия данных),
+        поэтому смена даты блокировки сама делает прежние записи неактуальными.
         """
         block_date = self.settings_manager.get_block_period()
+        engine = self.resolve_engine(engine)
 
-        if not block_date:
-            rows = self.prototype.generate(date(1900, 1, 1), target_date)
+        cache = self._cache()
+        if cache is None:
+            return self._compute_balances_at(target_date, block_date, engine)
+
+        key = ("balances", target_date, block_date, engine, self.repo.state_version())
+        balances = cache.get(key)
+        if balances is None:
+            balances = self._compute_balances_at(target_date, block_date, engine)
+            cache.put(key, balances)
+        return list(balances)
+
+    def _compute_balances_at(self, target_date: date, block_date: Optional[date], engine: str) -> List[balance_model]:
+
+        if not block_date or target_date < block_date:
+            # Остаток на target_date - это начальный остаток пустого периода со следующего дня
+            rows = self._prototype(engine).generate(target_date + timedelta(days=1), target_date)
             return [
                 balance_model(
                     warehouse=r.warehouse,
@@ -76,7 +174,7 @@ class OSVCalculator:
         if snapshot is None:
             snapshot = self.compute_turnovers_until_block(block_date)
 
-        if target_date <= block_date:
+        if target_date == block_date:
             balances = []
             for s in snapshot:
                 wh = self.repo.get_warehouse_by_id(s.warehouse_id) if s.warehouse_id is not None else None
@@ -90,14 +188,14 @@ class OSVCalculator:
             for s in snapshot
         }
 
-        after_start = block_date + timedelta(days=1)
-        txs = [t for t in self.repo.transactions if t.date and after_start <= t.date <= target_date]
-
-        for t in txs:
-            key = (t.warehouse.id if t.warehouse else None, t.nomenclature.id, t.unit.id if t.unit else None)
-            qty = t.unit.to_base(t.quantity)
-
-            balances_map[key] = balances_map.get(key, 0.0) + qty
+        if OSVPrototype.uses_numpy(self.repo, engine):
+            osv_numpy_engine.for_storage(self.repo).balance_deltas(block_date, target_date, deltas=balances_map)
+        else:
+            OSVAggregator.balance_deltas(
+                self.repo.transactions_by_date(), block_date, target_date,
+                store=getattr(self.repo, "transaction_store", None), repo=self.repo,
+                deltas=balances_map
+            )
 
         result = []
         for (wh_id, item_id, unit_id), bal in balances_map.items():
@@ -109,45 +207,136 @@ class OSVCalculator:
         return result
 
 
+class osv_column_accessor:
+    """
+    Путь фильтра к колонке строки ОСВ ("Склад.code", "Приход", ...).
+    Значение читается из osv_row_model напрямую, без табличного представления;
+    пустые ссылки и колонка-ссылка целиком трактуются так же, как в нём
+    (склада нет - {"name": "Все склады"}, единицы нет - {}).
+    """
+    REFERENCES = ("warehouse", "item", "unit")
+    EMPTY = {"warehouse": {"name": "Все склады"}, "unit": {}}
+
+    def __init__(self, field_path: str, column: str, rest: str = ""):
+        self.field_path = field_path
+        self.column = column
+        self.rest = field_accessor(rest) if rest else None
+
+    def __call__(self, row):
+        value = getattr(row, self.column)
+        if value is None:
+            value = self.EMPTY.get(self.column)
+        elif self.rest is None and self.column in self.REFERENCES:
+            value = value.to_dict()
+        if self.rest is None or value is None:
+            return value
+        return self.rest(value)
+
+
 """Прототип сервиса для генерации ОСВ"""
 class OSVPrototype:
     """
     Прототип, формирующий ОСВ как список osv_row_model
     """
 
-    def __init__(self, storage):
+    # Колонки табличного представления ОСВ (нормализованные) -> поле osv_row_model
+    COLUMNS = {
+        "склад": "warehouse",
+        "номенклатура": "item",
+        "единица": "unit",
+        "начальный остаток": "opening",
+        "приход": "incoming",
+        "расход": "outgoing",
+        "конечный остаток": "closing",
+    }
+
+    def __init__(self, storage, engine: str = ENGINE_PYTHON, workers: int = 1, shard_by: str = SHARD_NOMENCLATURE):
         self.storage = storage
+        self.engine = engine
+        self.workers = workers
+        self.shard_by = shard_by
 
     def clone(self):
         """
         Возвращает новый экземпляр прототипа.
         """
-        return OSVPrototype(self.storage)
+        return OSVPrototype(self.storage, self.engine, self.workers, self.shard_by)
+
+    @staticmethod
+    def uses_numpy(storage, engine: str) -> bool:
+        """ NumPy-движок применяется, если он выбран, установлен numpy и хранилище - репозиторий """
+        return engine == ENGINE_NUMPY and osv_numpy_engine.available() and hasattr(storage, "transactions_by_date")
 
     def generate(self, start_date: date, end_date: date, warehouse: Optional[str] = None, filters=None) -> List[osv_row_model]:
         """
         Собирает ОСВ (в виде domain моделей) за указанный период.
-        Поддерживает фильтры: фильтры применяются к табличному представлению,
-        затем строки восстанавливаются обратно в модели.
+        Обороты считаются за один проход по транзакциям (OSVAggregator),
+        границы периода находятся по индексу дат репозитория. Результат эквивалентен
+        перебору транзакций по каждой номенклатуре с точностью до округления
+        (дробные суммы складываются в другом порядке).
+        При engine == "numpy" (и установленном numpy) обороты считаются
+        векторизованно по массивам osv_numpy_engine, при workers > 1 и открытом
+        колоночном хранилище - строки хранилища в пуле процессов (OSVParallelAggregator),
+        транзакции списка - последовательно.
+        Фильтры по полям номенклатуры (в т.ч. группе) отбирают позиции до
+        агрегации - движения остальных не суммируются; фильтры по складу,
+        единице и суммам проверяются на готовых osv_row_model (split_filters).
         """
         result: List[osv_row_model] = []
 
-        noms = self.storage.nomenclatures
-        txs = self.storage.transactions
-
-        for n in noms:
-            relevant = [
-                t for t in txs
-                if t.nomenclature == n and self._warehouse_match(t.warehouse, warehouse)
-            ]
-
-            if not relevant:
-                wh_obj = next(
-                    (w for w in self.storage.warehouses if self._warehouse_match(w, warehouse)),
-                    None
-                )
+        split = self.split_filters(filters)
+        if split is None:
+            return result
+        item_filters, row_plans = split
+
+        nomenclatures = self.storage.nomenclatures
+        items = None
+        if item_filters:
+            nomenclatures = list(FilterUtils.iterate(nomenclatures, item_filters, entity_type="nomenclature"))
+            items = {n.unique_code for n in nomenclatures}
+
+        aggregator = OSVAggregator(start_date, end_date, warehouse, items=items)
+        buckets = {}
+        store = getattr(self.storage, "transaction_store", None)
+
+        if self.uses_numpy(self.storage, self.engine):
+            buckets = osv_numpy_engine.for_storage(self.storage).aggregate(start_date, end_date, warehouse, items=items)
+        elif hasattr(self.storage, "transactions_by_date"):
+            index = self.storage.transactions_by_date()
+
+            # Начальный остаток: ближайший checkpoint до начала периода + "хвост" транзакций после него
+            after = None
+            if self._history_starts_before(index, store, start_date):
+                checkpoints = self.storage.turnover_checkpoints()
+                if checkpoints.usable:
+                    after, balances = checkpoints.at_or_before(start_date - timedelta(days=1))
+                    aggregator.seed_checkpoint(balances, self.storage, key=OSVAggregator.item_key, buckets=buckets)
+
+            if self.workers > 1 and OSVParallelAggregator.applicable(self.storage):
+                parallel = OSVParallelAggregator(start_date, end_date, warehouse, self.workers, self.shard_by, items=items)
+                buckets = parallel.aggregate(self.storage, buckets, after=after)
+            elif store is not None:
+                aggregator.aggregate_store(store, self.storage, key=OSVAggregator.item_key, buckets=buckets, after=after)
+            aggregator.aggregate_index(index, key=OSVAggregator.item_key, buckets=buckets, after=after)
+        else:
+            aggregator.aggregate(self.storage.transactions, key=OSVAggregator.item_key, buckets=buckets)
+
+        default_wh = next(
+            (w for w in self.storage.warehouses if self._warehouse_match(w, warehouse)),
+            None
+        )
+        # Подписи строк - склад и единица первой (по порядку добавления) подходящей проводки
+        movements = self.storage.first_movements() if hasattr(self.storage, "first_movements") else None
+
+        for n in nomenclatures:
+            bucket = buckets.get(n.unique_code)
+            label = self._first_movement(movements, n, warehouse) if movements is not None else None
+            if label is None and bucket is not None:
+                label = (bucket.warehouse, bucket.unit)
+
+            if label is None:
                 result.append(osv_row_model(
-                    warehouse=wh_obj,
+                    warehouse=default_wh,
                     item=n,
                     unit=n.unit,
                     opening=0.0,
@@ -156,65 +345,66 @@ class OSVPrototype:
                 ))
                 continue
 
-            opening = sum(t.unit.to_base(t.quantity) for t in relevant if t.date < start_date)
-            incoming = sum(t.unit.to_base(t.quantity) for t in relevant if start_date <= t.date <= end_date and t.quantity > 0)
-            outgoing = -sum(t.unit.to_base(t.quantity) for t in relevant if start_date <= t.date <= end_date and t.quantity < 0)
-
-            base_unit = relevant[0].unit.base if relevant[0].unit and getattr(relevant[0].unit, "base", None) else (relevant[0].unit if getattr(relevant[0], "unit", None) else None)
+            wh, unit = label
+            base_unit = unit.base if unit and getattr(unit, "base", None) else unit
 
             result.append(osv_row_model(
-                warehouse=relevant[0].warehouse,
+                warehouse=wh,
                 item=n,
                 unit=base_unit,
-                opening=opening,
-                incoming=incoming,
-                outgoing=outgoing
+                opening=bucket.opening if bucket is not None else 0.0,
+                incoming=bucket.incoming if bucket is not None else 0.0,
+                outgoing=-bucket.outgoing if bucket is not None else 0.0
             ))
 
-        if filters:
-            raw = [
-                {
-                    "Склад": r.warehouse.to_dict() if r.warehouse else {"name": "Все склады"},
-                    "Номенклатура": r.item.to_dict(),
-                    "Единица": r.unit.to_dict() if r.unit else {},
-                    "Начальный остаток": r.opening,
-                    "Приход": r.incoming,
-                    "Расход": r.outgoing,
-                    "Конечный остаток": r.closing
-                }
-                for r in result
-            ]
+        if row_plans:
+            result = list(FilterUtils.iterate_plans(result, row_plans))
 
-            raw_filtered = FilterUtils.apply(raw, filters)
-
-            new_result: List[osv_row_model] = []
-            for r in raw_filtered:
-                wh_id = r.get("Склад", {}).get("id")
-                nom_id = r["Номенклатура"]["id"]
-                unit_id = r.get("Единица", {}).get("id")
-
-                wh = self.storage.get_warehouse_by_id(wh_id) if wh_id is not None else None
-                nom = self.storage.get_nomenclature_by_id(nom_id)
-                unit = self.storage.get_unit_by_id(unit_id) if unit_id is not None else None
-
-                new_result.append(osv_row_model(
-                    warehouse=wh,
-                    item=nom,
-                    unit=unit,
-                    opening=r.get("Начальный остаток", 0.0),
-                    incoming=r.get("Приход", 0.0),
-                    outgoing=r.get("Расход", 0.0)
-                ))
+        return result
 
-            result = new_result
+    @staticmethod
+    def split_filters(filters):
+        """
+        Разделяет фильтры ОСВ (пути табличного представления, например
+        "Номенклатура.group.name", "Склад.code", "Конечный остаток"):
+        - фильтры по полям номенклатуры - FilterDTO с путём внутри nomenclature_model;
+        - остальные - планы с osv_column_accessor для проверки строк ОСВ.
+        Возвращает (фильтры номенклатуры, планы строк) или None, если путь
+        не ведёт ни к одной колонке (такому фильтру не соответствует ни одна строка).
+        """
+        item_filters, row_plans = [], []
+        for f in filters or ():
+            column, _, rest = f.field_name.partition(".")
+            column = FilterUtils.normalize(column)
+            alias = FilterUtils.FIELD_ALIASES.get(column)
+            if alias:
+                column = FilterUtils.normalize(alias)
+            attr = OSVPrototype.COLUMNS.get(column)
+            if attr is None:
+                return None
+
+            if attr == "item" and rest:
+                item_filters.append(FilterDTO(rest, f.value, f.filter_type))
+            else:
+                accessor = osv_column_accessor(f.field_name, attr, rest)
+                row_plans.append(filter_plan(accessor, f.filter_type, f.value, entity_type="osv_row"))
+        return item_filters, row_plans
 
-        return result
+    @staticmethod
+    def _first_movement(movements, nomenclature, warehouse: Optional[str]):
+        """ (склад, единица) первой проводки номенклатуры на подходящем складе или None """
+        for wh, unit in movements.get(nomenclature.unique_code, {}).values():
+            if OSVAggregator.warehouse_match(wh, warehouse):
+                return wh, unit
+        return None
 
     @staticmethod
-    def _warehouse_match(tx_wh, wanted):
-        if not wanted:
+    def _history_starts_before(index, store, start_date: date) -> bool:
+        """ Есть ли движения раньше start_date (иначе checkpoint'ы не нужны) """
+        if index.dates and index.dates[0] < start_date:
             return True
-        if tx_wh is None:
-            return False
-        wanted = wanted.lower()
-        return wanted in tx_wh.name.lower() or wanted == getattr(tx_wh, "code", "").lower()
+        return store is not None and store.count > 0 and store.dates[0] < start_date.toordinal()
+
+    @staticmethod
+    def _warehouse_match(tx_wh, wanted):
+        return OSVAggregator.warehouse_match(tx_wh, wanted)
@@ -0,0 +1,133 @@
+"""
+Нормализованный вывод: справочные объекты - один раз в таблицах по id, строки - только id
+"""
+from typing import Any, Dict, Iterable, Optional
+
+from src.logics.model_serializer import model_serializer
+from src.models.group_model import group_model
+from src.models.nomenclature_model import nomenclature_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+class reference_normalizer:
+    """
+    Вместо вложенных копий склада, номенклатуры, единицы и группы в каждой строке
+    (транзакции, остатка, строки ОСВ) строка несёт только ключ ссылки, а сам объект
+    один раз попадает в таблицу refs[<тип>][<ключ>]. Ссылки внутри записей таблиц
+    (группа и единица номенклатуры, базовая единица) тоже заменяются ключами.
+    Ключ - id объекта, для объектов без id - unique_code.
+    Поля строк и записей - как у convert_factory.convert (имена без name-mangling,
+    тот же порядок ключей), поэтому ненормализованный вид восстанавливается по таблицам.
+    """
+
+    # Справочные типы и имена их таблиц (совпадают с коллекциями storage_repository.data)
+    TABLES = (
+        (warehouse_model, "warehouse"),
+        (nomenclature_model, "nomenclature"),
+        (unit_model, "unit"),
+        (group_model, "group"),
+    )
+
+    # Поля строк, содержащие ключ ссылки, и таблицы, в которых она ищется (для expand)
+    REF_FIELDS = {
+        "warehouse": "warehouse",
+        "nomenclature": "nomenclature",
+        "item": "nomenclature",
+        "unit": "unit",
+        "base": "unit",
+        "group": "group",
+    }
+
+    _table_names: Dict[type, Optional[str]] = {}
+
+    def __init__(self):
+        self.refs: Dict[str, Dict[Any, dict]] = {name: {} for _, name in self.TABLES}
+
+    @classmethod
+    def table_of(cls, value) -> Optional[str]:
+        """ Имя таблицы для справочного объекта, None - значение не справочное """
+        value_type = type(value)
+        if value_type not in cls._table_names:
+            cls._table_names[value_type] = next(
+                (name for model, name in cls.TABLES if issubclass(value_type, model)), None)
+        return cls._table_names[value_type]
+
+    @staticmethod
+    def key(ref) -> Any:
+        ref_id = getattr(ref, "id", None)
+        return ref_id if ref_id is not None else ref.unique_code
+
+    def ref(self, ref) -> Any:
+        """ Заносит справочный объект (и его ссылки) в таблицы, возвращает ключ """
+        table = self.refs[self.table_of(ref)]
+        key = self.key(ref)
+        if key not in table:
+            # Место занимается до разбора полей: повторная встреча по цепочке ссылок не зацикливается
+            table[key] = None
+            table[key] = self._fields(ref)
+        return key
+
+    def value(self, value):
+        """ Значение поля: ссылки - ключами, модели - словарями, остальное - как convert_factory """
+        if value is None:
+            return None
+        if self.table_of(value) is not None:
+            return self.ref(value)
+        if isinstance(value, list):
+            return [self.value(i) for i in value]
+        if isinstance(value, dict):
+            data = {k: self.value(v) for k, v in value.items()}
+            return {k: data[k] for k in model_serializer.key_order(data)}
+        if model_serializer.is_model(value):
+            return self._fields(value)
+        return model_serializer.convert(value)
+
+    def row(self, obj) -> Any:
+        """
+        Строка вывода: поля объекта верхнего уровня с ключами вместо ссылок.
+        Справочный объект верхнего уровня выводится целиком (в таблицы он не попадает,
+        если на него нет ссылок из других строк).
+        """
+        if self.table_of(obj) is not None:
+            return self._fields(obj)
+        return self.value(obj)
+
+    def iter_rows(self, items: Iterable):
+        """ Потоковая нормализация: таблицы заполняются по мере выдачи строк """
+        for item in items:
+            yield self.row(item)
+
+    def _fields(self, obj) -> dict:
+        data = {}
+        for attr, value in vars(obj).items():
+            if callable(value):
+                continue
+            data[model_serializer.clean_name(attr)] = self.value(value)
+        return {k: data[k] for k in model_serializer.key_order(data)}
+
+    def document(self, rows) -> dict:
+        """ {"rows": [...], "refs": {...}} - таблицы заполнены строками документа """
+        rows = list(self.iter_rows(rows))
+        return {"rows": rows, "refs": self.refs}
+
+    # --- Обратное преобразование ---
+
+    @classmethod
+    def expand(cls, data, refs: Dict[str, Dict[Any, dict]]):
+        """
+        Вложенный вид строки (поля REF_FIELDS - словари записей таблиц вместо ключей).
+        Ключ, которого нет в таблице, остаётся как есть (например, строковая единица рецепта).
+        """
+        if isinstance(data, list):
+            return [cls.expand(i, refs) for i in data]
+        if not isinstance(data, dict):
+            return data
+
+        result = {}
+        for name, value in data.items():
+            table = cls.REF_FIELDS.get(name)
+            if table is not None and isinstance(value, (str, int)) and value in refs.get(table, {}):
+                value = cls.expand(refs[table][value], refs)
+            result[name] = value
+        return result
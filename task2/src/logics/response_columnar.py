@@ -0,0 +1,169 @@
+"""
+Колоночный двоичный формат выгрузок: Apache Arrow IPC (pyarrow) или NumPy .npz.
+pyarrow и NumPy - необязательные зависимости: без NumPy формат не регистрируется.
+"""
+import io
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - зависит от окружения
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # pragma: no cover - зависит от окружения
+    pa = None
+
+from src.core.abstract_response import abstract_response
+from src.logics.convert_factory import convert_factory
+from src.models.balance_model import balance_model
+from src.models.osv_row_model import osv_row_model
+from src.models.transaction_model import transaction_model
+
+
+class response_columnar(abstract_response):
+    """
+    Выгрузка колонками: одна типизированная колонка (массив NumPy) на поле вместо
+    словаря на строку, в файле - Arrow IPC stream (если установлен pyarrow) или .npz
+    (np.load(..., allow_pickle=False): строки - Unicode-массивы, даты - datetime64[D]).
+    Для строк ОСВ, остатков и транзакций колонки берутся прямо из атрибутов моделей
+    (MODEL_COLUMNS): числа собираются np.fromiter, ссылки - их id, промежуточных
+    словарей строк нет; конечный остаток ОСВ считается по колонкам.
+    Прочие элементы конвертируются в словари (convert) и раскладываются по колонкам.
+    """
+    # Ответ строится из колонок (create_columns), а не потоково из строк
+    columnar = True
+
+    BACKEND = "arrow" if pa is not None and np is not None else "npz" if np is not None else None
+    MIME_TYPES = {"arrow": "application/vnd.apache.arrow.stream", "npz": "application/x-npz"}
+    MIME_TYPE = MIME_TYPES.get(BACKEND, "application/octet-stream")
+
+    # Колонки моделей: (имя колонки, вид значения, атрибут)
+    MODEL_COLUMNS = {
+        osv_row_model: (
+            ("warehouse_id", "ref", "warehouse"),
+            ("item_id", "ref", "item"),
+            ("item_name", "name", "item"),
+            ("unit_id", "ref", "unit"),
+            ("opening", "float", "opening"),
+            ("incoming", "float", "incoming"),
+            ("outgoing", "float", "outgoing"),
+        ),
+        balance_model: (
+            ("warehouse_id", "ref", "warehouse"),
+            ("item_id", "ref", "item"),
+            ("item_name", "name", "item"),
+            ("unit_id", "ref", "unit"),
+            ("balance", "float", "balance"),
+        ),
+        transaction_model: (
+            ("id", "str", "id"),
+            ("number", "str", "number"),
+            ("date", "date", "date"),
+            ("nomenclature_id", "ref", "nomenclature"),
+            ("warehouse_id", "ref", "warehouse"),
+            ("unit_id", "ref", "unit"),
+            ("quantity", "float", "quantity"),
+        ),
+    }
+
+    @staticmethod
+    def available() -> bool:
+        return np is not None
+
+    # --- Ответ ---
+
+    def create_response(self, data: list[dict]) -> bytes:
+        """ Выгрузка словарей строк """
+        return self.encode(self.columns_from_rows(data))
+
+    def create_columns(self, items: Iterable, convert: Optional[Callable] = None,
+                       fields: Optional[Sequence[str]] = None) -> bytes:
+        """
+        Выгрузка элементов коллекции: модели с MODEL_COLUMNS - напрямую по атрибутам,
+        остальные - словарями convert (по умолчанию convert_factory).
+        fields - оставить только эти колонки (?fields=)
+        """
+        columns = self.columns_for(items, convert)
+        if fields:
+            columns = {name: values for name, values in columns.items() if name in fields}
+        return self.encode(columns)
+
+    def encode(self, columns: Dict[str, Any]) -> bytes:
+        if self.BACKEND == "arrow":
+            table = pa.table({name: pa.array(values) for name, values in columns.items()})
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return sink.getvalue().to_pybytes()
+
+        buffer = io.BytesIO()
+        np.savez(buffer, **columns)
+        return buffer.getvalue()
+
+    # --- Колонки ---
+
+    @classmethod
+    def columns_for(cls, items: Iterable, convert: Optional[Callable] = None) -> Dict[str, Any]:
+        items = items if isinstance(items, Sequence) else list(items)
+        spec = cls.MODEL_COLUMNS.get(type(items[0])) if len(items) else None
+        if spec is None or any(type(i) is not type(items[0]) for i in items):
+            convert = convert or convert_factory().convert
+            return cls.columns_from_rows([convert(i) for i in items])
+
+        columns = {name: cls._column(items, kind, attr) for name, kind, attr in spec}
+        if type(items[0]) is osv_row_model:
+            columns["closing"] = columns["opening"] + columns["incoming"] - columns["outgoing"]
+        return columns
+
+    @staticmethod
+    def _column(items: Sequence, kind: str, attr: str):
+        if kind == "float":
+            return np.fromiter((getattr(i, attr) for i in items), dtype=np.float64, count=len(items))
+        if kind == "date":
+            return np.array([getattr(i, attr) for i in items], dtype="datetime64[D]")
+        if kind == "ref":
+            values = [getattr(getattr(i, attr), "id", None) for i in items]
+        elif kind == "name":
+            values = [getattr(getattr(i, attr), "name", None) for i in items]
+        else:
+            values = [getattr(i, attr) for i in items]
+        return np.array(["" if v is None else str(v) for v in values], dtype=str)
+
+    @classmethod
+    def columns_from_rows(cls, rows: Sequence[dict]) -> Dict[str, Any]:
+        """
+        Колонки из словарей строк (объединение ключей в порядке появления).
+        Вложенный словарь - его id, список - строка через запятую (как в CSV),
+        числа - float64 (int64, если все целые), даты - datetime64[D], остальное - строки.
+        """
+        names: Dict[str, None] = {}
+        for row in rows:
+            names.update(dict.fromkeys(row))
+        return {name: cls._values_column([cls._cell(row.get(name)) for row in rows]) for name in names}
+
+    @staticmethod
+    def _cell(value):
+        if isinstance(value, dict):
+            return value.get("id")
+        if isinstance(value, list):
+            return ", ".join(map(str, value))
+        if hasattr(value, "unique_code"):
+            return getattr(value, "id", None)
+        return value
+
+    @staticmethod
+    def _values_column(values: list):
+        present = [v for v in values if v is not None]
+        if present and all(isinstance(v, bool) for v in present) and len(present) == len(values):
+            return np.array(values, dtype=bool)
+        if present and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+            if len(present) == len(values) and all(isinstance(v, int) for v in present):
+                return np.array(values, dtype=np.int64)
+            return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        if present and all(isinstance(v, date) for v in present):
+            return np.array(values, dtype="datetime64[D]")
+        return np.array(["" if v is None else str(v) for v in values], dtype=str)
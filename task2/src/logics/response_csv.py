@@ -1,4 +1,6 @@
 from src.core.abstract_response import abstract_response
+from itertools import chain
+from typing import Iterable, Optional, Sequence
 import csv
 import io
 
@@ -6,29 +8,68 @@ import io
 Формирование ответа в формате CSV
 """
 class response_csv(abstract_response):
+    # Строки пишутся по одной, ответ отдаётся частями (iter_response)
+    streaming = True
+    tabular = True
+    # Размер части потокового ответа (символов)
+    CHUNK_SIZE = 64 * 1024
+
     """
     Преобразует список словарей (данных) в CSV-формат
-    Все списки внутри данных конвертируются в человекочитаемую строку через запятую
+    Все списки внутри данных конвертируются в человекочитаемую строку через запятую,
+    вложенные ссылки - в колонки <ключ>_id, <ключ>_name (abstract_response.flat_row)
+    references - поля-ссылки по схеме модели (model_serializer.reference_fields)
     """
-    def create_response(self, data: list[dict]) -> str:
+    def create_response(self, data: list[dict], references=()) -> str:
         if not data:
             return ""
 
-        fieldnames = sorted({key for row in data for key in row.keys()})
+        rows = [self.flat_row(row, references) for row in data]
+        fieldnames = sorted({key for row in rows for key in row.keys()})
+        return "".join(self._iter_flat(rows, fieldnames))
+
+    def iter_response(self, rows: Iterable[dict], fieldnames: Optional[Sequence[str]] = None,
+                      chunk_size: int = CHUNK_SIZE, references=()):
+        """
+        Потоковый CSV: строки (в том числе из генератора) форматируются и пишутся
+        по одной, наружу уходят части по chunk_size символов - память не зависит
+        от числа строк.
+        fieldnames - заголовок; без него - отсортированные ключи первой плоской строки:
+        с references (поля-ссылки по схеме модели) набор ключей плоской строки не зависит
+        от значений, поэтому заголовок совпадает с create_response. Отсутствующие ключи -
+        пустые; ключ вне заголовка - ValueError (данные выгрузки не отбрасываются молча).
+        """
+        return self._iter_flat((self.flat_row(row, references) for row in rows), fieldnames, chunk_size)
+
+    @staticmethod
+    def _iter_flat(rows: Iterable[dict], fieldnames: Optional[Sequence[str]] = None,
+                   chunk_size: int = CHUNK_SIZE):
+        """ Запись уже плоских строк (flat_row) частями по chunk_size символов """
+        rows = iter(rows)
+        if fieldnames is None:
+            first = next(rows, None)
+            if first is None:
+                return
+            fieldnames = sorted(first.keys())
+            rows = chain((first,), rows)
 
         output = io.StringIO()
         writer = csv.DictWriter(output, fieldnames=fieldnames)
         writer.writeheader()
 
-        formatted_data = []
-        for row in data:
-            formatted_row = {}
-            for key, value in row.items():
-                if isinstance(value, list):
-                    formatted_row[key] = ", ".join(map(str, value))
-                else:
-                    formatted_row[key] = value
-            formatted_data.append(formatted_row)
-
-        writer.writerows(formatted_data)
-        return output.getvalue()
+        for row in rows:
+            writer.writerow(row)
+            if output.tell() >= chunk_size:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+
+        if output.tell():
+            yield output.getvalue()
+
+    def write_file(self, rows: Iterable[dict], path: str, fieldnames: Optional[Sequence[str]] = None,
+                   references=()):
+        """ Потоковая запись CSV в файл (части iter_response) """
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            for chunk in self.iter_response(rows, fieldnames, references=references):
+                f.write(chunk)
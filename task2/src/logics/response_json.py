@@ -1,9 +1,70 @@
+from typing import Optional
+
 from src.core.abstract_response import abstract_response
-import json
+from src.core.json_encoder import json_encoder
 
 """
 Формирование ответа в формате JSON
 """
 class response_json(abstract_response):
+    # Элементы сериализуются по одному, ответ отдаётся частями (iter_response)
+    streaming = True
+    # Размер части потокового ответа (символов): меньше - больше мелких записей в сокет
+    CHUNK_SIZE = 64 * 1024
+
     def create_response(self, data: list[dict]) -> str:
-        return json.dumps(data, ensure_ascii=False, indent=4)
+        """ Компактный JSON; pretty=True (?pretty=1) - с отступами """
+        return json_encoder.dumps(data, indent=2 if self.pretty else None)
+
+    def iter_response(self, rows):
+        """ Потоковый массив (iter_array) с отступом по pretty """
+        return self.iter_array(rows, 2 if self.pretty else None)
+
+    @staticmethod
+    def iter_array(items, indent: Optional[int] = 2, chunk_size: int = CHUNK_SIZE, level: int = 0):
+        """
+        Потоковый JSON-массив: элементы (уже сконвертированные, например
+        convert_factory.iter_collection) сериализуются по одному и отдаются
+        частями по chunk_size символов. В памяти - только текущая часть,
+        первая часть уходит без ожидания конца коллекции.
+        Результат совпадает с json_encoder.dumps(list(items), indent=indent)
+        (indent=None - компактный массив).
+        level - глубина вложения массива в документ (отступ его строк).
+        """
+        pad = "\n" + " " * (indent * (level + 1)) if indent is not None else ""
+        dumps = json_encoder.dumps
+        buffer = []
+        size = 0
+        count = 0
+
+        for item in items:
+            # Переводы строк внутри JSON-строк экранированы, поэтому отступ добавляется заменой
+            part = ("," if count else "[") + pad + dumps(item, indent).replace("\n", pad)
+            buffer.append(part)
+            size += len(part)
+            count += 1
+            if size >= chunk_size:
+                yield "".join(buffer)
+                buffer.clear()
+                size = 0
+
+        if not count:
+            buffer.append("[]")
+        else:
+            # Закрывающая скобка - с отступом уровня самого массива
+            buffer.append((pad[:len(pad) - indent] if indent is not None else "") + "]")
+        yield "".join(buffer)
+
+    @staticmethod
+    def iter_normalized(rows, normalizer, indent: Optional[int] = 2, chunk_size: int = CHUNK_SIZE):
+        """
+        Потоковый нормализованный документ {"rows": [...], "refs": {...}}:
+        rows - строки, которые нормализует normalizer (normalizer.iter_rows), они отдаются
+        по мере нормализации; таблицы ссылок заполнены к концу строк и выводятся последними.
+        Результат совпадает с json_encoder.dumps(normalizer.document(...), indent=indent).
+        """
+        pad, colon, end = ("\n" + " " * indent, ": ", "\n}") if indent is not None else ("", ":", "}")
+        yield "{" + pad + '"rows"' + colon
+        yield from response_json.iter_array(rows, indent, chunk_size, level=1)
+        refs = json_encoder.dumps(normalizer.refs, indent).replace("\n", pad)
+        yield "," + pad + '"refs"' + colon + refs + end
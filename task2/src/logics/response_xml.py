@@ -1,25 +1,72 @@
 from src.core.abstract_response import abstract_response
-import xml.etree.ElementTree as ET
-from xml.dom import minidom
+from typing import Iterable
+from xml.sax.saxutils import escape
 
 """
 Формирование ответа в формате XML
 """
 class response_xml(abstract_response):
+    # Элементы пишутся по одному, ответ отдаётся частями (iter_response)
+    streaming = True
+    tabular = True
+    # Размер части потокового ответа (символов)
+    CHUNK_SIZE = 64 * 1024
+
+    HEADER = '<?xml version="1.0" encoding="utf-8"?>'
+    # Кавычки в тексте экранируются, как в прежнем выводе minidom
+    _ENTITIES = {'"': "&quot;"}
+
     """
-    Метод преобразует список словарей в человекочитаемый XML-документ
+    Метод преобразует список словарей в XML-документ
     Каждый элемент списка становится XML-узлом <Item>, внутри которого - поля данных
+    pretty - построчно с отступом 2 (как прежний minidom.toprettyxml), иначе - без переводов строк
+    references - поля-ссылки по схеме модели (model_serializer.reference_fields)
     """
-    def create_response(self, data: list[dict]) -> str:
-        root = ET.Element("Items")
-        for row in data:
-            item = ET.SubElement(root, "Item")
-            for k, v in row.items():
-                el = ET.SubElement(item, str(k))
-                el.text = str(v)
-
-        xml_str = ET.tostring(root, encoding="utf-8")
-        dom = minidom.parseString(xml_str)
-        pretty = dom.toprettyxml(indent="  ", encoding="utf-8")
-
-        return pretty.decode("utf-8")
+    def create_response(self, data: list[dict], references=()) -> str:
+        return "".join(self.iter_response(data, references=references))
+
+    def iter_response(self, rows: Iterable[dict], chunk_size: int = CHUNK_SIZE, references=()):
+        """
+        Потоковый XML: узлы <Item> формируются по одному (без дерева ElementTree
+        и повторного разбора minidom) и отдаются частями по chunk_size символов.
+        Поля - плоская строка (abstract_response.flat_row): вложенные ссылки - <ключ>_id, <ключ>_name,
+        поля-ссылки из references - те же элементы и при пустой ссылке (набор элементов от данных не зависит)
+        """
+        newline, item_pad, field_pad = ("\n", "  ", "    ") if self.pretty else ("", "", "")
+        item_open, item_close, item_empty = (item_pad + "<Item>" + newline, item_pad + "</Item>" + newline,
+                                             item_pad + "<Item/>" + newline)
+        field = self.field
+
+        buffer = [self.HEADER + newline]
+        size = 0
+        count = 0
+
+        for row in (self.flat_row(row, references) for row in rows):
+            if not count:
+                buffer.append("<Items>" + newline)
+            count += 1
+
+            if row:
+                part = item_open + "".join(field_pad + field(k, v) + newline for k, v in row.items()) + item_close
+            else:
+                part = item_empty
+            buffer.append(part)
+            size += len(part)
+            if size >= chunk_size:
+                yield "".join(buffer)
+                buffer.clear()
+                size = 0
+
+        buffer.append(("</Items>" if count else "<Items/>") + newline)
+        yield "".join(buffer)
+
+    @classmethod
+    def field(cls, name, value) -> str:
+        """ Поле <name>значение</name>; пустое значение и None - <name/> """
+        text = "" if value is None else str(value)
+        if not text:
+            return f"<{name}/>"
+        if "\r" in text:
+            # Разбор XML нормализует переводы строк - прежний вывод содержал только \n
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return f"<{name}>{escape(text, cls._ENTITIES)}</{name}>"
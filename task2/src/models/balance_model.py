@@ -1,5 +1,12 @@
+from typing import Optional
+from src.models.nomenclature_model import nomenclature_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
 class balance_model:
-    def __init__(self, warehouse, item, unit, balance):
+    def __init__(self, warehouse: Optional[warehouse_model], item: nomenclature_model,
+                 unit: Optional[unit_model], balance: float):
         self.warehouse = warehouse
         self.item = item
         self.unit = unit
@@ -12,7 +12,8 @@ class FilterDTO:
     def from_dict(data: dict):
         """
         Безопасно создает FilterDTO.
-        Поддерживает строковые значения filter_type ('LIKE', 'EQUALS').
+        Поддерживает строковые значения filter_type ('LIKE', 'EQUALS', 'GREATER',
+        'LESS', 'BETWEEN', 'IN'; регистр не важен).
         """
         if not isinstance(data, dict):
             raise ValueError("Filter must be an object")
@@ -39,8 +40,26 @@ class FilterDTO:
         else:
             raise ValueError(f"Invalid filter_type '{ftype}'")
 
+        FilterDTO.validate_value(ftype_enum, value)
+
         return FilterDTO(
             field_name=field,
             value=value,
             filter_type=ftype_enum
         )
+
+    @staticmethod
+    def validate_value(filter_type: FilterType, value):
+        """
+        Проверка формы значения: BETWEEN - список [от, до],
+        IN - непустой список, GREATER/LESS - одно значение.
+        """
+        if filter_type == FilterType.BETWEEN:
+            if not isinstance(value, (list, tuple)) or len(value) != 2:
+                raise ValueError("BETWEEN requires 'value' as [from, to]")
+        elif filter_type == FilterType.IN:
+            if not isinstance(value, (list, tuple)) or not value:
+                raise ValueError("IN requires 'value' as a non-empty list")
+        elif filter_type in (FilterType.GREATER, FilterType.LESS):
+            if isinstance(value, (list, tuple, dict)):
+                raise ValueError(f"{filter_type.name} requires a single 'value'")
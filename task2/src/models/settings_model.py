@@ -23,6 +23,15 @@ class settings_model:
     response_format: ResponseFormat = ResponseFormat.JSON
     company: Optional[company_model] = None
     block_period: Optional[date] = None
+    transaction_backend: str = "json"
+    osv_engine: str = "python"
+    osv_workers: int = 1
+    osv_shard_by: str = "nomenclature"
+    result_cache_size: int = 128
+    result_cache_ttl: float = 300.0
+    normalized_output: bool = False
+    response_compression: bool = True
+    compression_min_size: int = 1024
 
     """ Устанавливает текущую компанию с проверкой валидности """
     def set_company(self, company_obj: company_model):
@@ -34,7 +43,16 @@ class settings_model:
             "data_source": self.data_source,
             "response_format": self.response_format.name if self.response_format else None,
             "company": self.company.to_dict() if self.company and hasattr(self.company, "to_dict") else None,
-            "block_period": self.block_period.isoformat() if self.block_period else None
+            "block_period": self.block_period.isoformat() if self.block_period else None,
+            "transaction_backend": self.transaction_backend,
+            "osv_engine": self.osv_engine,
+            "osv_workers": self.osv_workers,
+            "osv_shard_by": self.osv_shard_by,
+            "result_cache_size": self.result_cache_size,
+            "result_cache_ttl": self.result_cache_ttl,
+            "normalized_output": self.normalized_output,
+            "response_compression": self.response_compression,
+            "compression_min_size": self.compression_min_size
         }
 
     @classmethod
@@ -50,7 +68,16 @@ class settings_model:
             data_source=data.get("data_source", ""),
             response_format=response_format,
             company=None,
-            block_period=bp_date
+            block_period=bp_date,
+            transaction_backend=data.get("transaction_backend", "json"),
+            osv_engine=data.get("osv_engine", "python"),
+            osv_workers=int(data.get("osv_workers", 1) or 1),
+            osv_shard_by=data.get("osv_shard_by", "nomenclature"),
+            result_cache_size=int(data.get("result_cache_size", 128)),
+            result_cache_ttl=float(data.get("result_cache_ttl", 300.0)),
+            normalized_output=bool(data.get("normalized_output", False)),
+            response_compression=bool(data.get("response_compression", True)),
+            compression_min_size=int(data.get("compression_min_size", 1024))
         )
 
     def __repr__(self):
@@ -69,3 +69,41 @@ class settings_manager:
         if not self.__settings:
             self.load_settings()
         return self.__settings.block_period
+
+    def get_transaction_backend(self) -> str:
+        if not self.__settings:
+            self.load_settings()
+        return self.__settings.transaction_backend
+
+    def get_osv_engine(self) -> str:
+        if not self.__settings:
+            self.load_settings()
+        return self.__settings.osv_engine
+
+    def get_osv_workers(self) -> int:
+        if not self.__settings:
+            self.load_settings()
+        return self.__settings.osv_workers
+
+    def get_osv_shard_by(self) -> str:
+        if not self.__settings:
+            self.load_settings()
+        return self.__settings.osv_shard_by
+
+    def get_result_cache(self) -> tuple:
+        """ (размер, TTL в секундах) кэша результатов ОСВ/остатков """
+        if not self.__settings:
+            self.load_settings()
+        return self.__settings.result_cache_size, self.__settings.result_cache_ttl
+
+    def get_normalized_output(self) -> bool:
+        """ Нормализованный вид файла репозитория (таблицы ссылок по id) """
+        if not self.__settings:
+            self.load_settings()
+        return self.__settings.normalized_output
+
+    def get_response_compression(self) -> tuple:
+        """ (включено, минимальный размер тела в байтах) сжатия ответов API """
+        if not self.__settings:
+            self.load_settings()
+        return self.__settings.response_compression, self.__settings.compression_min_size
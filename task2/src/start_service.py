@@ -4,6 +4,7 @@
 
 from datetime import date
 from src.core.storage_repository import storage_repository
+from src.core.response_compressor import response_compressor
 from src.models.nomenclature_model import nomenclature_model
 from src.models.unit_model import unit_model
 from src.models.group_model import group_model
@@ -26,6 +27,11 @@ class start_service:
         """
         self.storage = storage
 
+    @staticmethod
+    def __setting_error(name: str, error: Exception):
+        """ Сообщает о настройке, которая не применена (используется значение по умолчанию) """
+        print(f"[WARN] Настройка {name} не применена: {error!r}")
+
     def create(self):
         """
         Создает тестовые данные:
@@ -37,6 +43,30 @@ class start_service:
         - Транзакции
         При условии, что в настройках first_start == True (по умолчанию True).
         """
+        # Ошибка в настройке (нет ключа, неверное значение) не мешает запуску:
+        # остаётся значение по умолчанию, ошибка выводится в консоль
+        try:
+            self.storage.transaction_backend = settings_manager().get_transaction_backend()
+        except (KeyError, ValueError) as e:
+            self.__setting_error("transaction_backend", e)
+
+        try:
+            self.storage.normalized_output = settings_manager().get_normalized_output()
+        except (KeyError, ValueError) as e:
+            self.__setting_error("normalized_output", e)
+
+        try:
+            size, ttl = settings_manager().get_result_cache()
+            self.storage.result_cache.configure(size, ttl)
+        except (KeyError, ValueError) as e:
+            self.__setting_error("result_cache", e)
+
+        try:
+            enabled, min_size = settings_manager().get_response_compression()
+            response_compressor.configure(enabled, min_size)
+        except (KeyError, ValueError) as e:
+            self.__setting_error("response_compression", e)
+
         try:
             settings = settings_manager()
             settings.default()
@@ -0,0 +1,169 @@
+import json
+import unittest
+import xml.etree.ElementTree as ET
+from datetime import date
+
+from src.core.storage_repository import storage_repository
+from src.core.validator import operation_exception
+from src.logics.convert_factory import convert_factory
+from src.logics.factory_entities import factory_entities
+from src.logics.model_serializer import model_serializer
+from src.models.group_model import group_model
+from src.models.nomenclature_model import nomenclature_model
+from src.models.receipt_model import receipt_model
+from src.models.transaction_model import transaction_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+"""
+Тесты форматов выдачи каждой коллекции (?type= в /api/data, /api/reference/<type>):
+формирователь и конвертация - как в main.collection_body
+"""
+class test_collection_formats(unittest.TestCase):
+
+    # Колонки CSV (и элементы XML) записей /api/data (convert_factory.convert_record):
+    # ссылки - <ключ>_id и <ключ>_name
+    DATA_FIELDS = {
+        "nomenclature": "full_name,group_id,group_name,id,name,unit_id,unit_name",
+        "unit": "base_id,base_name,factor,id,name",
+        "group": "id,name",
+        "receipt": "author,code,group,ingredients,name,portions,steps,unit",
+        "warehouse": "code,id,name",
+        "transaction": "date,id,nomenclature_id,nomenclature_name,number,quantity,"
+                       "unit_id,unit_name,warehouse_id,warehouse_name",
+    }
+    # Справочники /api/reference (convert_factory.convert) дополнительно содержат unique_code
+    REFERENCE_EXTRA = {"nomenclature", "unit", "group", "warehouse"}
+
+    def setUp(self):
+        self.repo = storage_repository()
+        gram = unit_model("грамм", 1)
+        gram.id = "U1"
+        kg = unit_model("килограмм", 1000, gram)
+        kg.id = "U2"
+        group = group_model("Бакалея")
+        group.id = "G1"
+        flour = nomenclature_model("Мука", "Мука пшеничная", group, kg)
+        flour.id = "N1"
+        wh = warehouse_model("Склад", code="MAIN")
+        wh.id = "W1"
+        tx = transaction_model("T1", flour, wh, 5, kg, date(2023, 1, 1))
+        tx.id = "T1"
+
+        # Первая единица - без базовой: колонки base_* не должны зависеть от первой строки
+        self.repo.add_unit(gram)
+        self.repo.add_unit(kg)
+        self.repo.add_group(group)
+        self.repo.add_nomenclature(flour)
+        self.repo.add_warehouse(wh)
+        self.repo.add_transaction(tx)
+        self.repo.data["receipt"].append(
+            receipt_model("Блины", [flour], "грамм", "Выпечка", "Автор", 2, ["Смешать", "Жарить"], "R1"))
+        self.converter = convert_factory()
+
+    def _body(self, fmt: str, entity_type: str, convert, stream: bool):
+        formatter = factory_entities.formatter(fmt)
+        items = self.repo.collection(entity_type)
+        if formatter.columnar:
+            return formatter.create_columns(items, convert)
+
+        options = {}
+        if formatter.tabular:
+            items, options["references"] = model_serializer.collection_references(items)
+        rows = map(convert, items)
+        if formatter.streaming and stream:
+            parts = list(formatter.iter_response(rows, **options))
+            return b"".join(parts) if parts and isinstance(parts[0], bytes) else "".join(parts)
+        return formatter.create_response(list(rows), **options)
+
+    def _each(self, fmt: str):
+        """ (тип, вид конвертации, потоковое тело, тело одной строкой) по всем коллекциям """
+        self.assertEqual(set(self.repo.data), set(self.DATA_FIELDS))
+        for entity_type in self.repo.data:
+            for kind, convert in (("data", self.converter.convert_record), ("reference", self.converter.convert)):
+                with self.subTest(entity_type=entity_type, kind=kind):
+                    streamed = self._body(fmt, entity_type, convert, True)
+                    buffered = self._body(fmt, entity_type, convert, False)
+                    yield entity_type, kind, streamed, buffered
+
+    def _fields(self, entity_type: str, kind: str) -> list:
+        fields = self.DATA_FIELDS[entity_type].split(",")
+        if kind == "reference" and entity_type in self.REFERENCE_EXTRA:
+            fields = sorted(fields + ["unique_code"])
+        return fields
+
+    def test_success_csv_every_type(self):
+        """
+        Проверка CSV каждой коллекции
+        Ожидание: заголовок - плоские поля (ссылки - <ключ>_id, <ключ>_name),
+        без объектов моделей и словарей в ячейках; поток совпадает с выводом одной строкой
+        """
+        for entity_type, kind, streamed, buffered in self._each("csv"):
+            self.assertEqual(streamed, buffered)
+            lines = buffered.split("\r\n")
+            self.assertEqual(lines[0].split(","), self._fields(entity_type, kind))
+            self.assertEqual(len([line for line in lines[1:] if line]), len(self.repo.data[entity_type]))
+            self.assertNotIn(" object at ", buffered)
+            self.assertNotIn("{", buffered)
+
+    def test_success_xml_every_type(self):
+        """
+        Проверка XML каждой коллекции
+        Ожидание: у каждого <Item> одинаковый набор элементов - те же поля, что в CSV,
+        пустая ссылка - пустые элементы; поток совпадает с выводом одной строкой
+        """
+        for entity_type, kind, streamed, buffered in self._each("xml"):
+            self.assertEqual(streamed, buffered)
+            items = ET.fromstring(buffered.encode("utf-8"))
+            self.assertEqual(len(items), len(self.repo.data[entity_type]))
+            for item in items:
+                self.assertEqual(sorted(el.tag for el in item), sorted(self._fields(entity_type, kind)))
+            self.assertNotIn("None", buffered)
+            self.assertNotIn(" object at ", buffered)
+
+    def test_success_json_every_type(self):
+        """
+        Проверка JSON каждой коллекции
+        Ожидание: вложенные ссылки остаются объектами (не плоские поля), поток совпадает с выводом одной строкой
+        """
+        for entity_type, kind, streamed, buffered in self._each("json"):
+            self.assertEqual(json.loads(streamed), json.loads(buffered))
+            rows = json.loads(buffered)
+            self.assertEqual(len(rows), len(self.repo.data[entity_type]))
+            if entity_type == "transaction":
+                self.assertEqual(rows[0]["nomenclature"]["id"], "N1")
+                self.assertNotIn("nomenclature_id", rows[0])
+
+    def test_success_markdown_receipts_only(self):
+        """
+        Проверка Markdown
+        Ожидание: только для рецептов (карточка рецепта), для прочих коллекций ?format=md - ошибка
+        """
+        for entity_type in self.repo.data:
+            with self.subTest(entity_type=entity_type):
+                exclude = () if entity_type == "receipt" else factory_entities.RECEIPT_FORMATS
+                if entity_type != "receipt":
+                    with self.assertRaises(operation_exception):
+                        factory_entities.negotiate("md", None, exclude)
+                    continue
+                self.assertEqual(factory_entities.negotiate("md", None, exclude), "md")
+                body = self._body("md", entity_type, self.converter.convert, True)
+                self.assertIn("# Блины", body)
+                self.assertNotIn("Без названия", body)
+
+    @unittest.skipUnless("columnar" in factory_entities.MIME_TYPES, "нет NumPy")
+    def test_success_columnar_every_type(self):
+        """
+        Проверка колоночного формата каждой коллекции
+        Ожидание: непустой файл для каждой коллекции
+        """
+        for entity_type in self.repo.data:
+            with self.subTest(entity_type=entity_type):
+                body = self._body("columnar", entity_type, None, False)
+                self.assertIsInstance(body, bytes)
+                self.assertTrue(body)
+
+
+if __name__ == "__main__":
+    unittest.main()
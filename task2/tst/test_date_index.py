@@ -0,0 +1,63 @@
+import unittest
+from datetime import date
+
+from src.core.date_index import date_index
+from src.core.storage_repository import storage_repository
+from src.models.nomenclature_model import nomenclature_model
+from src.models.transaction_model import transaction_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+"""
+Тесты индекса транзакций по дате
+"""
+class test_date_index(unittest.TestCase):
+
+    def setUp(self):
+        self.repo = storage_repository()
+        self.unit = unit_model("шт", 1)
+        self.item = nomenclature_model("Товар", "Товар", None, self.unit)
+        self.wh = warehouse_model("Склад")
+
+    def _tx(self, number, dt):
+        return transaction_model(number, self.item, self.wh, 1, self.unit, dt)
+
+    def test_success_period_slices(self):
+        """
+        Проверка срезов: до периода, внутри периода, после даты
+        Ожидание: границы включают start/end, порядок по дате
+        """
+        index = date_index([
+            self._tx("T3", date(2025, 3, 1)),
+            self._tx("T1", date(2025, 1, 1)),
+            self._tx("T2", date(2025, 2, 1)),
+            self._tx("T2b", date(2025, 2, 1)),
+        ])
+
+        self.assertEqual([t.number for t in index.before(date(2025, 2, 1))], ["T1"])
+        self.assertEqual([t.number for t in index.between(date(2025, 2, 1), date(2025, 3, 1))], ["T2", "T2b", "T3"])
+        self.assertEqual([t.number for t in index.after(date(2025, 2, 1), date(2025, 12, 31))], ["T3"])
+        self.assertEqual([t.number for t in index.after_in_order(date(2025, 1, 1), date(2025, 12, 31))], ["T3", "T2", "T2b"])
+        index.add(self._tx("T0", date(2025, 1, 15)))
+        self.assertEqual([t.number for t in index.after_in_order(date(2025, 1, 1), date(2025, 12, 31))],
+                         ["T3", "T2", "T2b", "T0"])
+
+    def test_success_repository_keeps_index_current(self):
+        """
+        Проверка поддержки индекса репозиторием
+        Ожидание: add_transaction (в т.ч. задним числом) и прямые изменения списка учитываются
+        """
+        self.repo.add_transaction(self._tx("T1", date(2025, 1, 10)))
+        index = self.repo.transactions_by_date()
+
+        self.repo.add_transaction(self._tx("T2", date(2025, 1, 5)))
+        self.assertIs(self.repo.transactions_by_date(), index)
+        self.assertEqual([t.number for t in index.items], ["T2", "T1"])
+
+        self.repo.transactions.append(self._tx("T3", date(2025, 1, 1)))
+        self.assertEqual([t.number for t in self.repo.transactions_by_date().items], ["T3", "T2", "T1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 from src.models.settings_model import settings_model, ResponseFormat
 from src.logics.factory_entities import factory_entities
+from src.core.validator import operation_exception
 
 """ Набор модульных тестов для проверки корректности работы фабрики форматов """
 class test_factory_entities(unittest.TestCase):
@@ -37,3 +38,48 @@ class test_factory_entities(unittest.TestCase):
         factory = factory_entities(settings)
         result = factory.create_default(self.data)
         self.assertIn("name", result)
+
+    """ Проверка выбора формата по ?format= """
+    def test_negotiate_format_parameter(self):
+        self.assertEqual(factory_entities.negotiate("CSV", "application/xml"), "csv")
+        self.assertEqual(factory_entities.negotiate("markdown"), "md")
+        with self.assertRaises(operation_exception):
+            factory_entities.negotiate("pdf")
+
+    """ Проверка выбора формата по заголовку Accept """
+    def test_negotiate_accept_header(self):
+        self.assertEqual(factory_entities.negotiate(None, "text/csv;q=0.5, application/xml"), "xml")
+        self.assertEqual(factory_entities.negotiate(None, "image/png, text/csv;q=0.1"), "csv")
+        self.assertEqual(factory_entities.negotiate(None, "text/xml;q=0, */*"), "json")
+        self.assertEqual(factory_entities.negotiate(None, None), "json")
+        # Браузер (text/html) получает JSON, несмотря на application/xml в Accept
+        browser = "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"
+        self.assertEqual(factory_entities.negotiate(None, browser), "json")
+
+    """ Проверка исключённых форматов: Markdown вне коллекций рецептов """
+    def test_negotiate_exclude(self):
+        exclude = factory_entities.RECEIPT_FORMATS
+        with self.assertRaises(operation_exception):
+            factory_entities.negotiate("md", None, exclude)
+        with self.assertRaises(operation_exception):
+            factory_entities.negotiate("markdown", None, exclude)
+        self.assertEqual(factory_entities.negotiate(None, "text/markdown", exclude), "json")
+        self.assertEqual(factory_entities.negotiate(None, "text/markdown, text/csv;q=0.5", exclude), "csv")
+        self.assertEqual(factory_entities.negotiate(None, "text/markdown"), "md")
+
+    """ Проверка кэша формирователей: один экземпляр на формат и pretty """
+    def test_formatter_cached(self):
+        csv_formatter = factory_entities.formatter("csv")
+        self.assertIs(factory_entities.formatter("CSV"), csv_formatter)
+        self.assertIs(factory_entities(settings_model(response_format=ResponseFormat.CSV)).default_formatter(), csv_formatter)
+        self.assertIsNot(factory_entities.formatter("json", pretty=True), factory_entities.formatter("json"))
+        self.assertTrue(factory_entities.formatter("json", pretty=True).pretty)
+
+    """ Проверка потокового вывода каждого формата: части совпадают с ответом одной строкой """
+    def test_iter_response_equals_create_response(self):
+        rows = [{"name": f"Тест {i}", "unit": "грамм", "steps": ["a", "b"]} for i in range(5)]
+        for fmt in factory_entities.MIME_TYPES:
+            for pretty in (False, True):
+                formatter = factory_entities.formatter(fmt, pretty)
+                joiner = b"" if formatter.columnar else ""
+                self.assertEqual(joiner.join(formatter.iter_response(iter(rows))), formatter.create_response(rows))
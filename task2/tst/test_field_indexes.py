@@ -0,0 +1,96 @@
+import random
+import unittest
+
+from src.core.filter_utils import FilterUtils
+from src.core.filters_enum import FilterType
+from src.core.storage_repository import storage_repository
+from src.models.filter_dto import FilterDTO
+from src.models.group_model import group_model
+from src.models.nomenclature_model import nomenclature_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+"""
+Тесты индексов по полям (хеш-индекс для EQUALS, триграммы для LIKE)
+"""
+class test_field_indexes(unittest.TestCase):
+
+    WORDS = ("Мука", "Сахар", "Соль", "Молоко", "Масло", "Яйца", "Рис", "Гречка")
+
+    def setUp(self):
+        rnd = random.Random(13)
+        self.repo = storage_repository()
+        unit = unit_model("грамм", 1)
+        self.groups = [group_model(name) for name in ("Бакалея", "Молочные продукты", "Крупы")]
+
+        for i in range(500):
+            name = f"{rnd.choice(self.WORDS)} {rnd.choice(self.WORDS).lower()} {i}"
+            self.repo.add_nomenclature(nomenclature_model(name, name, rnd.choice(self.groups), unit))
+        for code in ("MAIN", "RES", "OUT"):
+            self.repo.add_warehouse(warehouse_model(f"Склад {code}", code=code))
+
+    def _assert_same_as_scan(self, entity_type, filters):
+        collection = self.repo.data[entity_type]
+        expected = FilterUtils.apply(list(collection), filters, entity_type="scan")
+        actual = FilterUtils.apply(collection, filters, entity_type=entity_type)
+        self.assertEqual(actual, expected, filters)
+        return actual
+
+    def test_success_indexes_declared(self):
+        """
+        Проверка объявленных индексов
+        Ожидание: индексы есть у nomenclature.name, nomenclature.group.name и warehouse.code
+        """
+        self.assertIsNotNone(self.repo.nomenclatures.get_field_index("Name"))
+        self.assertIsNotNone(self.repo.nomenclatures.get_field_index("group.name"))
+        self.assertIsNotNone(self.repo.warehouses.get_field_index("code"))
+        self.assertIsNone(self.repo.nomenclatures.get_field_index("full_name"))
+
+    def test_success_results_equal_full_scan(self):
+        """
+        Проверка фильтров через индексы
+        Ожидание: результат и порядок совпадают с полным перебором
+        """
+        cases = (
+            ("nomenclature", [FilterDTO("name", "мука", FilterType.LIKE)]),
+            ("nomenclature", [FilterDTO("name", "ол", FilterType.LIKE)]),
+            ("nomenclature", [FilterDTO("name", "сахар соль 10", FilterType.LIKE)]),
+            ("nomenclature", [FilterDTO("name", "несуществующий", FilterType.LIKE)]),
+            ("nomenclature", [FilterDTO("group.name", "крупы", FilterType.EQUALS)]),
+            ("nomenclature", [FilterDTO("group.name", "Бакалея", FilterType.EQUALS),
+                              FilterDTO("name", "мас", FilterType.LIKE),
+                              FilterDTO("full_name", "1", FilterType.LIKE)]),
+            ("warehouse", [FilterDTO("code", "res", FilterType.EQUALS)]),
+        )
+        for entity_type, filters in cases:
+            self._assert_same_as_scan(entity_type, filters)
+
+    def test_success_index_candidates_only(self):
+        """
+        Проверка сужения по индексу
+        Ожидание: LIKE по триграммам возвращает только позиции подходящих объектов
+        """
+        index = self.repo.nomenclatures.get_field_index("name")
+        positions = index.lookup("LIKE", "гречка рис")
+        self.assertTrue(positions)
+        self.assertEqual(positions, sorted(positions))
+        self.assertTrue(all("гречка рис" in self.repo.nomenclatures[p].name.lower() for p in positions))
+
+    def test_success_index_kept_current(self):
+        """
+        Проверка актуальности индекса
+        Ожидание: добавленный и удалённый объекты учитываются
+        """
+        unit = self.repo.nomenclatures[0].unit
+        item = nomenclature_model("Кофе зерновой", "Кофе", self.groups[0], unit)
+        self.repo.add_nomenclature(item)
+        filters = [FilterDTO("name", "кофе", FilterType.LIKE)]
+        self.assertEqual(self._assert_same_as_scan("nomenclature", filters), [item])
+
+        self.repo.nomenclatures.remove(self.repo.nomenclatures[0])
+        self.assertEqual(self._assert_same_as_scan("nomenclature", filters), [item])
+
+
+if __name__ == "__main__":
+    unittest.main()
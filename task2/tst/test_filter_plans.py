@@ -0,0 +1,66 @@
+import unittest
+
+from src.core.filter_utils import FilterUtils, field_accessor
+from src.core.filters_enum import FilterType
+from src.models.filter_dto import FilterDTO
+from src.models.group_model import group_model
+from src.models.nomenclature_model import nomenclature_model
+from src.models.unit_model import unit_model
+
+
+"""
+Тесты скомпилированных планов фильтрации
+"""
+class test_filter_plans(unittest.TestCase):
+
+    def setUp(self):
+        gram = unit_model("грамм", 1)
+        group = group_model("Бакалея")
+        self.items = [
+            nomenclature_model("Мука", "Мука пшеничная", group, gram),
+            nomenclature_model("Сахар", "Сахар белый", group, gram),
+        ]
+        self.rows = [
+            {"Номенклатура": item.to_dict(), "Склад": {"name": "Все склады"}, "Приход": 10.0 * i, "Конечный остаток": 5}
+            for i, item in enumerate(self.items)
+        ]
+
+    def test_success_accessor_matches_get_nested_value(self):
+        """
+        Проверка скомпилированного пути
+        Ожидание: значение совпадает с FilterUtils.get_nested_value для моделей и словарей
+        """
+        for objects, paths in (
+            (self.items, ("name", "NAME", "unit.name", "group.Name", "missing", "unit.missing.name")),
+            (self.rows, ("Номенклатура.name", "номенклатура.NAME", "Склад.name", "приход",
+                         "Конечный Остаток", "конечныйостаток", "Единица.name")),
+        ):
+            for path in paths:
+                accessor = field_accessor(path)
+                for obj in objects:
+                    self.assertEqual(accessor(obj), FilterUtils.get_nested_value(obj, path), path)
+
+    def test_success_accessor_cached_by_entity_and_path(self):
+        """
+        Проверка кэша планов
+        Ожидание: один accessor на (тип сущности, путь)
+        """
+        first = FilterUtils.accessor("nomenclature", "group.name")
+        self.assertIs(FilterUtils.accessor("nomenclature", "group.name"), first)
+        self.assertIsNot(FilterUtils.accessor("osv_row", "group.name"), first)
+
+    def test_success_compiled_plan_normalizes_needle_once(self):
+        """
+        Проверка плана фильтра
+        Ожидание: искомое значение нормализовано при компиляции, сравнение выбрано по типу
+        """
+        plan = FilterUtils.compile_one(FilterDTO("Номенклатура.name", "  МУКА ", FilterType.EQUALS), "osv_row")
+        self.assertEqual(plan.needle, "мука")
+        self.assertEqual([plan.matches(r) for r in self.rows], [True, False])
+
+        filters = [FilterDTO("номенклатура.name", "а", FilterType.LIKE), FilterDTO("Приход", "10.0", FilterType.EQUALS)]
+        self.assertEqual(FilterUtils.apply(self.rows, filters), [self.rows[1]])
+
+
+if __name__ == "__main__":
+    unittest.main()
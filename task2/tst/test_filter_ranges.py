@@ -0,0 +1,134 @@
+import random
+import unittest
+from datetime import date, timedelta
+
+from src.core.filter_engine import filter_engine
+from src.core.filter_parser import filter_parser
+from src.core.filter_utils import FilterUtils
+from src.core.filters_enum import FilterType
+from src.core.storage_repository import storage_repository
+from src.logics.osv_service import OSVPrototype
+from src.models.filter_dto import FilterDTO
+from src.models.nomenclature_model import nomenclature_model
+from src.models.transaction_model import transaction_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+"""
+Тесты фильтров GREATER / LESS / BETWEEN / IN и отсортированных индексов
+"""
+class test_filter_ranges(unittest.TestCase):
+
+    def setUp(self):
+        rnd = random.Random(15)
+        self.repo = storage_repository()
+        unit = unit_model("шт", 1); unit.id = "U1"
+        wh = warehouse_model("Склад", code="MAIN"); wh.id = "W1"
+        self.items = [nomenclature_model(f"Товар {i}", f"Товар {i}", None, unit) for i in range(4)]
+        for i, item in enumerate(self.items):
+            item.id = f"N{i}"
+        self.repo.add_unit(unit)
+        self.repo.add_warehouse(wh)
+        for item in self.items:
+            self.repo.add_nomenclature(item)
+
+        for i in range(300):
+            day = date(2023, 1, 1) + timedelta(days=rnd.randint(0, 180))
+            self.repo.add_transaction(transaction_model(
+                f"T{i}", rnd.choice(self.items), wh, rnd.randint(-20, 40), unit, day))
+
+    def _assert_same_as_scan(self, filters):
+        expected = FilterUtils.apply(list(self.repo.transactions), filters, entity_type="range_scan")
+        actual = FilterUtils.apply(self.repo.transactions, filters, entity_type="transaction")
+        self.assertEqual(actual, expected, filters)
+        return actual
+
+    def test_success_typed_comparison(self):
+        """
+        Проверка типизированного сравнения
+        Ожидание: числа сравниваются как числа, даты - как даты (а не строки)
+        """
+        rows = [{"qty": 9.5, "day": date(2023, 1, 9)}, {"qty": 10, "day": date(2023, 1, 10)}, {"qty": 100.0, "day": date(2023, 2, 1)}]
+        self.assertEqual(FilterUtils.apply(rows, [FilterDTO("qty", "10", FilterType.GREATER)]), rows[2:])
+        self.assertEqual(FilterUtils.apply(rows, [FilterDTO("qty", 10, FilterType.LESS)]), rows[:1])
+        self.assertEqual(FilterUtils.apply(rows, [FilterDTO("day", ["2023-01-10", "2023-02-01"], FilterType.BETWEEN)]), rows[1:])
+        self.assertEqual(FilterUtils.apply(rows, [FilterDTO("qty", ["10", 100], FilterType.IN)]), rows[1:])
+        self.assertEqual(FilterUtils.apply(rows, [FilterDTO("qty", "не число", FilterType.GREATER)]), [])
+
+        self.assertEqual(filter_engine.filter(rows, [FilterDTO("qty", "9.9", FilterType.GREATER)]), rows[1:])
+        self.assertEqual(filter_engine.filter(rows, [FilterDTO("day", [date(2023, 1, 1), "2023-01-09"], FilterType.BETWEEN)]), rows[:1])
+
+    def test_success_sorted_index_equals_scan(self):
+        """
+        Проверка отсортированного индекса transaction.date (quantity - перебором)
+        Ожидание: результат и порядок совпадают с полным перебором
+        """
+        self.assertIsNotNone(self.repo.transactions.get_field_index("date"))
+        self.assertIsNone(self.repo.transactions.get_field_index("quantity"))
+        cases = (
+            [FilterDTO("date", "2023-03-01", FilterType.GREATER)],
+            [FilterDTO("date", date(2023, 2, 1), FilterType.LESS)],
+            [FilterDTO("date", ["2023-02-01", "2023-02-28"], FilterType.BETWEEN)],
+            [FilterDTO("quantity", 0, FilterType.LESS), FilterDTO("date", ["2023-04-01", "2023-05-01"], FilterType.BETWEEN)],
+            [FilterDTO("quantity", ["5", 7, 40], FilterType.IN), FilterDTO("nomenclature.name", "товар 1", FilterType.EQUALS)],
+            [FilterDTO("quantity", ["30", "10"], FilterType.BETWEEN)],
+            [FilterDTO("date", "вчера", FilterType.GREATER)],
+        )
+        for filters in cases:
+            self._assert_same_as_scan(filters)
+
+    def test_success_sorted_index_kept_current(self):
+        """
+        Проверка актуальности отсортированного индекса
+        Ожидание: проводка задним числом дописывается в конец без вставки и попадает
+        в диапазон; пары упорядочиваются один раз при первом поиске
+        """
+        t = transaction_model("OLD", self.items[0], self.repo.warehouses[0], 1, self.repo.units[0], date(2022, 12, 31))
+        self.repo.add_transaction(t)
+        index = self.repo.transactions.get_field_index("date")
+        self.assertFalse(index.is_sorted)
+        self.assertEqual(index.keys[-1], t.date)
+        self.assertEqual(self._assert_same_as_scan([FilterDTO("date", "2023-01-01", FilterType.LESS)]), [t])
+        self.assertTrue(index.is_sorted)
+        self.assertEqual(index.keys, sorted(index.keys))
+
+    def test_success_osv_amount_filters(self):
+        """
+        Проверка фильтров по суммам ОСВ
+        Ожидание: сравнение по числу, а не по строковому представлению
+        """
+        proto = OSVPrototype(self.repo)
+        rows = proto.generate(date(2023, 3, 1), date(2023, 3, 31))
+        threshold = sorted(r.incoming for r in rows)[1]
+        filtered = proto.generate(date(2023, 3, 1), date(2023, 3, 31), filters=[FilterDTO("Приход", threshold, FilterType.GREATER)])
+        self.assertEqual([r.item for r in filtered], [r.item for r in rows if r.incoming > threshold])
+
+    def test_success_parse_new_types(self):
+        """
+        Проверка разбора фильтров
+        Ожидание: новые типы принимаются, значение неверной формы - ошибка
+        """
+        parsed = filter_parser.parse([{"field_name": "quantity", "value": [1, 5], "filter_type": "BETWEEN"},
+                                      {"field_name": "quantity", "value": [1, 5], "filter_type": "between"}])
+        self.assertEqual([f.filter_type for f in parsed], [FilterType.BETWEEN, FilterType.BETWEEN])
+        dto = FilterDTO.from_dict({"field_name": "quantity", "value": ["1"], "filter_type": "in"})
+        self.assertEqual(dto.filter_type, FilterType.IN)
+
+    def test_fail_invalid_range_value(self):
+        """
+        Проверка формы значения
+        Ожидание: BETWEEN без двух границ и пустой IN отклоняются
+        """
+        with self.assertRaises(ValueError):
+            filter_parser.parse([{"field_name": "quantity", "value": 5, "filter_type": "BETWEEN"}])
+        with self.assertRaises(ValueError):
+            filter_parser.parse([{"field_name": "quantity", "value": 5, "filter_type": "unknown"}])
+        with self.assertRaises(ValueError):
+            FilterDTO.from_dict({"field_name": "quantity", "value": [], "filter_type": "IN"})
+        with self.assertRaises(ValueError):
+            FilterDTO.from_dict({"field_name": "quantity", "value": [1, 2], "filter_type": "greater"})
+
+
+if __name__ == "__main__":
+    unittest.main()
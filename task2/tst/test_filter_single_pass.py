@@ -0,0 +1,131 @@
+import types
+import unittest
+
+from src.core.filter_engine import filter_engine
+from src.core.filter_utils import FilterUtils
+from src.core.filters_enum import FilterType
+from src.logics.convert_factory import convert_factory
+from src.models.filter_dto import FilterDTO
+
+
+class counted_row:
+    """Объект, считающий обращения к полям"""
+    reads = 0
+
+    def __init__(self, name, code):
+        self._name = name
+        self._code = code
+
+    @property
+    def name(self):
+        counted_row.reads += 1
+        return self._name
+
+    @property
+    def code(self):
+        counted_row.reads += 1
+        return self._code
+
+
+"""
+Тесты однопроходной фильтрации с упорядочиванием по селективности
+"""
+class test_filter_single_pass(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = [{"name": f"Товар {i}", "code": f"C{i % 10}", "group": {"name": "Бакалея" if i % 2 else "Молочка"}}
+                     for i in range(200)]
+        self.filters = [
+            FilterDTO("name", "товар 1", FilterType.LIKE),
+            FilterDTO("code", "c3", FilterType.EQUALS),
+            FilterDTO("group.name", "бакалея", FilterType.EQUALS),
+        ]
+
+    @staticmethod
+    def _sequential(rows, filters):
+        """Прежняя схема: фильтры применяются по очереди, каждый - к списку после предыдущего"""
+        for f in filters:
+            needle = FilterUtils.normalize(f.value)
+            kept = []
+            for r in rows:
+                value = FilterUtils.normalize(str(FilterUtils.get_nested_value(r, f.field_name)))
+                if (f.filter_type == FilterType.LIKE and needle in value) or value == needle:
+                    kept.append(r)
+            rows = kept
+        return rows
+
+    def test_success_generator_matches_sequential_filtering(self):
+        """
+        Проверка однопроходной фильтрации
+        Ожидание: генератор отдаёт те же объекты в том же порядке
+        """
+        result = FilterUtils.iterate(self.rows, self.filters, entity_type="single_pass_rows")
+        self.assertIsInstance(result, types.GeneratorType)
+        self.assertEqual(list(result), self._sequential(self.rows, self.filters))
+
+    def test_success_order_learned_from_previous_runs(self):
+        """
+        Проверка порядка фильтров
+        Ожидание: после первого обхода самый селективный фильтр проверяется первым
+        """
+        plans = FilterUtils.compile(self.filters, "learned_rows")
+        self.assertEqual(FilterUtils.order(plans)[0].filter_type, "EQUALS")
+
+        list(FilterUtils.iterate(self.rows, self.filters, entity_type="learned_rows"))
+        ordered = [p.accessor.field_path for p in FilterUtils.order(plans)]
+        self.assertEqual(ordered[0], "code")
+        self.assertEqual(ordered[-1], "group.name")
+
+    def test_success_estimate_used_without_statistics(self):
+        """
+        Проверка внешней оценки селективности (например, по кардинальности индекса)
+        Ожидание: при отсутствии статистики используется оценка
+        """
+        plans = FilterUtils.compile(self.filters, "estimated_rows")
+        estimate = {"name": 0.01, "code": 0.5, "group.name": 0.9}
+        ordered = FilterUtils.order(plans, lambda p: estimate[p.accessor.field_path])
+        self.assertEqual([p.accessor.field_path for p in ordered], ["name", "code", "group.name"])
+
+    def test_success_statistics_bounded(self):
+        """
+        Проверка размера статистики селективности
+        Ожидание: произвольные значения фильтров из запросов не растят её больше MAX_SELECTIVITY
+        """
+        for i in range(FilterUtils.MAX_SELECTIVITY + 10):
+            list(FilterUtils.iterate(self.rows[:1], [FilterDTO("name", f"запрос {i}", FilterType.EQUALS)],
+                                     entity_type="bounded_rows"))
+        self.assertLessEqual(len(FilterUtils._selectivity), FilterUtils.MAX_SELECTIVITY)
+
+    def test_success_short_circuit(self):
+        """
+        Проверка раннего выхода
+        Ожидание: для отклонённого объекта следующие фильтры не читаются
+        """
+        rows = [counted_row(f"Товар {i}", "X") for i in range(10)]
+        filters = [FilterDTO("name", "нет такого", FilterType.EQUALS), FilterDTO("code", "x", FilterType.EQUALS)]
+        counted_row.reads = 0
+        self.assertEqual(list(FilterUtils.iterate(rows, filters, entity_type="short_circuit_rows")), [])
+        self.assertEqual(counted_row.reads, 10)
+
+    def test_success_streaming_conversion(self):
+        """
+        Проверка потоковой конвертации
+        Ожидание: convert_collection принимает генератор фильтрации
+        """
+        stream = FilterUtils.iterate(self.rows, self.filters[:1], entity_type="stream_rows")
+        converted = convert_factory().convert_collection(stream)
+        self.assertEqual([r["name"] for r in converted], [r["name"] for r in self._sequential(self.rows, self.filters[:1])])
+
+    def test_success_filter_engine_single_pass(self):
+        """
+        Проверка filter_engine
+        Ожидание: результат - объекты, прошедшие все фильтры
+        """
+        filters = [FilterDTO("code", "C3", FilterType.EQUALS), FilterDTO("group.name", "Бакалея", FilterType.EQUALS)]
+        result = filter_engine.filter(self.rows, filters)
+        self.assertEqual(len(result), 20)
+        self.assertTrue(all(r["code"] == "C3" for r in result))
+
+
+if __name__ == "__main__":
+    unittest.main()
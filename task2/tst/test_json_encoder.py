@@ -0,0 +1,148 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import date, datetime
+
+from src.core.filters_enum import FilterType
+from src.core.json_encoder import json_encoder, orjson
+from src.core.serializer import Serializer
+from src.logics.reference_normalizer import reference_normalizer
+from src.logics.response_json import response_json
+from src.models.balance_model import balance_model
+from src.models.group_model import group_model
+from src.models.nomenclature_model import nomenclature_model
+from src.models.osv_row_model import osv_row_model
+from src.models.transaction_model import transaction_model
+from src.models.turnover_snapshot_model import turnover_snapshot_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+"""
+Тесты кодировщика JSON (orjson / стандартный json)
+"""
+class test_json_encoder(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = json_encoder.backend
+        unit = unit_model("шт", 1)
+        unit.id = "U1"
+        item = nomenclature_model("Мука", "Мука \"высший\"\nсорт", group_model("Бакалея"), unit)
+        item.id = "N1"
+        wh = warehouse_model("Склад", code="MAIN")
+        wh.id = "W1"
+        tx = transaction_model("T1", item, wh, 5, unit, date(2023, 1, 10))
+        tx.id = "T1"
+        self.transactions = [tx]
+        self.data = {
+            "date": date(2023, 1, 1),
+            "moment": datetime(2023, 1, 1, 12, 30),
+            "type": FilterType.BETWEEN,
+            "transaction": tx,
+            "balance": balance_model(wh, item, unit, 1.5),
+            "snapshot": turnover_snapshot_model("W1", "N1", "U1", 2.0, date(2023, 1, 1)),
+            "rows": [osv_row_model(wh, item, unit, 0, 10.0, 2.5)],
+            "plain": [1, 2.5, None, True, "строка"],
+        }
+
+    def tearDown(self):
+        json_encoder.use(self.backend)
+
+    def _backends(self):
+        return ("orjson", "json") if orjson is not None else ("json",)
+
+    def test_success_native_types(self):
+        """
+        Проверка кодирования дат, Enum и моделей без предварительной конвертации
+        Ожидание: результат совпадает с json.dumps после Serializer.to_dict
+        """
+        expected = json.loads(json.dumps(Serializer.dump_jsonable(self.data), ensure_ascii=False, default=str))
+        for backend in self._backends():
+            json_encoder.use(backend)
+            decoded = json.loads(json_encoder.dumps(self.data))
+            self.assertEqual(decoded["date"], "2023-01-01")
+            self.assertEqual(decoded["moment"], "2023-01-01T12:30:00")
+            self.assertEqual(decoded["type"], "between")
+            self.assertEqual(decoded["balance"], expected["balance"])
+            self.assertEqual(decoded["snapshot"], expected["snapshot"])
+            self.assertEqual(decoded["transaction"]["nomenclature"]["unit"]["id"], "U1")
+            self.assertEqual(decoded["rows"][0]["item"]["id"], "N1")
+
+    def test_success_backends_same_output(self):
+        """
+        Проверка бэкендов
+        Ожидание: компактный вывод и вывод с отступом 2 одинаковы; отступ 2 - как json.dumps(indent=2)
+        """
+        outputs = set()
+        for backend in self._backends():
+            json_encoder.use(backend)
+            compact, pretty = json_encoder.dumps(self.data), json_encoder.dumps(self.data, indent=2)
+            self.assertNotIn("\n", compact)
+            self.assertEqual(pretty, json.dumps(json.loads(compact), ensure_ascii=False, indent=2))
+            self.assertEqual(json_encoder.dumpb(self.data), compact.encode("utf-8"))
+            outputs.add((compact, pretty))
+        self.assertEqual(len(outputs), 1)
+
+    @unittest.skipIf(orjson is None, "orjson не установлен")
+    def test_success_backends_same_bytes(self):
+        """
+        Проверка байтов orjson и стандартного json на дробных числах, не-ASCII строках и датах
+        Ожидание: байты совпадают (дробные - без экспоненты), с экспонентой - совпадают значения
+        """
+        payload = {
+            "floats": [0.1, 0.1 + 0.2, 1 / 3, -0.0, 1.5, 12.25, 1000.0, 0.0001, 123456789.123, 9999999999999998.0],
+            "text": ["Мука пшеничная", "Склад №1 «Основной»", "emoji 😀", "кавычки \" и \\", "строка\nперенос\t\x01"],
+            "dates": [date(2023, 1, 1), datetime(2023, 1, 1, 12, 30, 5), datetime(2023, 1, 1, 12, 30, 5, 123456)],
+            "Ключ": {"вложенный": [1, -2, 2 ** 63 - 1, None, True, False]},
+        }
+        for indent in (None, 2):
+            json_encoder.use("orjson")
+            fast = json_encoder.dumpb(payload, indent)
+            json_encoder.use("json")
+            self.assertEqual(fast, json_encoder.dumpb(payload, indent))
+
+        exponent = [1e16, 1e-05, 2.5e-05, 1.7976931348623157e308]
+        json_encoder.use("orjson")
+        fast = json_encoder.dumpb(exponent)
+        json_encoder.use("json")
+        slow = json_encoder.dumpb(exponent)
+        self.assertNotEqual(fast, slow)
+        self.assertEqual(json.loads(fast), json.loads(slow))
+
+    def test_success_stream_compact(self):
+        """
+        Проверка компактного потокового вывода
+        Ожидание: массив и нормализованный документ совпадают с json_encoder.dumps
+        """
+        for backend in self._backends():
+            json_encoder.use(backend)
+            rows = self.transactions * 3
+            self.assertEqual("".join(response_json.iter_array(iter(rows), indent=None, chunk_size=1)),
+                             json_encoder.dumps(rows))
+            for indent in (None, 2):
+                expected = json_encoder.dumps(reference_normalizer().document(rows), indent)
+                normalizer = reference_normalizer()
+                stream = response_json.iter_normalized(normalizer.iter_rows(rows), normalizer, indent)
+                self.assertEqual("".join(stream), expected)
+
+    def test_success_file_round_trip(self):
+        """
+        Проверка записи и чтения файла
+        Ожидание: прочитанные данные совпадают с кодированными
+        """
+        path = os.path.join(tempfile.mkdtemp(), "data.json")
+        json_encoder.dump_file(self.data, path)
+        self.assertEqual(json_encoder.load_file(path), json.loads(json_encoder.dumps(self.data)))
+
+    def test_fail_unknown_backend(self):
+        """
+        Проверка выбора бэкенда
+        Ожидание: неизвестный бэкенд - ValueError
+        """
+        with self.assertRaises(ValueError):
+            json_encoder.use("ujson")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import json
+import unittest
+from datetime import date, datetime
+
+from src.logics.convert_factory import convert_factory
+from src.logics.model_serializer import model_serializer
+from src.models.balance_model import balance_model
+from src.models.group_model import group_model
+from src.models.nomenclature_model import nomenclature_model
+from src.models.osv_row_model import osv_row_model
+from src.models.receipt_model import receipt_model
+from src.models.transaction_model import transaction_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+class with_callback:
+    """Объект с атрибутом-функцией: такие атрибуты в вывод не попадают"""
+
+    def __init__(self, item):
+        self.item = item
+        self.callback = lambda: None
+        self.code = "CB"
+
+
+"""
+Тесты сериализаторов моделей с подготовленными по типам полями
+"""
+class test_model_serializer(unittest.TestCase):
+
+    def setUp(self):
+        gram = unit_model("грамм", 1)
+        kg = unit_model("килограмм", 1000, gram)
+        group = group_model("Бакалея")
+        flour = nomenclature_model("Мука", "Мука пшеничная", group, kg)
+        sugar = nomenclature_model("Сахар")
+        wh = warehouse_model("Склад", code="MAIN")
+        tx = transaction_model("T1", flour, wh, 5, kg, date(2023, 1, 10))
+        tx.id = "TX1"
+
+        self.objects = [
+            gram, kg, group, flour, sugar, wh, tx,
+            receipt_model("Блины", [flour, sugar], "порция", "Выпечка", steps=["Смешать", "Жарить"]),
+            balance_model(wh, flour, kg, 12.5),
+            osv_row_model(None, flour, gram, 0, 10.0, 2.5),
+            with_callback(flour),
+            {"name": "Строка", "code": "X", "items": [flour, None, 1, "a", True], "when": datetime(2023, 1, 1, 12)},
+            [tx, {"extra": 1}, date(2023, 5, 1)],
+            None, 3, "строка",
+        ]
+
+    def test_success_same_output_as_reflective(self):
+        """
+        Проверка подготовленных полей
+        Ожидание: результат и порядок ключей совпадают с рефлексивной конвертацией
+        """
+        factory = convert_factory()
+        for obj in self.objects:
+            expected = json.dumps(factory.convert_reflective(obj), ensure_ascii=False)
+            self.assertEqual(json.dumps(factory.convert(obj), ensure_ascii=False), expected)
+            # Повтор - по уже подготовленным полям
+            self.assertEqual(json.dumps(factory.convert(obj), ensure_ascii=False), expected)
+
+    def test_success_compiled_once_per_shape(self):
+        """
+        Проверка кэша
+        Ожидание: один кортеж полей на тип и набор атрибутов модели
+        """
+        first, second = nomenclature_model("А", "А"), nomenclature_model("Б", "Б")
+        model_serializer.convert(first)
+        compiled = dict(model_serializer._compiled)
+        model_serializer.convert(second)
+        self.assertEqual(model_serializer._compiled, compiled)
+        self.assertIn((nomenclature_model, tuple(vars(first))), compiled)
+
+    def test_success_optional_attributes(self):
+        """
+        Проверка экземпляров одного класса с разным набором атрибутов
+        Ожидание: для каждого набора свои ключи
+        """
+        short, full = nomenclature_model("А"), nomenclature_model("Б", "Полное", group_model("Г"))
+        self.assertNotIn("group", model_serializer.convert(short))
+        self.assertEqual(model_serializer.convert(full)["group"]["name"], "Г")
+
+
+if __name__ == "__main__":
+    unittest.main()
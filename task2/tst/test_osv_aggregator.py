@@ -0,0 +1,147 @@
+import math
+import random
+import unittest
+from datetime import date, timedelta
+
+from src.core.storage_repository import storage_repository
+from src.logics.osv_aggregator import OSVAggregator
+from src.logics.osv_service import OSVPrototype
+from src.models.group_model import group_model
+from src.models.nomenclature_model import nomenclature_model
+from src.models.transaction_model import transaction_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+"""
+Тесты однопроходной агрегации оборотов для ОСВ
+"""
+class test_osv_aggregator(unittest.TestCase):
+
+    def setUp(self):
+        self.repo = storage_repository()
+
+        self.gram = unit_model("грамм", 1); self.gram.id = "U1"
+        self.kg = unit_model("килограмм", 1000, base=self.gram); self.kg.id = "U2"
+        group = group_model("Бакалея"); group.id = "G1"
+
+        self.flour = nomenclature_model("Мука", "Мука", group, self.gram); self.flour.id = "N1"
+        self.sugar = nomenclature_model("Сахар", "Сахар", group, self.gram); self.sugar.id = "N2"
+        self.salt = nomenclature_model("Соль", "Соль", group, self.gram); self.salt.id = "N3"
+
+        self.main = warehouse_model("Основной склад"); self.main.id = "W1"; self.main.code = "MAIN"
+        self.res = warehouse_model("Резервный склад"); self.res.id = "W2"; self.res.code = "RES"
+
+        for u in (self.gram, self.kg):
+            self.repo.add_unit(u)
+        for n in (self.flour, self.sugar, self.salt):
+            self.repo.add_nomenclature(n)
+        for w in (self.main, self.res):
+            self.repo.add_warehouse(w)
+
+        self._tx(self.flour, self.main, 2, self.kg, date(2024, 12, 20))
+        self._tx(self.flour, self.main, 500, self.gram, date(2025, 1, 5))
+        self._tx(self.flour, self.res, -300, self.gram, date(2025, 1, 10))
+        self._tx(self.flour, self.main, 100, self.gram, date(2025, 2, 10))
+        self._tx(self.sugar, self.res, 700, self.gram, date(2025, 1, 3))
+
+    def _tx(self, nom, wh, qty, unit, dt):
+        t = transaction_model(f"T{len(self.repo.transactions)}", nom, wh, qty, unit, dt)
+        t.id = len(self.repo.transactions)
+        self.repo.add_transaction(t)
+
+    def test_success_full_key_buckets(self):
+        """
+        Проверка группировки по (склад, номенклатура, единица)
+        Ожидание: отдельные корзины для каждой комбинации, суммы в базовых единицах
+        """
+        agg = OSVAggregator(date(2025, 1, 1), date(2025, 1, 31))
+        buckets = agg.aggregate(self.repo.transactions)
+
+        self.assertEqual(len(buckets), 4)
+        kg_bucket = buckets[(self.main.unique_code, self.flour.unique_code, self.kg.unique_code)]
+        self.assertEqual(kg_bucket.opening, 2000)
+        res_bucket = buckets[(self.res.unique_code, self.flour.unique_code, self.gram.unique_code)]
+        self.assertEqual(res_bucket.outgoing, -300)
+
+    def test_success_generate_rows(self):
+        """
+        Проверка строк ОСВ после перехода на однопроходную агрегацию
+        Ожидание: по одной строке на номенклатуру, обороты за период
+        """
+        rows = OSVPrototype(self.repo).generate(date(2025, 1, 1), date(2025, 1, 31))
+        by_name = {r.item.name: r for r in rows}
+
+        self.assertEqual(len(rows), 3)
+        self.assertAlmostEqual(by_name["Мука"].opening, 2000)
+        self.assertAlmostEqual(by_name["Мука"].incoming, 500)
+        self.assertAlmostEqual(by_name["Мука"].outgoing, 300)
+        self.assertAlmostEqual(by_name["Мука"].closing, 2200)
+        self.assertIs(by_name["Мука"].warehouse, self.main)
+        self.assertIs(by_name["Мука"].unit, self.gram)
+        self.assertAlmostEqual(by_name["Сахар"].incoming, 700)
+        self.assertAlmostEqual(by_name["Соль"].closing, 0)
+
+    def test_success_generate_with_warehouse(self):
+        """
+        Проверка ограничения ОСВ складом по коду
+        Ожидание: учитываются только транзакции резервного склада
+        """
+        rows = OSVPrototype(self.repo).generate(date(2025, 1, 1), date(2025, 1, 31), "res")
+        by_name = {r.item.name: r for r in rows}
+
+        self.assertAlmostEqual(by_name["Мука"].opening, 0)
+        self.assertAlmostEqual(by_name["Мука"].outgoing, 300)
+        self.assertIs(by_name["Соль"].warehouse, self.res)
+
+    def test_success_label_from_first_inserted(self):
+        """
+        Проверка подписи строки при проводке задним числом
+        Ожидание: склад и единица - первой добавленной проводки (как при полном переборе),
+        а не самой ранней по дате, в том числе для NumPy-движка
+        """
+        self._tx(self.sugar, self.main, 5, self.kg, date(2024, 11, 1))
+
+        for engine in ("python", "numpy"):
+            rows = OSVPrototype(self.repo, engine=engine).generate(date(2025, 1, 1), date(2025, 1, 31))
+            sugar = next(r for r in rows if r.item is self.sugar)
+            self.assertIs(sugar.warehouse, self.res)
+            self.assertAlmostEqual(sugar.opening, 5000)
+            self.assertEqual([r.item for r in rows], [self.flour, self.sugar, self.salt])
+
+    def test_success_label_for_future_only_item(self):
+        """
+        Проверка номенклатуры, у которой движения только после периода
+        Ожидание: нулевые обороты, склад и единица - её первой проводки
+        """
+        rows = OSVPrototype(self.repo).generate(date(2024, 1, 1), date(2024, 1, 31))
+        sugar = next(r for r in rows if r.item is self.sugar)
+        self.assertEqual((sugar.warehouse, sugar.unit), (self.res, self.gram))
+        self.assertAlmostEqual(sugar.closing, 0)
+
+    def test_success_equivalent_to_per_item_scan(self):
+        """
+        Проверка дробных оборотов против перебора транзакций по каждой номенклатуре
+        Ожидание: суммы эквивалентны с точностью до округления (порядок сложения другой)
+        """
+        rnd = random.Random(3)
+        day = date(2024, 6, 1)
+        for _ in range(400):
+            day += timedelta(days=rnd.randint(0, 2))
+            self._tx(rnd.choice((self.flour, self.sugar, self.salt)), rnd.choice((self.main, self.res)),
+                     rnd.uniform(-50, 100), rnd.choice((self.gram, self.kg)), day)
+
+        start, end = date(2025, 1, 1), date(2025, 3, 31)
+        rows = OSVPrototype(self.repo).generate(start, end)
+        for row in rows:
+            moves = [t for t in self.repo.transactions if t.nomenclature is row.item]
+            opening = sum(t.unit.to_base(t.quantity) for t in moves if t.date < start)
+            period = [t.unit.to_base(t.quantity) for t in moves if start <= t.date <= end]
+            incoming = sum(q for q in period if q > 0)
+            outgoing = -sum(q for q in period if q < 0)
+            for actual, expected in ((row.opening, opening), (row.incoming, incoming), (row.outgoing, outgoing)):
+                self.assertTrue(math.isclose(actual, expected, rel_tol=1e-9, abs_tol=1e-6), (row.item.name, actual, expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import os
+import random
+import tempfile
+import unittest
+from datetime import date, timedelta
+from unittest import mock
+
+from src.core.filter_utils import FilterUtils
+from src.core.filters_enum import FilterType
+from src.core.storage_repository import storage_repository
+from src.logics.osv_numpy_engine import ENGINE_NUMPY, osv_numpy_engine
+from src.logics.osv_parallel import shutdown_pools
+from src.logics.osv_service import OSVPrototype
+from src.models.filter_dto import FilterDTO
+from src.models.group_model import group_model
+from src.models.nomenclature_model import nomenclature_model
+from src.models.transaction_model import transaction_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+"""
+Тесты фильтров ОСВ на уровне моделей: отбор номенклатуры до агрегации
+и проверка сумм на osv_row_model
+"""
+class test_osv_filter_pushdown(unittest.TestCase):
+
+    FILTERS = (
+        [FilterDTO("Номенклатура.name", "товар 1", FilterType.LIKE)],
+        [FilterDTO("номенклатура.Group.name", "крупы", FilterType.EQUALS)],
+        [FilterDTO("Номенклатура.наименование", "товар 3", FilterType.EQUALS),
+         FilterDTO("Склад.code", "main", FilterType.EQUALS)],
+        [FilterDTO("Склад.name", "склад", FilterType.LIKE), FilterDTO("Единица.name", "грамм", FilterType.EQUALS)],
+        [FilterDTO("Приход", "0", FilterType.LIKE)],
+        [FilterDTO("Конечный остаток", "0.0", FilterType.EQUALS)],
+        [FilterDTO("КонечныйОстаток", "0", FilterType.LIKE), FilterDTO("Номенклатура.group.name", "бакалея", FilterType.EQUALS)],
+        [FilterDTO("Номенклатура", "товар 2", FilterType.LIKE)],
+        [FilterDTO("name", "товар", FilterType.LIKE)],
+    )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutdown_pools()
+
+    def setUp(self):
+        self.rnd = random.Random(14)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = storage_repository()
+        self.repo.transaction_store_file = os.path.join(self.tmp.name, "transactions.col")
+
+        gram = unit_model("грамм", 1); gram.id = "U1"
+        kg = unit_model("килограмм", 1000, base=gram); kg.id = "U2"
+        groups = [group_model("Бакалея"), group_model("Крупы")]
+        for i, g in enumerate(groups):
+            g.id = f"G{i}"
+        for u in (gram, kg):
+            self.repo.add_unit(u)
+        for i in range(12):
+            n = nomenclature_model(f"Товар {i}", f"Товар {i}", groups[i % 2], gram); n.id = f"N{i}"
+            self.repo.add_nomenclature(n)
+        for i, code in enumerate(("MAIN", "RES")):
+            w = warehouse_model(f"Склад {i}", code=code); w.id = f"W{i}"
+            self.repo.add_warehouse(w)
+
+        day = date(2023, 1, 1)
+        for i in range(200):
+            day += timedelta(days=self.rnd.randint(0, 2))
+            t = transaction_model(
+                f"T{i}", self.rnd.choice(self.repo.nomenclatures[:10]), self.rnd.choice(self.repo.warehouses),
+                self.rnd.randint(-50, 100), self.rnd.choice(self.repo.units), day
+            )
+            t.id = f"TX{i}"
+            self.repo.add_transaction(t)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _dict_round_trip(self, rows, filters):
+        """Прежняя схема: строки сериализуются в словари, фильтруются и восстанавливаются по id"""
+        raw = [
+            {
+                "Склад": r.warehouse.to_dict() if r.warehouse else {"name": "Все склады"},
+                "Номенклатура": r.item.to_dict(),
+                "Единица": r.unit.to_dict() if r.unit else {},
+                "Начальный остаток": r.opening,
+                "Приход": r.incoming,
+                "Расход": r.outgoing,
+                "Конечный остаток": r.closing
+            }
+            for r in rows
+        ]
+        return [(r["Номенклатура"]["id"], r["Склад"].get("id"), r["Единица"].get("id"),
+                 r["Начальный остаток"], r["Приход"], r["Расход"])
+                for r in FilterUtils.apply(raw, filters, entity_type="osv_row_dicts")]
+
+    @staticmethod
+    def _values(rows):
+        return [(r.item.id, r.warehouse.id if r.warehouse else None, r.unit.id if r.unit else None,
+                 r.opening, r.incoming, r.outgoing) for r in rows]
+
+    def test_success_same_rows_as_dict_round_trip(self):
+        """
+        Проверка фильтров на моделях
+        Ожидание: строки совпадают с фильтрацией табличного представления
+        """
+        proto = OSVPrototype(self.repo)
+        for warehouse in (None, "RES"):
+            rows = proto.generate(date(2023, 3, 1), date(2023, 5, 31), warehouse)
+            for filters in self.FILTERS:
+                actual = self._values(proto.generate(date(2023, 3, 1), date(2023, 5, 31), warehouse, filters))
+                self.assertEqual(actual, self._dict_round_trip(rows, filters), filters)
+
+    def test_success_excluded_items_not_aggregated(self):
+        """
+        Проверка отбора номенклатуры до агрегации
+        Ожидание: движения отфильтрованных позиций не суммируются
+        """
+        seen = []
+        original = OSVPrototype.generate.__globals__["OSVAggregator"].item_allowed
+
+        def spy(aggregator, item):
+            allowed = original(aggregator, item)
+            seen.append((item.id, allowed))
+            return allowed
+
+        filters = [FilterDTO("Номенклатура.name", "товар 1", FilterType.EQUALS)]
+        self.repo.save_transactions_columnar()
+        with mock.patch("src.logics.osv_aggregator.OSVAggregator.item_allowed", spy):
+            rows = OSVPrototype(self.repo).generate(date(2023, 3, 1), date(2023, 5, 31), filters=filters)
+
+        self.assertEqual([r.item.id for r in rows], ["N1"])
+        self.assertEqual({i for i, allowed in seen if allowed}, {"N1"})
+        self.repo.transaction_store.close()
+
+    def test_success_engines_apply_item_filters(self):
+        """
+        Проверка отбора номенклатуры в NumPy-движке и пуле процессов
+        Ожидание: результат совпадает с эталонным расчётом
+        """
+        filters = [FilterDTO("Номенклатура.group.name", "крупы", FilterType.EQUALS)]
+        expected = self._values(OSVPrototype(self.repo).generate(date(2023, 3, 1), date(2023, 5, 31), filters=filters))
+        self.assertEqual(len(expected), 6)
+
+        parallel = OSVPrototype(self.repo, workers=2)
+        self.assertEqual(self._values(parallel.generate(date(2023, 3, 1), date(2023, 5, 31), filters=filters)), expected)
+        if osv_numpy_engine.available():
+            numpy = OSVPrototype(self.repo, engine=ENGINE_NUMPY)
+            full = self._values(numpy.generate(date(2023, 3, 1), date(2023, 5, 31)))
+            actual = self._values(numpy.generate(date(2023, 3, 1), date(2023, 5, 31), filters=filters))
+            self.assertEqual(actual, [r for r in full if r[0] in {e[0] for e in expected}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import math
+import os
+import random
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+from src.core.storage_repository import storage_repository
+from src.core.validator import argument_exception
+from src.logics.osv_aggregator import OSVAggregator
+from src.logics.osv_numpy_engine import osv_numpy_engine
+from src.logics.osv_service import OSVCalculator, OSVPrototype
+from src.models.group_model import group_model
+from src.models.nomenclature_model import nomenclature_model
+from src.models.transaction_model import transaction_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+"""
+Тесты NumPy-движка ОСВ: результат совпадает с эталонным расчётом на Python
+"""
+@unittest.skipUnless(osv_numpy_engine.available(), "numpy не установлен")
+class test_osv_numpy_engine(unittest.TestCase):
+
+    def setUp(self):
+        self.rnd = random.Random(3)
+        self.repo = storage_repository()
+
+        gram = unit_model("грамм", 1); gram.id = "U1"
+        kg = unit_model("килограмм", 1000, base=gram); kg.id = "U2"
+        group = group_model("Бакалея"); group.id = "G1"
+        for u in (gram, kg):
+            self.repo.add_unit(u)
+        for i in range(6):
+            n = nomenclature_model(f"Товар {i}", f"Товар {i}", group, gram); n.id = f"N{i}"
+            self.repo.add_nomenclature(n)
+        for i, code in enumerate(("MAIN", "RES")):
+            w = warehouse_model(f"Склад {i}", code=code); w.id = f"W{i}"
+            self.repo.add_warehouse(w)
+
+        self.day = date(2023, 1, 1)
+        self._add_random(400)
+
+    def _add_random(self, count, prefix="T"):
+        for i in range(count):
+            self.day += timedelta(days=self.rnd.randint(0, 2))
+            t = transaction_model(
+                f"{prefix}{i}", self.rnd.choice(self.repo.nomenclatures[:5]), self.rnd.choice(self.repo.warehouses),
+                self.rnd.randint(-50, 100), self.rnd.choice(self.repo.units), self.day
+            )
+            t.id = f"TX{prefix}{i}"
+            self.repo.add_transaction(t)
+
+    @staticmethod
+    def _values(rows):
+        return [(r.item.id, r.warehouse.id if r.warehouse else None, r.unit.id if r.unit else None,
+                 r.opening, r.incoming, r.outgoing) for r in rows]
+
+    def _assert_rows_equal(self, actual, expected):
+        self.assertEqual(len(actual), len(expected))
+        for a, e in zip(self._values(actual), self._values(expected)):
+            self.assertEqual(a[:3], e[:3])
+            for x, y in zip(a[3:], e[3:]):
+                self.assertTrue(math.isclose(x, y, abs_tol=1e-6), (a, e))
+
+    def _assert_periods_equal(self):
+        python = OSVPrototype(self.repo)
+        numpy = OSVPrototype(self.repo, "numpy")
+        for start, end, wh in (
+            (date(2023, 3, 10), date(2023, 4, 20), None),
+            (date(2023, 6, 1), date(2023, 6, 30), "RES"),
+            (date(2023, 2, 1), date(2023, 2, 1), "Склад 0"),
+            (date(2022, 1, 1), date(2022, 12, 31), None),
+            (date(1900, 1, 1), date(2100, 1, 1), None),
+        ):
+            self._assert_rows_equal(numpy.generate(start, end, wh), python.generate(start, end, wh))
+
+    def test_success_osv_matches_python(self):
+        """
+        Проверка ОСВ NumPy-движком за разные периоды и склады
+        Ожидание: строки совпадают с эталонным python-расчётом
+        """
+        self._assert_periods_equal()
+
+    def test_success_osv_matches_python_with_column_store(self):
+        """
+        Проверка ОСВ по колоночному хранилищу и новым проводкам поверх него
+        Ожидание: строки совпадают с эталонным python-расчётом
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            self.repo.transaction_store_file = os.path.join(tmp, "transactions.col")
+            self.repo.save_transactions_columnar()
+            self.day = date(2023, 3, 1)
+            self._add_random(50, prefix="L")
+
+            self._assert_periods_equal()
+            self.repo.transaction_store.close()
+
+    def test_success_arrays_follow_new_transactions(self):
+        """
+        Проверка актуальности массивов после добавления транзакции
+        Ожидание: массивы перестраиваются, результат учитывает транзакцию
+        """
+        engine = osv_numpy_engine.for_storage(self.repo)
+        self.assertIs(osv_numpy_engine.for_storage(self.repo), engine)
+
+        self._add_random(3, prefix="N")
+        self.assertIsNot(osv_numpy_engine.for_storage(self.repo), engine)
+        self._assert_periods_equal()
+
+    def test_success_balances_match_python(self):
+        """
+        Проверка остатков после даты блокировки
+        Ожидание: дельты NumPy-движка совпадают с python-расчётом
+        """
+        block, target = date(2023, 3, 31), date(2023, 7, 15)
+
+        python = OSVAggregator.balance_deltas(self.repo.transactions_by_date(), block, target)
+        numpy = osv_numpy_engine.for_storage(self.repo).balance_deltas(block, target)
+
+        self.assertEqual(set(numpy), set(python))
+        for key, value in python.items():
+            self.assertTrue(math.isclose(numpy[key], value, abs_tol=1e-6))
+
+    def test_fail_unknown_engine(self):
+        """
+        Проверка выбора неизвестного движка
+        Ожидание: argument_exception
+        """
+        with self.assertRaises(argument_exception):
+            OSVCalculator(self.repo).compute_osv(date(2023, 1, 1), date(2023, 2, 1), engine="fortran")
+
+
+if __name__ == "__main__":
+    unittest.main()
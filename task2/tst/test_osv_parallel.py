@@ -0,0 +1,122 @@
+import math
+import os
+import random
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+from src.core.storage_repository import storage_repository
+from src.logics.osv_parallel import SHARD_WAREHOUSE, OSVParallelAggregator, shutdown_pools
+from src.logics.osv_service import OSVPrototype
+from src.models.group_model import group_model
+from src.models.nomenclature_model import nomenclature_model
+from src.models.transaction_model import transaction_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+"""
+Тесты параллельного расчёта ОСВ: результат совпадает с последовательным
+"""
+class test_osv_parallel(unittest.TestCase):
+
+    PERIODS = (
+        (date(2023, 3, 10), date(2023, 4, 20), None),
+        (date(2023, 6, 1), date(2023, 6, 30), "RES"),
+        (date(2023, 2, 1), date(2023, 2, 1), "Склад 0"),
+        (date(1900, 1, 1), date(2100, 1, 1), None),
+    )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutdown_pools()
+
+    def setUp(self):
+        self.rnd = random.Random(5)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = storage_repository()
+        self.repo.transaction_store_file = os.path.join(self.tmp.name, "transactions.col")
+
+        gram = unit_model("грамм", 1); gram.id = "U1"
+        kg = unit_model("килограмм", 1000, base=gram); kg.id = "U2"
+        group = group_model("Бакалея"); group.id = "G1"
+        for u in (gram, kg):
+            self.repo.add_unit(u)
+        for i in range(8):
+            n = nomenclature_model(f"Товар {i}", f"Товар {i}", group, gram); n.id = f"N{i}"
+            self.repo.add_nomenclature(n)
+        for i, code in enumerate(("MAIN", "RES", "OUT")):
+            w = warehouse_model(f"Склад {i}", code=code); w.id = f"W{i}"
+            self.repo.add_warehouse(w)
+
+        self.day = date(2023, 1, 1)
+        self._add_random(300)
+
+    def tearDown(self):
+        if self.repo.transaction_store is not None:
+            self.repo.transaction_store.close()
+        self.tmp.cleanup()
+
+    def _add_random(self, count, prefix="T"):
+        for i in range(count):
+            self.day += timedelta(days=self.rnd.randint(0, 2))
+            t = transaction_model(
+                f"{prefix}{i}", self.rnd.choice(self.repo.nomenclatures[:7]), self.rnd.choice(self.repo.warehouses),
+                self.rnd.uniform(-50, 100), self.rnd.choice(self.repo.units), self.day
+            )
+            t.id = f"TX{prefix}{i}"
+            self.repo.add_transaction(t)
+
+    @staticmethod
+    def _values(rows):
+        return [(r.item.id, r.warehouse.id if r.warehouse else None, r.unit.id if r.unit else None,
+                 r.opening, r.incoming, r.outgoing) for r in rows]
+
+    def test_success_nomenclature_shards_identical(self):
+        """
+        Проверка шардирования по номенклатуре (список + колоночное хранилище)
+        Ожидание: строки в точности совпадают с последовательным расчётом
+        """
+        self.repo.save_transactions_columnar()
+        self.day = date(2023, 3, 1)
+        self._add_random(60, prefix="L")
+
+        serial = OSVPrototype(self.repo)
+        parallel = OSVPrototype(self.repo, workers=3)
+        for start, end, wh in self.PERIODS:
+            self.assertEqual(self._values(parallel.generate(start, end, wh)), self._values(serial.generate(start, end, wh)))
+
+    def test_success_warehouse_shards_equal(self):
+        """
+        Проверка шардирования по складам
+        Ожидание: подписи строк совпадают, суммы - с точностью до округления
+        """
+        self.repo.save_transactions_columnar()
+        serial = OSVPrototype(self.repo)
+        parallel = OSVPrototype(self.repo, workers=2, shard_by=SHARD_WAREHOUSE)
+        for start, end, wh in self.PERIODS:
+            actual = self._values(parallel.generate(start, end, wh))
+            expected = self._values(serial.generate(start, end, wh))
+            self.assertEqual(len(actual), len(expected))
+            for a, e in zip(actual, expected):
+                self.assertEqual(a[:3], e[:3])
+                for x, y in zip(a[3:], e[3:]):
+                    self.assertTrue(math.isclose(x, y, abs_tol=1e-6), (a, e))
+
+    def test_success_list_only_serial(self):
+        """
+        Проверка транзакций только в списке (без колоночного хранилища)
+        Ожидание: параллельный путь не применяется, результат совпадает с последовательным
+        """
+        self.assertFalse(OSVParallelAggregator.applicable(self.repo))
+        serial = OSVPrototype(self.repo)
+        parallel = OSVPrototype(self.repo, workers=3)
+        for start, end, wh in self.PERIODS:
+            self.assertEqual(self._values(parallel.generate(start, end, wh)), self._values(serial.generate(start, end, wh)))
+
+        self.repo.save_transactions_columnar()
+        self.assertTrue(OSVParallelAggregator.applicable(self.repo))
+
+
+if __name__ == "__main__":
+    unittest.main()
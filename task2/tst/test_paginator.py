@@ -0,0 +1,92 @@
+import unittest
+
+from src.core.filters_enum import FilterType
+from src.core.paginator import paginator
+from src.core.storage_repository import storage_repository
+from src.core.validator import argument_exception
+from src.models.filter_dto import FilterDTO
+from src.models.group_model import group_model
+from src.models.nomenclature_model import nomenclature_model
+from src.models.unit_model import unit_model
+
+
+"""
+Тесты постраничной выдачи по курсору
+"""
+class test_paginator(unittest.TestCase):
+
+    def setUp(self):
+        self.repo = storage_repository()
+        unit = unit_model("шт", 1)
+        groups = [group_model("Бакалея"), group_model("Крупы")]
+        for i in range(25):
+            item = nomenclature_model(f"Товар {i}", f"Товар {i}", groups[i % 2], unit)
+            item.id = f"N{i}"
+            self.repo.add_nomenclature(item)
+
+    def _all_pages(self, fetch, limit):
+        """Проход по страницам: курсор каждой следующей - из предыдущей"""
+        result, cursor, pages = [], None, 0
+        while True:
+            items, cursor = fetch(paginator(limit=limit, cursor=cursor))
+            result.extend(items)
+            pages += 1
+            if cursor is None:
+                return result, pages
+
+    def test_success_pages_cover_collection(self):
+        """
+        Проверка страниц
+        Ожидание: страницы по limit без пропусков и повторов, у последней нет курсора
+        """
+        items, pages = self._all_pages(lambda p: p.page(self.repo.nomenclatures), 10)
+        self.assertEqual(items, list(self.repo.nomenclatures))
+        self.assertEqual(pages, 3)
+
+    def test_success_filtered_pages(self):
+        """
+        Проверка страниц фильтра (индекс group.name)
+        Ожидание: совпадения идут по порядку коллекции, страницы стыкуются
+        """
+        filters = [FilterDTO("group.name", "крупы", FilterType.EQUALS)]
+        items, pages = self._all_pages(lambda p: p.page_filtered(self.repo.nomenclatures, filters, "nomenclature"), 5)
+        self.assertEqual([i.id for i in items], [f"N{i}" for i in range(1, 25, 2)])
+        self.assertEqual(pages, 3)
+
+        unindexed = [FilterDTO("full_name", "1", FilterType.LIKE)]
+        items, _ = self._all_pages(lambda p: p.page_filtered(self.repo.nomenclatures, unindexed, "nomenclature"), 4)
+        self.assertEqual([i.id for i in items], [f"N{i}" for i in range(25) if "1" in str(i)])
+
+    def test_success_cursor_survives_removal(self):
+        """
+        Проверка устойчивости курсора
+        Ожидание: после удаления элемента выше курсора выдача продолжается с того же места
+        """
+        first, cursor = paginator(limit=10).page(self.repo.nomenclatures)
+        self.repo.nomenclatures.remove(self.repo.nomenclatures[0])
+        second, _ = paginator(limit=10, cursor=cursor).page(self.repo.nomenclatures)
+        self.assertEqual(second[0].id, "N10")
+
+    def test_success_fields_projection(self):
+        """
+        Проверка выбора полей
+        Ожидание: остаются только перечисленные поля
+        """
+        pager = paginator(fields="id, name")
+        self.assertFalse(pager.active)
+        self.assertEqual(pager.project({"id": "N1", "name": "Товар", "group": {}}), {"id": "N1", "name": "Товар"})
+
+    def test_fail_invalid_parameters(self):
+        """
+        Проверка параметров
+        Ожидание: неверный limit или курсор - argument_exception
+        """
+        for limit in ("abc", 0, paginator.MAX_LIMIT + 1):
+            with self.assertRaises(argument_exception):
+                paginator(limit=limit)
+        with self.assertRaises(argument_exception):
+            paginator(cursor="не курсор")
+
+
+if __name__ == "__main__":
+    unittest.main()
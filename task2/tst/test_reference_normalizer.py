@@ -0,0 +1,139 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from src.core.storage_repository import storage_repository
+from src.logics.convert_factory import convert_factory
+from src.logics.reference_normalizer import reference_normalizer
+from src.logics.response_json import response_json
+from src.models.balance_model import balance_model
+from src.models.group_model import group_model
+from src.models.nomenclature_model import nomenclature_model
+from src.models.osv_row_model import osv_row_model
+from src.models.transaction_model import transaction_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+"""
+Тесты нормализованного вывода (таблицы ссылок по id)
+"""
+class test_reference_normalizer(unittest.TestCase):
+
+    def setUp(self):
+        self.gram = unit_model("грамм", 1)
+        self.gram.id = "U1"
+        self.kg = unit_model("килограмм", 1000, self.gram)
+        self.kg.id = "U2"
+        self.group = group_model("Бакалея")
+        self.group.id = "G1"
+        self.flour = nomenclature_model("Мука", "Мука пшеничная", self.group, self.kg)
+        self.flour.id = "N1"
+        self.sugar = nomenclature_model("Сахар", "Сахар белый", self.group, self.gram)
+        self.sugar.id = "N2"
+        self.wh = warehouse_model("Склад", code="MAIN")
+        self.wh.id = "W1"
+
+        self.transactions = []
+        for i in range(10):
+            tx = transaction_model(f"T{i}", (self.flour, self.sugar)[i % 2], self.wh, i + 1, self.kg, date(2023, 1, 1 + i))
+            tx.id = f"T{i}"
+            self.transactions.append(tx)
+
+    def test_success_references_emitted_once(self):
+        """
+        Проверка нормализации транзакций
+        Ожидание: строки содержат id, каждый объект - одна запись в таблице, ссылки записей - id
+        """
+        normalizer = reference_normalizer()
+        rows = list(normalizer.iter_rows(self.transactions))
+
+        self.assertEqual(rows[1]["nomenclature"], "N2")
+        self.assertEqual(rows[1]["warehouse"], "W1")
+        self.assertEqual(rows[1]["unit"], "U2")
+        self.assertEqual(rows[1]["date"], "2023-01-02")
+        self.assertEqual(set(normalizer.refs["nomenclature"]), {"N1", "N2"})
+        self.assertEqual(set(normalizer.refs["unit"]), {"U1", "U2"})
+        self.assertEqual(normalizer.refs["nomenclature"]["N1"]["group"], "G1")
+        self.assertEqual(normalizer.refs["unit"]["U2"]["base"], "U1")
+
+    def test_success_expand_restores_convert_output(self):
+        """
+        Проверка обратного преобразования
+        Ожидание: строка с подставленными записями таблиц совпадает с convert_factory.convert
+        """
+        normalizer = reference_normalizer()
+        rows = list(normalizer.iter_rows(self.transactions))
+        factory = convert_factory()
+        for tx, row in zip(self.transactions, rows):
+            self.assertEqual(json.dumps(reference_normalizer.expand(row, normalizer.refs), ensure_ascii=False),
+                             json.dumps(factory.convert(tx), ensure_ascii=False))
+
+    def test_success_balance_and_osv_rows(self):
+        """
+        Проверка строк остатков и ОСВ
+        Ожидание: склад, номенклатура и единица - id, числа без изменений
+        """
+        normalizer = reference_normalizer()
+        balance = normalizer.row(balance_model(self.wh, self.flour, self.kg, 12.5))
+        osv = normalizer.row(osv_row_model(None, self.sugar, self.gram, 0, 10.0, 2.5))
+
+        self.assertEqual(balance, {"unit": "U2", "warehouse": "W1", "item": "N1", "balance": 12.5})
+        self.assertEqual((osv["item"], osv["unit"], osv["warehouse"], osv["incoming"]), ("N2", "U1", None, 10.0))
+
+    def test_success_stream_equals_document(self):
+        """
+        Проверка потокового документа
+        Ожидание: склеенные части совпадают с json.dumps документа при любом размере части
+        """
+        expected = json.dumps(reference_normalizer().document(self.transactions), ensure_ascii=False, indent=2)
+        for chunk_size in (1, 300, response_json.CHUNK_SIZE):
+            normalizer = reference_normalizer()
+            stream = response_json.iter_normalized(normalizer.iter_rows(self.transactions), normalizer, chunk_size=chunk_size)
+            self.assertEqual("".join(stream), expected)
+
+        normalizer = reference_normalizer()
+        empty = "".join(response_json.iter_normalized(normalizer.iter_rows([]), normalizer))
+        self.assertEqual(json.loads(empty)["rows"], [])
+
+    def test_success_save_all_round_trip(self):
+        """
+        Проверка файла репозитория в нормализованном виде
+        Ожидание: коллекции справочников - списки id, load_all восстанавливает ссылки транзакций
+        """
+        folder = tempfile.mkdtemp()
+        repo = storage_repository()
+        repo.file_path = os.path.join(folder, "repository.json")
+        repo.snapshot_file = os.path.join(folder, "turnover_snapshot.json")
+        for unit in (self.gram, self.kg):
+            repo.add_unit(unit)
+        repo.add_group(self.group)
+        repo.add_nomenclature(self.flour)
+        repo.add_nomenclature(self.sugar)
+        repo.add_warehouse(self.wh)
+        for tx in self.transactions:
+            repo.add_transaction(tx)
+
+        repo.save_all(normalized=True)
+        with open(repo.file_path, encoding="utf-8") as f:
+            saved = json.load(f)
+        self.assertEqual(saved["nomenclature"], ["N1", "N2"])
+        self.assertEqual(saved["transaction"][0]["nomenclature"], "N1")
+
+        loaded = storage_repository()
+        loaded.file_path = repo.file_path
+        loaded.snapshot_file = repo.snapshot_file
+        self.assertTrue(loaded.load_all())
+
+        self.assertEqual([n.name for n in loaded.nomenclatures], ["Мука", "Сахар"])
+        self.assertEqual(loaded.nomenclatures[0].unit.base.name, "грамм")
+        self.assertEqual(len(loaded.transactions), 10)
+        tx = loaded.transactions[3]
+        self.assertIs(tx.nomenclature, loaded.nomenclatures[1])
+        self.assertEqual((tx.warehouse.code, tx.unit.id, tx.date, tx.quantity), ("MAIN", "U2", date(2023, 1, 4), 4.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+
+from src.core.repository_provider import repository_provider
+from src.core.storage_repository import storage_repository
+
+
+def _provider(tmp_path, monkeypatch):
+    """
+    Поставщик с подменённой сборкой репозитория на временный файл
+    """
+    data_file = tmp_path / "repository.json"
+    data_file.write_text("{}", encoding="utf-8")
+    builds = []
+
+    def build(self):
+        repo = storage_repository()
+        repo.file_path = str(data_file)
+        builds.append(repo)
+        return repo
+
+    monkeypatch.setattr(repository_provider, "_build", build)
+    provider = repository_provider()
+    provider.reset()
+    return provider, data_file, builds
+
+
+def test_same_instance_until_file_changes(tmp_path, monkeypatch):
+    """
+    Проверка: репозиторий загружается один раз и переиспользуется,
+    пока файл данных не изменился
+    """
+    provider, data_file, builds = _provider(tmp_path, monkeypatch)
+
+    first = provider.get()
+    assert provider.get() is first
+    assert repository_provider() is provider
+    assert len(builds) == 1
+
+    data_file.write_text('{"unit": []}', encoding="utf-8")
+    os.utime(data_file, ns=(0, 10 ** 9))
+
+    assert provider.get() is not first
+    assert len(builds) == 2
+    provider.reset()
+
+
+def test_explicit_reload(tmp_path, monkeypatch):
+    """
+    Проверка: reload() всегда собирает новый репозиторий
+    """
+    provider, _, builds = _provider(tmp_path, monkeypatch)
+
+    first = provider.get()
+    second = provider.reload()
+
+    assert second is not first
+    assert provider.get() is second
+    assert len(builds) == 2
+    provider.reset()
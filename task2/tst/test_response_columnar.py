@@ -0,0 +1,95 @@
+import io
+import unittest
+from datetime import date
+
+from src.logics.factory_entities import factory_entities
+from src.logics.response_columnar import response_columnar, np, pa
+from src.models.balance_model import balance_model
+from src.models.nomenclature_model import nomenclature_model
+from src.models.osv_row_model import osv_row_model
+from src.models.transaction_model import transaction_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+"""
+Тесты колоночной выгрузки (Arrow IPC / .npz)
+"""
+@unittest.skipUnless(response_columnar.available(), "NumPy не установлен")
+class test_response_columnar(unittest.TestCase):
+
+    def setUp(self):
+        self.unit = unit_model("шт", 1); self.unit.id = "U1"
+        self.item = nomenclature_model("Мука", "Мука пшеничная", None, self.unit); self.item.id = "N1"
+        self.wh = warehouse_model("Склад", code="MAIN"); self.wh.id = "W1"
+
+    def _read(self, data: bytes) -> dict:
+        """ Колонки файла выгрузки как массивы NumPy """
+        if response_columnar.BACKEND == "arrow":
+            table = pa.ipc.open_stream(data).read_all()
+            return {name: table.column(name).to_numpy() for name in table.column_names}
+        with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+            return {name: npz[name] for name in npz.files}
+
+    def test_success_registered(self):
+        """
+        Проверка регистрации формата
+        Ожидание: ?format=columnar и имя бэкенда выбирают формат, MIME-тип по бэкенду
+        """
+        self.assertEqual(factory_entities.negotiate("columnar"), "columnar")
+        self.assertEqual(factory_entities.negotiate(response_columnar.BACKEND), "columnar")
+        self.assertEqual(factory_entities.negotiate(None, response_columnar.MIME_TYPE), "columnar")
+        self.assertTrue(factory_entities.formatter("columnar").columnar)
+
+    def test_success_osv_columns(self):
+        """
+        Проверка выгрузки строк ОСВ
+        Ожидание: id ссылок, числовые колонки float64 и вычисленный конечный остаток
+        """
+        rows = [osv_row_model(self.wh, self.item, self.unit, float(i), 2.0 * i, 1.0) for i in range(50)]
+        columns = self._read(response_columnar().create_columns(rows))
+
+        self.assertEqual(list(columns["item_id"][:2]), ["N1", "N1"])
+        self.assertEqual(columns["opening"].dtype, np.float64)
+        self.assertEqual(list(columns["closing"]), [r.closing for r in rows])
+
+    def test_success_balance_and_fields(self):
+        """
+        Проверка выгрузки остатков с отбором полей
+        Ожидание: только запрошенные колонки, пустой склад - пустая строка
+        """
+        rows = [balance_model(None, self.item, self.unit, 5.5)]
+        columns = self._read(response_columnar().create_columns(rows, fields=["warehouse_id", "balance"]))
+
+        self.assertEqual(sorted(columns), ["balance", "warehouse_id"])
+        self.assertEqual(list(columns["warehouse_id"]), [""])
+        self.assertEqual(list(columns["balance"]), [5.5])
+
+    def test_success_transaction_columns(self):
+        """
+        Проверка выгрузки транзакций
+        Ожидание: даты - тип даты, количество - числа
+        """
+        rows = [transaction_model(f"T{i}", self.item, self.wh, i, self.unit, date(2023, 1, 1 + i)) for i in range(3)]
+        columns = self._read(response_columnar().create_columns(rows))
+
+        self.assertEqual(list(columns["number"]), ["T0", "T1", "T2"])
+        self.assertEqual(str(columns["date"].astype("datetime64[D]")[2]), "2023-01-03")
+        self.assertEqual(list(columns["quantity"]), [0.0, 1.0, 2.0])
+
+    def test_success_rows_fallback(self):
+        """
+        Проверка выгрузки словарей строк
+        Ожидание: вложенный словарь - id, отсутствующие числа - NaN, целые - int64
+        """
+        rows = [{"name": "А", "unit": {"id": "U1"}, "count": 1, "weight": 1.5},
+                {"name": "Б", "unit": None, "count": 2}]
+        columns = self._read(response_columnar().create_response(rows))
+
+        self.assertEqual(list(columns["unit"]), ["U1", ""])
+        self.assertEqual(columns["count"].dtype, np.int64)
+        self.assertTrue(np.isnan(columns["weight"][1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import gzip
+import types
+import unittest
+
+from src.core.response_compressor import response_compressor, brotli
+
+
+"""
+Тесты сжатия ответов API
+"""
+class test_response_compressor(unittest.TestCase):
+
+    def setUp(self):
+        self.body = "".join(f'{{"id":"N{i}","name":"Товар {i}"}},' for i in range(500))
+
+    def tearDown(self):
+        response_compressor.configure(True, 1024)
+
+    def test_success_negotiate(self):
+        """
+        Проверка выбора кодировки по Accept-Encoding
+        Ожидание: учитываются q и *, q=0 и отключённое сжатие - без сжатия
+        """
+        best = "br" if brotli is not None else "gzip"
+        self.assertEqual(response_compressor.negotiate("gzip, deflate, br"), best)
+        self.assertEqual(response_compressor.negotiate("br;q=0.5, gzip"), "gzip")
+        self.assertEqual(response_compressor.negotiate("*"), best)
+        self.assertIsNone(response_compressor.negotiate("gzip;q=0, identity"))
+        self.assertIsNone(response_compressor.negotiate(None))
+
+        response_compressor.configure(enabled=False)
+        self.assertIsNone(response_compressor.negotiate("gzip"))
+
+    def test_success_threshold(self):
+        """
+        Проверка порога сжатия
+        Ожидание: маленькое тело не сжимается, большое - сжимается gzip
+        """
+        body, encoding = response_compressor.encode('{"ok":true}', "gzip")
+        self.assertEqual((body, encoding), (b'{"ok":true}', None))
+
+        body, encoding = response_compressor.encode(self.body, "gzip")
+        self.assertEqual(encoding, "gzip")
+        self.assertLess(len(body), len(self.body.encode("utf-8")) // 4)
+        self.assertEqual(gzip.decompress(body).decode("utf-8"), self.body)
+
+    def test_success_stream(self):
+        """
+        Проверка потокового сжатия
+        Ожидание: генератор сжимается по частям, части распаковываются в исходное тело
+        """
+        chunks = [self.body[i:i + 700] for i in range(0, len(self.body), 700)]
+        consumed = []
+
+        def source():
+            for chunk in chunks:
+                consumed.append(chunk)
+                yield chunk
+
+        body, encoding = response_compressor.encode(source(), "gzip")
+        self.assertEqual(encoding, "gzip")
+        self.assertIsInstance(body, types.GeneratorType)
+        # До отдачи прочитано только начало - до порога сжатия
+        self.assertEqual(len(consumed), 2)
+
+        parts = list(body)
+        self.assertGreater(len(parts), 2)
+        self.assertEqual(gzip.decompress(b"".join(parts)).decode("utf-8"), self.body)
+
+    def test_success_short_stream_not_compressed(self):
+        """
+        Проверка короткого потока
+        Ожидание: поток меньше порога отдаётся несжатыми байтами
+        """
+        self.assertEqual(response_compressor.encode(iter(["[", "]"]), "gzip"), (b"[]", None))
+
+    @unittest.skipUnless(brotli is not None, "brotli не установлен")
+    def test_success_brotli(self):
+        """
+        Проверка Brotli
+        Ожидание: целое и потоковое тело распаковываются в исходное
+        """
+        body, _ = response_compressor.encode(self.body, "br")
+        self.assertEqual(brotli.decompress(body).decode("utf-8"), self.body)
+        stream, _ = response_compressor.encode(iter([self.body, self.body]), "br")
+        self.assertEqual(brotli.decompress(b"".join(stream)).decode("utf-8"), self.body * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import os
+import tempfile
+import tracemalloc
+import types
+import unittest
+from datetime import date
+
+from src.logics.convert_factory import convert_factory
+from src.logics.model_serializer import model_serializer
+from src.logics.response_csv import response_csv
+from src.models.group_model import group_model
+from src.models.nomenclature_model import nomenclature_model
+from src.models.transaction_model import transaction_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+"""
+Тесты CSV-ответа (в том числе потокового)
+"""
+class test_response_csv(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = [
+            {"name": f"Рецепт {i}", "steps": ["Смешать", f"Жарить {i}"], "portions": i, "note": "a,\"b\"\nc"}
+            for i in range(30)
+        ]
+
+        gram = unit_model("грамм", 1)
+        gram.id = "U1"
+        flour = nomenclature_model("Мука", "Мука пшеничная", group_model("Бакалея"), gram)
+        flour.id = "N1"
+        wh = warehouse_model("Склад", code="MAIN")
+        wh.id = "W1"
+        self.transactions = [transaction_model(f"T{i}", flour, wh, i + 1, gram, date(2023, 1, 1 + i)) for i in range(3)]
+        for i, tx in enumerate(self.transactions):
+            tx.id = f"T{i}"
+
+    def test_success_create_response(self):
+        """
+        Проверка CSV одной строкой
+        Ожидание: заголовок - отсортированное объединение ключей, списки - через запятую
+        """
+        result = response_csv().create_response([{"b": 1, "a": ["x", 2]}, {"c": None}])
+        self.assertEqual(result, "a,b,c\r\n\"x, 2\",1,\r\n,,\r\n")
+        self.assertEqual(response_csv().create_response([]), "")
+
+    def test_success_stream_equals_create_response(self):
+        """
+        Проверка потокового CSV
+        Ожидание: склеенные части совпадают с create_response при любом размере части
+        """
+        expected = response_csv().create_response(self.rows)
+        for chunk_size in (1, 200, response_csv.CHUNK_SIZE):
+            stream = response_csv().iter_response(iter(self.rows), chunk_size=chunk_size)
+            self.assertIsInstance(stream, types.GeneratorType)
+            self.assertEqual("".join(stream), expected)
+        self.assertEqual(list(response_csv().iter_response(iter([]))), [])
+
+    def test_success_rows_read_lazily(self):
+        """
+        Проверка ленивого чтения строк
+        Ожидание: первая часть отдаётся после чтения одной строки
+        """
+        consumed = []
+
+        def source():
+            for row in self.rows:
+                consumed.append(row)
+                yield row
+
+        next(response_csv().iter_response(source(), chunk_size=1))
+        self.assertEqual(len(consumed), 1)
+
+    def test_success_fixed_header(self):
+        """
+        Проверка заданного заголовка
+        Ожидание: отсутствующие ключи - пустые, ключ вне заголовка - ошибка (не теряется молча)
+        """
+        stream = response_csv().iter_response([{"name": "А"}, {"code": "B"}], fieldnames=["code", "name"])
+        self.assertEqual("".join(stream), "code,name\r\n,А\r\nB,\r\n")
+        with self.assertRaises(ValueError):
+            "".join(response_csv().iter_response([{"name": "А", "extra": 1}], fieldnames=["code", "name"]))
+
+    def test_success_stream_header_from_schema(self):
+        """
+        Проверка заголовка потокового CSV единиц измерения (у первой нет базовой)
+        Ожидание: колонки base_id, base_name есть, поток совпадает с create_response
+        """
+        gram = unit_model("грамм", 1)
+        gram.id = "U1"
+        kg = unit_model("килограмм", 1000, gram)
+        kg.id = "U2"
+        rows = [gram.to_dict(), kg.to_dict()]
+        references = model_serializer.reference_fields(unit_model)
+
+        expected = response_csv().create_response(rows, references)
+        self.assertEqual(expected.split("\r\n")[0], "base_id,base_name,factor,id,name")
+        self.assertEqual(expected.split("\r\n")[2], "U1,грамм,1000,U2,килограмм")
+        self.assertEqual("".join(response_csv().iter_response(iter(rows), references=references)), expected)
+
+    def _peak_memory(self, count: int):
+        rows = ({"id": i, "name": f"Товар {i}", "tags": ["a", "b"]} for i in range(count))
+        tracemalloc.start()
+        size = sum(len(chunk) for chunk in response_csv().iter_response(rows, chunk_size=4096))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return size, peak
+
+    def test_success_constant_memory(self):
+        """
+        Проверка памяти потоковой выгрузки
+        Ожидание: пик памяти не растёт с числом строк (определяется размером части)
+        """
+        small_size, small_peak = self._peak_memory(1000)
+        large_size, large_peak = self._peak_memory(50000)
+
+        self.assertGreater(large_size, small_size * 40)
+        self.assertLess(large_peak, small_peak * 2)
+
+    def test_success_write_file(self):
+        """
+        Проверка записи в файл
+        Ожидание: содержимое файла совпадает с create_response
+        """
+        path = os.path.join(tempfile.mkdtemp(), "export.csv")
+        response_csv().write_file(iter(self.rows), path)
+        with open(path, encoding="utf-8", newline="") as f:
+            self.assertEqual(f.read(), response_csv().create_response(self.rows))
+
+
+    def test_success_transactions_flat(self):
+        """
+        Проверка CSV транзакций
+        Ожидание: ссылки - колонки <ключ>_id и <ключ>_name (без unique_code и объектов моделей),
+        to_dict() с моделями и словари convert_factory дают одинаковый CSV
+        """
+        rows = convert_factory().convert_collection(self.transactions)
+        result = response_csv().create_response(rows)
+        lines = result.split("\r\n")
+
+        self.assertEqual(lines[0], "date,id,nomenclature_id,nomenclature_name,number,quantity,"
+                                   "unit_id,unit_name,warehouse_id,warehouse_name")
+        self.assertEqual(lines[1], "2023-01-01,T0,N1,Мука,T0,1.0,U1,грамм,W1,Склад")
+        self.assertNotIn("unique_code", result)
+        self.assertNotIn(" object at ", result)
+        self.assertEqual("".join(response_csv().iter_response(iter(rows))), result)
+        self.assertEqual(response_csv().create_response([t.to_dict() for t in self.transactions]), result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import json
+import types
+import unittest
+from datetime import date
+
+from src.logics.convert_factory import convert_factory
+from src.logics.response_json import response_json
+from src.models.nomenclature_model import nomenclature_model
+from src.models.transaction_model import transaction_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+"""
+Тесты потокового JSON-ответа
+"""
+class test_response_stream(unittest.TestCase):
+
+    def setUp(self):
+        unit = unit_model("шт", 1)
+        item = nomenclature_model("Мука", "Мука \"высший\"\nсорт", None, unit)
+        wh = warehouse_model("Склад", code="MAIN")
+        self.transactions = [transaction_model(f"T{i}", item, wh, i, unit, date(2023, 1, 1 + i)) for i in range(20)]
+
+    def test_success_stream_equals_dumps(self):
+        """
+        Проверка потокового массива
+        Ожидание: склеенные части совпадают с json.dumps(..., indent=2) при любом размере части
+        """
+        converted = convert_factory().convert_collection(self.transactions)
+        expected = json.dumps(converted, ensure_ascii=False, indent=2)
+        for chunk_size in (1, 500, response_json.CHUNK_SIZE):
+            stream = response_json.iter_array(convert_factory().iter_collection(self.transactions), chunk_size=chunk_size)
+            self.assertIsInstance(stream, types.GeneratorType)
+            self.assertEqual("".join(stream), expected)
+        self.assertEqual("".join(response_json.iter_array(iter([]))), "[]")
+
+    def test_success_elements_converted_lazily(self):
+        """
+        Проверка ленивой конвертации
+        Ожидание: первая часть отдаётся до чтения остальных элементов
+        """
+        consumed = []
+
+        def source():
+            for t in self.transactions:
+                consumed.append(t)
+                yield t
+
+        stream = response_json.iter_array(convert_factory().iter_collection(source()), chunk_size=1)
+        first = next(stream)
+        self.assertTrue(first.startswith("[\n  {"))
+        self.assertEqual(len(consumed), 1)
+
+    def test_success_date_converted_to_iso(self):
+        """
+        Проверка конвертации даты
+        Ожидание: date сериализуется в ISO-строку
+        """
+        self.assertEqual(convert_factory().convert(self.transactions[0])["date"], "2023-01-01")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import types
+import unittest
+import xml.etree.ElementTree as ET
+from datetime import date
+from xml.dom import minidom
+
+from src.logics.convert_factory import convert_factory
+from src.logics.model_serializer import model_serializer
+from src.logics.response_xml import response_xml
+from src.models.group_model import group_model
+from src.models.nomenclature_model import nomenclature_model
+from src.models.transaction_model import transaction_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+def minidom_reference(data: list, pretty: bool) -> str:
+    """Прежняя реализация: дерево ElementTree, разбор minidom и форматирование (поля - flat_row, None - пустой элемент)"""
+    root = ET.Element("Items")
+    for row in data:
+        item = ET.SubElement(root, "Item")
+        for k, v in response_xml.flat_row(row).items():
+            el = ET.SubElement(item, str(k))
+            el.text = "" if v is None else str(v)
+    dom = minidom.parseString(ET.tostring(root, encoding="utf-8"))
+    if pretty:
+        return dom.toprettyxml(indent="  ", encoding="utf-8").decode("utf-8")
+    return dom.toxml(encoding="utf-8").decode("utf-8")
+
+
+"""
+Тесты XML-ответа (в том числе потокового)
+"""
+class test_response_xml(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = [
+            {"name": f"Рецепт {i}", "steps": ["Смешать", "Жарить"], "note": "a & <b> \"c\"\nd", "empty": "", "none": None}
+            for i in range(20)
+        ] + [{}]
+
+        gram = unit_model("грамм", 1)
+        gram.id = "U1"
+        flour = nomenclature_model("Мука", "Мука пшеничная", group_model("Бакалея"), gram)
+        flour.id = "N1"
+        wh = warehouse_model("Склад", code="MAIN")
+        wh.id = "W1"
+        self.transaction = transaction_model("T1", flour, wh, 5, gram, date(2023, 1, 1))
+        self.transaction.id = "T1"
+
+    def test_success_same_as_minidom(self):
+        """
+        Проверка вывода
+        Ожидание: с отступами и без - символ в символ как прежний вывод через minidom
+        """
+        for data in (self.rows, [], [{}]):
+            for pretty in (True, False):
+                self.assertEqual(response_xml(pretty).create_response(data), minidom_reference(data, pretty))
+
+    def test_success_stream_equals_create_response(self):
+        """
+        Проверка потокового XML
+        Ожидание: склеенные части совпадают с create_response при любом размере части
+        """
+        for pretty in (True, False):
+            expected = response_xml(pretty).create_response(self.rows)
+            for chunk_size in (1, 300, response_xml.CHUNK_SIZE):
+                stream = response_xml(pretty).iter_response(iter(self.rows), chunk_size=chunk_size)
+                self.assertIsInstance(stream, types.GeneratorType)
+                self.assertEqual("".join(stream), expected)
+
+    def test_success_rows_read_lazily(self):
+        """
+        Проверка ленивого чтения строк
+        Ожидание: первая часть отдаётся после чтения одной строки
+        """
+        consumed = []
+
+        def source():
+            for row in self.rows:
+                consumed.append(row)
+                yield row
+
+        first = next(response_xml().iter_response(source(), chunk_size=1))
+        self.assertTrue(first.startswith(response_xml.HEADER))
+        self.assertEqual(len(consumed), 1)
+
+
+    def test_success_transaction_flat(self):
+        """
+        Проверка XML транзакции
+        Ожидание: ссылки - поля <ключ>_id и <ключ>_name (без unique_code и объектов моделей),
+        to_dict() с моделями и словарь convert_factory дают одинаковый XML
+        """
+        result = response_xml().create_response([convert_factory().convert(self.transaction)])
+        item = ET.fromstring(result.encode("utf-8"))[0]
+        fields = {el.tag: el.text for el in item}
+
+        self.assertEqual(fields["nomenclature_id"], "N1")
+        self.assertEqual(fields["nomenclature_name"], "Мука")
+        self.assertEqual(fields["warehouse_id"], "W1")
+        self.assertEqual(fields["unit_name"], "грамм")
+        self.assertEqual(fields["date"], "2023-01-01")
+        self.assertNotIn("nomenclature", fields)
+        self.assertNotIn("unique_code", result)
+        self.assertNotIn(" object at ", result)
+
+        raw = ET.fromstring(response_xml().create_response([self.transaction.to_dict()]).encode("utf-8"))[0]
+        self.assertEqual({el.tag: el.text for el in raw}, fields)
+
+
+    def test_success_empty_reference(self):
+        """
+        Проверка XML единиц измерения (у первой нет базовой)
+        Ожидание: у обеих элементы base_id и base_name (у первой - пустые, без "None"),
+        поток совпадает с create_response
+        """
+        gram = unit_model("грамм", 1)
+        gram.id = "U1"
+        kg = unit_model("килограмм", 1000, gram)
+        kg.id = "U2"
+        rows = [gram.to_dict(), kg.to_dict()]
+        references = model_serializer.reference_fields(unit_model)
+
+        result = response_xml().create_response(rows, references)
+        items = ET.fromstring(result.encode("utf-8"))
+        self.assertEqual([[el.tag for el in item] for item in items],
+                         [["id", "name", "factor", "base_id", "base_name"]] * 2)
+        self.assertEqual([items[0].find("base_id").text, items[1].find("base_name").text], [None, "грамм"])
+        self.assertNotIn("None", result)
+        self.assertEqual("".join(response_xml().iter_response(iter(rows), references=references)), result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+
+from src.core.filters_enum import FilterType
+from src.core.result_cache import result_cache
+from src.core.storage_repository import storage_repository
+from src.logics.osv_service import OSVCalculator
+from src.models.filter_dto import FilterDTO
+from src.models.nomenclature_model import nomenclature_model
+from src.models.transaction_model import transaction_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+class fixed_settings:
+    """Настройки с заданной датой блокировки и движком по умолчанию"""
+
+    def __init__(self, block_period=None):
+        self.block_period = block_period
+
+    def get_block_period(self):
+        return self.block_period
+
+    def get_osv_engine(self):
+        return "python"
+
+    def get_osv_workers(self):
+        return 1
+
+    def get_osv_shard_by(self):
+        return "nomenclature"
+
+
+"""
+Тесты кэша результатов ОСВ и остатков
+"""
+class test_result_cache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = storage_repository()
+        self.repo.snapshot_file = os.path.join(self.tmp.name, "snapshot.json")
+        unit = unit_model("шт", 1); unit.id = "U1"
+        item = nomenclature_model("Мука", "Мука", None, unit); item.id = "N1"
+        wh = warehouse_model("Склад", code="MAIN"); wh.id = "W1"
+        self.repo.add_unit(unit)
+        self.repo.add_nomenclature(item)
+        self.repo.add_warehouse(wh)
+        self._add("T1", 10, date(2023, 1, 10))
+
+        self.calc = OSVCalculator(self.repo)
+        self.calc.settings_manager = fixed_settings()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _add(self, number, qty, day):
+        t = transaction_model(number, self.repo.nomenclatures[0], self.repo.warehouses[0], qty, self.repo.units[0], day)
+        t.id = "TX" + number
+        self.repo.add_transaction(t)
+
+    def test_success_lru_eviction(self):
+        """
+        Проверка вытеснения
+        Ожидание: при переполнении удаляется давно не использованная запись
+        """
+        cache = result_cache(max_size=2, ttl=0)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["hits"], 2)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_success_ttl_expiry(self):
+        """
+        Проверка времени жизни записи
+        Ожидание: запись старше TTL считается промахом
+        """
+        cache = result_cache(max_size=10, ttl=5)
+        with mock.patch("src.core.result_cache.time.monotonic", return_value=100.0):
+            cache.put("a", 1)
+        with mock.patch("src.core.result_cache.time.monotonic", return_value=104.0):
+            self.assertEqual(cache.get("a"), 1)
+        with mock.patch("src.core.result_cache.time.monotonic", return_value=106.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_success_attachments(self):
+        """
+        Проверка приложенных к записи значений
+        Ожидание: живут вместе с записью, put и вытеснение их сбрасывают
+        """
+        cache = result_cache(max_size=1, ttl=0)
+        self.assertFalse(cache.attach("a", "gzip", b"x"))
+        cache.put("a", 1)
+        self.assertTrue(cache.attach("a", "gzip", b"x"))
+        self.assertEqual(cache.attachment("a", "gzip"), b"x")
+        self.assertIsNone(cache.attachment("a", "br"))
+
+        cache.put("a", 2)
+        self.assertIsNone(cache.attachment("a", "gzip"))
+        cache.attach("a", "gzip", b"y")
+        cache.put("b", 3)
+        self.assertIsNone(cache.attachment("a", "gzip"))
+
+    def test_success_osv_cached_until_new_transaction(self):
+        """
+        Проверка кэширования ОСВ
+        Ожидание: повтор - попадание, новая транзакция делает результат неактуальным
+        """
+        start, end = date(2023, 1, 1), date(2023, 1, 31)
+        first = self.calc.compute_osv(start, end)
+        second = self.calc.compute_osv(start, end)
+        self.assertEqual(self.repo.result_cache.stats()["hits"], 1)
+        self.assertIs(first[0], second[0])
+
+        self._add("T2", 5, date(2023, 1, 20))
+        rows = self.calc.compute_osv(start, end)
+        self.assertEqual(rows[0].incoming, 15)
+        self.assertEqual(self.repo.result_cache.stats()["misses"], 2)
+
+    def test_success_filters_normalized_in_key(self):
+        """
+        Проверка ключа с фильтрами
+        Ожидание: фильтры, отличающиеся регистром, дают попадание
+        """
+        start, end = date(2023, 1, 1), date(2023, 1, 31)
+        self.calc.compute_osv(start, end, filters=[FilterDTO("Номенклатура.name", "МУКА", FilterType.LIKE)])
+        self.calc.compute_osv(start, end, filters=[FilterDTO("номенклатура.Name", "мука", FilterType.LIKE)])
+        self.calc.compute_osv(start, end, filters=[FilterDTO("номенклатура.Name", "мука", FilterType.EQUALS)])
+
+        stats = self.repo.result_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+    def test_success_balances_follow_block_period(self):
+        """
+        Проверка кэширования остатков
+        Ожидание: смена даты блокировки - промах
+        """
+        self.calc.compute_balances_at(date(2023, 1, 15))
+        self.calc.compute_balances_at(date(2023, 1, 15))
+        self.calc.settings_manager.block_period = date(2023, 1, 1)
+        self.calc.compute_balances_at(date(2023, 1, 15))
+
+        stats = self.repo.result_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import math
+import os
+import random
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+from src.core.storage_repository import storage_repository
+from src.core.turnover_checkpoints import turnover_checkpoints
+from src.logics.osv_service import OSVCalculator
+from src.models.group_model import group_model
+from src.models.nomenclature_model import nomenclature_model
+from src.models.transaction_model import transaction_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+"""
+Тесты инкрементального обновления snapshot'а и checkpoint'ов при добавлении проводок
+"""
+class test_snapshot_incremental(unittest.TestCase):
+
+    def setUp(self):
+        rnd = random.Random(11)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = storage_repository()
+        self.repo.snapshot_file = os.path.join(self.tmp.name, "snapshot.json")
+        self.repo.file_path = os.path.join(self.tmp.name, "repo.json")
+
+        gram = unit_model("грамм", 1); gram.id = "U1"
+        kg = unit_model("килограмм", 1000, base=gram); kg.id = "U2"
+        group = group_model("Бакалея"); group.id = "G1"
+        for u in (gram, kg):
+            self.repo.add_unit(u)
+        for i in range(4):
+            n = nomenclature_model(f"Товар {i}", f"Товар {i}", group, gram); n.id = f"N{i}"
+            self.repo.add_nomenclature(n)
+        w = warehouse_model("Склад", code="MAIN"); w.id = "W0"
+        self.repo.add_warehouse(w)
+
+        day = date(2023, 1, 1)
+        for i in range(120):
+            day += timedelta(days=rnd.randint(0, 3))
+            self._add(f"T{i}", rnd.choice(self.repo.nomenclatures[:3]), rnd.randint(-20, 50), rnd.choice(self.repo.units), day)
+
+        self.block_date = date(2023, 3, 31)
+        self.calc = OSVCalculator(self.repo)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _add(self, number, item, qty, unit, day):
+        t = transaction_model(number, item, self.repo.warehouses[0], qty, unit, day)
+        t.id = "TX" + number
+        self.repo.add_transaction(t)
+        return t
+
+    def _closings(self, rows):
+        return {r.item_id: r.closing for r in rows}
+
+    # Проводка задним числом правит snapshot без пересчёта и обновляет его версию
+    def test_backdated_insert_updates_snapshot(self):
+        self.calc.compute_turnovers_until_block(self.block_date)
+        self.assertEqual(self.repo.turnovers_snapshot_version(), self.repo.data_version)
+
+        self._add("X1", self.repo.nomenclatures[0], 2, self.repo.units[1], date(2023, 2, 1))
+        self._add("X2", self.repo.nomenclatures[3], 5, self.repo.units[0], date(2023, 1, 15))
+        self._add("X3", self.repo.nomenclatures[1], 7, self.repo.units[0], date(2023, 6, 1))
+
+        cached = self.repo.load_turnovers_snapshot(self.block_date)
+        self.assertIsNotNone(cached)
+        self.assertEqual(self.repo.turnovers_snapshot_version(), self.repo.data_version)
+
+        expected = self._closings(self.calc.compute_turnovers_until_block(self.block_date))
+        actual = self._closings(cached)
+        self.assertEqual(set(actual), set(expected))
+        for item_id, closing in expected.items():
+            self.assertTrue(math.isclose(actual[item_id], closing, abs_tol=1e-9))
+
+    # Snapshot в файле другой версии считается устаревшим
+    def test_stale_snapshot_file_is_ignored(self):
+        self.calc.compute_turnovers_until_block(self.block_date)
+        self.repo._snapshot = None
+        self.assertIsNotNone(self.repo.load_turnovers_snapshot(self.block_date))
+
+        self.repo._snapshot = None
+        self.repo.data_version += 1
+        self.assertIsNone(self.repo.load_turnovers_snapshot(self.block_date))
+
+    # Правка данных в обход add_transaction (data_version не меняется) делает snapshot устаревшим
+    def test_snapshot_stale_after_direct_change(self):
+        self.calc.compute_turnovers_until_block(self.block_date)
+        self.assertIsNotNone(self.repo.load_turnovers_snapshot(self.block_date))
+        version = self.repo.data_version
+
+        t = transaction_model("D1", self.repo.nomenclatures[0], self.repo.warehouses[0], 9, self.repo.units[0], date(2023, 2, 1))
+        t.id = "TXD1"
+        self.repo.transactions.append(t)
+        self.assertEqual(self.repo.data_version, version)
+        # Ни snapshot в памяти, ни файл той же data_version не принимаются
+        self.assertIsNone(self.repo.load_turnovers_snapshot(self.block_date))
+
+        # Следующая проводка не применяет дельту к устаревшему snapshot'у
+        self._add("X1", self.repo.nomenclatures[1], 1, self.repo.units[0], date(2023, 2, 2))
+        self.assertIsNone(self.repo.turnovers_snapshot_version())
+
+        expected = self._closings(self.calc.compute_turnovers_until_block(self.block_date))
+        self.assertEqual(self._closings(self.repo.load_turnovers_snapshot(self.block_date)), expected)
+
+    # Изменённый snapshot записывается в файл и читается с той же версией
+    def test_dirty_snapshot_flushed(self):
+        self.calc.compute_turnovers_until_block(self.block_date)
+        self._add("X1", self.repo.nomenclatures[0], 3, self.repo.units[0], date(2023, 2, 1))
+        self.repo.flush_turnovers_snapshot()
+
+        self.repo._snapshot = None
+        rows = self.repo.load_turnovers_snapshot(self.block_date)
+        self.assertIsNotNone(rows)
+        expected = self._closings(self.calc.compute_turnovers_until_block(self.block_date))
+        self.assertEqual(self._closings(rows), expected)
+
+    # Checkpoint'ы обновляются дельтой и совпадают с полным построением
+    def test_checkpoints_updated_incrementally(self):
+        checkpoints = self.repo.turnover_checkpoints()
+
+        self._add("X1", self.repo.nomenclatures[2], 4, self.repo.units[1], date(2023, 1, 10))
+        self._add("X2", self.repo.nomenclatures[3], -1, self.repo.units[0], date(2024, 5, 5))
+        self.assertIs(self.repo.turnover_checkpoints(), checkpoints)
+        self._assert_checkpoints_equal(checkpoints, turnover_checkpoints.build(self.repo))
+
+        # Новый ключ задним числом меняет порядок ключей - checkpoint'ы перестраиваются
+        self._add("X3", self.repo.nomenclatures[3], 2, self.repo.units[0], date(2023, 1, 2))
+        rebuilt = self.repo.turnover_checkpoints()
+        self.assertIsNot(rebuilt, checkpoints)
+        self._assert_checkpoints_equal(rebuilt, turnover_checkpoints.build(self.repo))
+
+    def _assert_checkpoints_equal(self, actual_points, expected_points):
+        self.assertEqual(actual_points.dates, expected_points.dates)
+        for actual, expected in zip(actual_points.balances, expected_points.balances):
+            self.assertEqual(list(actual), list(expected))
+            for key, value in expected.items():
+                self.assertTrue(math.isclose(actual[key], value, abs_tol=1e-9))
+
+
+if __name__ == "__main__":
+    unittest.main()
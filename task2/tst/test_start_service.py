@@ -4,8 +4,12 @@
 Назначение: проверка создания базовых данных сервисом start_service
 """
 
+import io
 import unittest
+from contextlib import redirect_stdout
+from unittest import mock
 from src.core.storage_repository import storage_repository
+from src.settings_manager import settings_manager
 from src.start_service import start_service
 
 
@@ -34,6 +38,20 @@ class TestStartService(unittest.TestCase):
         """Проверяет, что данные по рецептам были созданы"""
         self.assertGreater(len(self.repo.receipts), 0, "Рецепты не были созданы")
 
+    def test_should_report_invalid_setting(self):
+        """Проверяет, что неверная настройка выводится в консоль и не мешает запуску, прочие ошибки не глушатся"""
+        repo = storage_repository()
+        out = io.StringIO()
+        with mock.patch.object(settings_manager, "get_result_cache", side_effect=ValueError("result_cache_size")), \
+                redirect_stdout(out):
+            start_service(repo).create()
+        self.assertIn("[WARN] Настройка result_cache", out.getvalue())
+        self.assertGreater(len(repo.units), 0)
+
+        with mock.patch.object(settings_manager, "get_result_cache", side_effect=RuntimeError("сбой")):
+            with self.assertRaises(RuntimeError):
+                start_service(storage_repository()).create()
+
 
 if __name__ == "__main__":
     unittest.main()
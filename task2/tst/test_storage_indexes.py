@@ -0,0 +1,125 @@
+import unittest
+from unittest import mock
+
+from src.core.storage_repository import storage_repository
+from src.models.receipt_model import receipt_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+"""
+Тесты индексов storage_repository (поиск по id и code)
+"""
+class test_storage_indexes(unittest.TestCase):
+
+    def setUp(self):
+        self.repo = storage_repository()
+
+    def test_success_find_by_id_after_add(self):
+        """
+        Проверка поиска по id после add_*
+        Ожидание: возвращается тот же объект
+        """
+        u = unit_model("грамм", 1); u.id = "U1"
+        self.repo.add_unit(u)
+        self.assertIs(self.repo.get_unit_by_id("U1"), u)
+        self.assertIsNone(self.repo.get_unit_by_id("U2"))
+
+    def test_success_find_by_id_assigned_after_add(self):
+        """
+        Проверка поиска, если id назначен уже после добавления
+        Ожидание: индекс перестраивается и объект находится
+        """
+        w = warehouse_model("Основной склад")
+        self.repo.add_warehouse(w)
+        w.id = "W1"
+        self.assertIs(self.repo.get_warehouse_by_id("W1"), w)
+
+    def test_success_miss_without_key_does_not_rebuild(self):
+        """
+        Проверка промаха при объектах без ключа (склады без code)
+        Ожидание: коллекция не перестраивается, проверяются только объекты без ключа
+        """
+        for i in range(100):
+            w = warehouse_model(f"Склад {i}", code=f"C{i}"); w.id = f"W{i}"
+            if not i:
+                w.code = None
+            self.repo.add_warehouse(w)
+
+        with mock.patch.object(self.repo.warehouses, "rebuild") as rebuild:
+            for _ in range(10):
+                self.assertIsNone(self.repo.warehouses.find("code", "NONE"))
+            rebuild.assert_not_called()
+        self.assertEqual(len(self.repo.warehouses._unkeyed["code"]), 1)
+
+        self.repo.warehouses[0].code = "C0"
+        self.assertIs(self.repo.warehouses.find("code", "C0"), self.repo.warehouses[0])
+        self.assertEqual(self.repo.warehouses._unkeyed["code"], [])
+
+    def test_success_index_follows_data_mutations(self):
+        """
+        Проверка синхронизации индексов при изменении repo.data[...]
+        Ожидание: удалённые объекты не находятся, добавленные - находятся
+        """
+        w1 = warehouse_model("Основной склад", code="MAIN"); w1.id = "W1"
+        w2 = warehouse_model("Резервный склад", code="RES"); w2.id = "W2"
+        self.repo.data["warehouse"].append(w1)
+        self.repo.data["warehouse"].extend([w2])
+
+        self.assertIs(self.repo.get_warehouse_by_code("RES"), w2)
+
+        self.repo.data["warehouse"].remove(w2)
+        self.assertIsNone(self.repo.get_warehouse_by_code("RES"))
+        self.assertIsNone(self.repo.get_warehouse_by_id("W2"))
+
+        self.repo.data["warehouse"].clear()
+        self.assertIsNone(self.repo.get_warehouse_by_id("W1"))
+
+    def test_success_index_follows_reorder(self):
+        """
+        Проверка sort и reverse коллекции
+        Ожидание: версия растёт, индексы полей указывают на новые позиции,
+        по ключу находится первый в новом порядке объект
+        """
+        first = warehouse_model("Склад Б", code="MAIN"); first.id = "W1"
+        second = warehouse_model("Склад А", code="MAIN"); second.id = "W2"
+        other = warehouse_model("Склад В", code="OUT"); other.id = "W3"
+        warehouses = self.repo.data["warehouse"]
+        warehouses.extend([first, second, other])
+        self.assertIs(warehouses.find("code", "MAIN"), first)
+
+        version = warehouses.version
+        warehouses.reverse()
+        self.assertGreater(warehouses.version, version)
+        self.assertIs(warehouses.find("code", "MAIN"), second)
+        self.assertEqual([warehouses[i] for i in warehouses.get_field_index("code").lookup("EQUALS", "out")], [other])
+
+        version = warehouses.version
+        warehouses.sort(key=lambda w: w.name)
+        self.assertGreater(warehouses.version, version)
+        self.assertEqual([w.id for w in warehouses], ["W2", "W1", "W3"])
+        self.assertEqual([warehouses[i] for i in warehouses.get_field_index("code").lookup("EQUALS", "out")], [other])
+        self.assertEqual(sorted(warehouses[i].id for i in warehouses.get_field_index("code").lookup("EQUALS", "main")),
+                         ["W1", "W2"])
+
+    def test_success_receipt_by_code(self):
+        """
+        Проверка поиска рецепта по коду
+        Ожидание: возвращается рецепт с указанным кодом
+        """
+        r = receipt_model("Блины", [], "грамм", "Выпечка", code="R001")
+        self.repo.add_receipt(r)
+        self.assertIs(self.repo.get_receipt_by_code("R001"), r)
+        self.assertIsNone(self.repo.get_receipt_by_code("R999"))
+
+    def test_success_models_are_hashable(self):
+        """
+        Проверка хешируемости моделей
+        Ожидание: модели можно использовать как ключи словаря
+        """
+        u = unit_model("грамм", 1)
+        self.assertEqual({u: 1}[u], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+
+from src.core.storage_repository import storage_repository
+from src.logics.osv_aggregator import OSVAggregator
+from src.logics.osv_service import OSVPrototype
+from src.models.group_model import group_model
+from src.models.nomenclature_model import nomenclature_model
+from src.models.transaction_model import transaction_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+"""
+Тесты колоночного хранилища транзакций (mmap)
+"""
+class test_transaction_column_store(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = storage_repository()
+        self.repo.transaction_store_file = os.path.join(self.tmp.name, "transactions.col")
+
+        gram = unit_model("грамм", 1); gram.id = "U1"
+        kg = unit_model("килограмм", 1000, base=gram); kg.id = "U2"
+        group = group_model("Бакалея"); group.id = "G1"
+        flour = nomenclature_model("Мука", "Мука", group, gram); flour.id = "N1"
+        sugar = nomenclature_model("Сахар", "Сахар", group, gram); sugar.id = "N2"
+        main = warehouse_model("Основной склад"); main.id = "W1"
+        res = warehouse_model("Резервный склад"); res.id = "W2"
+
+        for u in (gram, kg):
+            self.repo.add_unit(u)
+        for n in (flour, sugar):
+            self.repo.add_nomenclature(n)
+        for w in (main, res):
+            self.repo.add_warehouse(w)
+
+        rows = [
+            (flour, main, 2, kg, date(2024, 12, 20)),
+            (flour, res, 500.5, gram, date(2025, 1, 5)),
+            (flour, main, -300, gram, date(2025, 1, 10)),
+            (sugar, res, 700, gram, date(2025, 2, 3)),
+        ]
+        for i, (n, w, q, u, d) in enumerate(rows):
+            t = transaction_model(f"T{i}", n, w, q, u, d)
+            t.id = f"TX{i}"
+            self.repo.add_transaction(t)
+
+    def tearDown(self):
+        if self.repo.transaction_store is not None:
+            self.repo.transaction_store.close()
+        self.tmp.cleanup()
+
+    @staticmethod
+    def _rows(repo, warehouse=None):
+        return [
+            (r.item.id, r.warehouse.id, r.unit.id, r.opening, r.incoming, r.outgoing)
+            for r in OSVPrototype(repo).generate(date(2025, 1, 1), date(2025, 1, 31), warehouse)
+        ]
+
+    def test_success_generate_same_rows_from_store(self):
+        """
+        Проверка ОСВ по колоночному хранилищу
+        Ожидание: строки совпадают с расчётом по списку моделей
+        """
+        expected = self._rows(self.repo)
+        expected_res = self._rows(self.repo, "Резерв")
+
+        self.repo.save_transactions_columnar()
+
+        self.assertEqual(len(self.repo.transactions), 0)
+        self.assertEqual(len(self.repo.transaction_store), 4)
+        self.assertEqual(self._rows(self.repo), expected)
+        self.assertEqual(self._rows(self.repo, "Резерв"), expected_res)
+
+    def test_success_balance_deltas_from_store(self):
+        """
+        Проверка сумм движений после даты блокировки по колоночному хранилищу
+        Ожидание: совпадают с расчётом по списку моделей
+        """
+        expected = OSVAggregator.balance_deltas(self.repo.transactions, date(2025, 1, 1), date(2025, 3, 1))
+
+        self.repo.save_transactions_columnar()
+        actual = OSVAggregator.balance_deltas(
+            self.repo.transactions, date(2025, 1, 1), date(2025, 3, 1),
+            store=self.repo.transaction_store, repo=self.repo
+        )
+        self.assertEqual(actual, expected)
+
+    def test_success_append_and_materialize(self):
+        """
+        Проверка дозаписи новых транзакций и обратной материализации моделей
+        Ожидание: все строки на месте, id и номера восстановлены
+        """
+        self.repo.save_transactions_columnar()
+
+        t = transaction_model("T9", self.repo.nomenclatures[1], self.repo.warehouses[0], 5, self.repo.units[0], date(2025, 3, 1))
+        t.id = "TX9"
+        self.repo.add_transaction(t)
+        self.repo.save_transactions_columnar()
+        self.assertEqual(len(self.repo.transaction_store), 5)
+
+        self.repo.materialize_transactions()
+        self.assertIsNone(self.repo.transaction_store)
+        self.assertEqual([t.id for t in self.repo.transactions], ["TX0", "TX1", "TX2", "TX3", "TX9"])
+        self.assertEqual(self.repo.transactions[1].quantity, 500.5)
+        self.assertIs(self.repo.get_transaction_by_id("TX9").warehouse, self.repo.warehouses[0])
+
+    def test_success_collection_after_load(self):
+        """
+        Проверка выдачи транзакций после загрузки колоночного репозитория
+        Ожидание: collection("transaction") читает строки колонок и дописанные после
+        открытия, хранилище остаётся открытым, список транзакций не заполняется
+        """
+        self.repo.transaction_backend = "columnar"
+        self.repo.file_path = os.path.join(self.tmp.name, "repository.json")
+        self.repo.snapshot_file = os.path.join(self.tmp.name, "snapshot.json")
+        self.repo.save_all()
+        self.repo.load_all()
+        store = self.repo.transaction_store
+
+        self.assertEqual(len(self.repo.transactions), 0)
+        self.assertEqual([t.id for t in self.repo.collection("transaction")], ["TX0", "TX1", "TX2", "TX3"])
+        self.assertIs(self.repo.transaction_store, store)
+        self.assertEqual(len(self.repo.transactions), 0)
+
+        t = transaction_model("T9", self.repo.nomenclatures[1], self.repo.warehouses[0], 5, self.repo.units[0], date(2025, 3, 1))
+        t.id = "TX9"
+        self.repo.add_transaction(t)
+        rows = self.repo.collection("transaction")
+        self.assertEqual(len(rows), 5)
+        self.assertEqual([r.id for r in rows[3:]], ["TX3", "TX9"])
+        self.assertIs(rows[-1], t)
+        self.assertEqual(rows[1].quantity, 500.5)
+        self.assertIs(rows[1].warehouse, self.repo.get_warehouse_by_id("W2"))
+        with self.assertRaises(IndexError):
+            rows[5]
+
+    def test_success_base_closed_before_replace(self):
+        """
+        Проверка дозаписи в открытое хранилище
+        Ожидание: отображение старого файла закрыто до подмены файла
+        """
+        self.repo.save_transactions_columnar()
+        base = self.repo.transaction_store
+        replace = os.replace
+        mapped = []
+
+        def checked_replace(src, dst):
+            mapped.append(base._mmap is not None)
+            replace(src, dst)
+
+        with mock.patch("src.core.transaction_column_store.os.replace", checked_replace):
+            self.repo.save_transactions_columnar()
+        self.assertEqual(mapped, [False, False, False])
+        self.assertEqual(len(self.repo.transaction_store), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import math
+import random
+import unittest
+from datetime import date, timedelta
+
+from src.core.storage_repository import storage_repository
+from src.core.turnover_checkpoints import turnover_checkpoints
+from src.logics.osv_service import OSVPrototype
+from src.models.group_model import group_model
+from src.models.nomenclature_model import nomenclature_model
+from src.models.transaction_model import transaction_model
+from src.models.unit_model import unit_model
+from src.models.warehouse_model import warehouse_model
+
+
+class plain_storage:
+    """Хранилище без индексов: OSVPrototype считает простым проходом по списку"""
+
+    def __init__(self, repo):
+        self.nomenclatures = repo.nomenclatures
+        self.warehouses = repo.warehouses
+        self.transactions = list(repo.transactions)
+
+
+"""
+Тесты помесячных checkpoint'ов остатков
+"""
+class test_turnover_checkpoints(unittest.TestCase):
+
+    def setUp(self):
+        rnd = random.Random(7)
+        self.repo = storage_repository()
+
+        gram = unit_model("грамм", 1); gram.id = "U1"
+        kg = unit_model("килограмм", 1000, base=gram); kg.id = "U2"
+        group = group_model("Бакалея"); group.id = "G1"
+        for u in (gram, kg):
+            self.repo.add_unit(u)
+        for i in range(5):
+            n = nomenclature_model(f"Товар {i}", f"Товар {i}", group, gram); n.id = f"N{i}"
+            self.repo.add_nomenclature(n)
+        for i, code in enumerate(("MAIN", "RES")):
+            w = warehouse_model(f"Склад {i}", code=code); w.id = f"W{i}"
+            self.repo.add_warehouse(w)
+
+        day = date(2023, 1, 1)
+        for i in range(300):
+            day += timedelta(days=rnd.randint(0, 4))
+            t = transaction_model(
+                f"T{i}", rnd.choice(self.repo.nomenclatures), rnd.choice(self.repo.warehouses),
+                rnd.randint(-50, 100), rnd.choice(self.repo.units), day
+            )
+            t.id = f"TX{i}"
+            self.repo.add_transaction(t)
+
+    @staticmethod
+    def _values(rows):
+        return [(r.item.id, r.warehouse.id if r.warehouse else None, r.opening, r.incoming, r.outgoing) for r in rows]
+
+    def _assert_rows_equal(self, actual, expected):
+        self.assertEqual(len(actual), len(expected))
+        for a, e in zip(self._values(actual), self._values(expected)):
+            self.assertEqual(a[:2], e[:2])
+            for x, y in zip(a[2:], e[2:]):
+                self.assertTrue(math.isclose(x, y, abs_tol=1e-6), (a, e))
+
+    def test_success_month_end_checkpoints(self):
+        """
+        Проверка построения checkpoint'ов
+        Ожидание: даты - концы месяцев по возрастанию, поиск берёт ближайший не позже даты
+        """
+        cps = turnover_checkpoints.build(self.repo)
+
+        self.assertTrue(cps.usable)
+        self.assertEqual(cps.dates, sorted(cps.dates))
+        self.assertTrue(all(turnover_checkpoints.month_end(d) == d for d in cps.dates))
+
+        cp_date, _ = cps.at_or_before(date(2023, 3, 15))
+        self.assertEqual(cp_date, date(2023, 2, 28))
+        self.assertEqual(cps.at_or_before(date(2022, 12, 31)), (None, {}))
+
+    def test_success_osv_from_checkpoint_equals_full_scan(self):
+        """
+        Проверка ОСВ за произвольные периоды
+        Ожидание: результат с checkpoint'ами совпадает с полным проходом по истории
+        """
+        proto = OSVPrototype(self.repo)
+        plain = OSVPrototype(plain_storage(self.repo))
+
+        for start, end, wh in (
+            (date(2023, 3, 10), date(2023, 4, 20), None),
+            (date(2023, 6, 1), date(2023, 6, 30), "RES"),
+            (date(2023, 2, 1), date(2023, 2, 1), "Склад 0"),
+        ):
+            self._assert_rows_equal(proto.generate(start, end, wh), plain.generate(start, end, wh))
+
+    def test_success_checkpoints_follow_new_transactions(self):
+        """
+        Проверка актуальности checkpoint'ов после добавления транзакции задним числом
+        Ожидание: начальный остаток учитывает новую транзакцию
+        """
+        proto = OSVPrototype(self.repo)
+        before = {r.item.id: r.opening for r in proto.generate(date(2023, 6, 1), date(2023, 6, 30))}
+
+        t = transaction_model("TB", self.repo.nomenclatures[0], self.repo.warehouses[0], 7, self.repo.units[0], date(2023, 1, 2))
+        t.id = "TXB"
+        self.repo.add_transaction(t)
+
+        after = {r.item.id: r.opening for r in proto.generate(date(2023, 6, 1), date(2023, 6, 30))}
+        self.assertTrue(math.isclose(after["N0"], before["N0"] + 7))
+
+    def test_success_models_without_id(self):
+        """
+        Проверка складов и единиц без id
+        Ожидание: checkpoint'ы не применяются, ОСВ с фильтром склада совпадает с полным проходом
+        """
+        repo = storage_repository()
+        unit = unit_model("штука", 1)
+        item = nomenclature_model("Сахар", "Сахар", None, unit); item.id = "N1"
+        main, reserve = warehouse_model("Основной", code="MAIN"), warehouse_model("Резервный", code="RES")
+        for w in (main, reserve):
+            repo.add_warehouse(w)
+        repo.add_unit(unit)
+        repo.add_nomenclature(item)
+        for i, (wh, qty, day) in enumerate(((main, 9000, date(2024, 11, 5)), (reserve, 500, date(2024, 12, 1)),
+                                            (main, -1, date(2024, 12, 20)), (main, 40, date(2025, 1, 10)))):
+            repo.add_transaction(transaction_model(f"T{i}", item, wh, qty, unit, day))
+
+        self.assertFalse(turnover_checkpoints.build(repo).usable)
+        rows = OSVPrototype(repo).generate(date(2025, 1, 1), date(2025, 1, 31), "MAIN")
+        expected = OSVPrototype(plain_storage(repo)).generate(date(2025, 1, 1), date(2025, 1, 31), "MAIN")
+        self.assertEqual([(r.warehouse, r.unit, r.opening, r.incoming) for r in rows],
+                         [(r.warehouse, r.unit, r.opening, r.incoming) for r in expected])
+        self.assertEqual((rows[0].warehouse, rows[0].unit, rows[0].opening), (main, unit, 8999.0))
+
+
+if __name__ == "__main__":
+    unittest.main()